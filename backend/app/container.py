@@ -0,0 +1,106 @@
+"""
+Service Container - Builds every long-lived service once per process
+The web app (via its lifespan) and worker.py share the same wiring: clients
+are created once, reused by every request/job, and closed on shutdown.
+"""
+import os
+import asyncio
+from typing import List, Optional
+
+from app.database import init_db, engine
+from app.services.auth_service import AuthService
+from app.services.intent_service import IntentService
+from app.services.job_queue import JobQueue
+from app.services.notification_dispatcher import get_notification_dispatcher, close_notification_dispatcher
+from app.services.task_service import TaskService
+from app.services.twilio_service import get_twilio_service, close_twilio_service
+from app.services.twiml_cache import TwiMLCache
+from app.services.voice_service import VoiceService
+from app.services.webhook_idempotency import WebhookIdempotency
+from app.services.worker_service import WorkerService
+
+
+class ServiceContainer:
+    """Process-wide services plus their startup/shutdown sequence"""
+
+    def __init__(self):
+        # Shared clients; services that send messages resolve these same instances
+        self.twilio = get_twilio_service()
+        self.notifications = get_notification_dispatcher()
+
+        self.auth = AuthService()
+        self.intents = IntentService()
+        self.tasks = TaskService()
+        self.voice = VoiceService()
+        self.workers = WorkerService()
+        self.jobs = JobQueue.from_env()
+        self.webhooks = WebhookIdempotency.from_env()
+        self.twiml = TwiMLCache.from_env()
+
+        self._job_stop: Optional[asyncio.Event] = None
+        self._job_loops: List[asyncio.Task] = []
+
+    async def start(self, init_database: bool = True, inline_job_workers: int = 0):
+        """
+        Open connections and warm caches. init_database also creates tables,
+        runs migrations and prunes old webhook receipts and notification
+        statuses (once per deployment, not once per worker process).
+        """
+        if init_database:
+            await init_db()
+            print("✅ Database initialized")
+            try:
+                await self.webhooks.prune(float(os.getenv("WEBHOOK_RECEIPT_RETENTION_DAYS", "7")))
+            except Exception as e:
+                print(f"⚠️ Failed to prune webhook receipts: {e}")
+            try:
+                await self.notifications.prune(float(os.getenv("NOTIFY_STATUS_RETENTION_DAYS", "7")))
+            except Exception as e:
+                print(f"⚠️ Failed to prune notification statuses: {e}")
+
+        await self.voice.start()
+        self.twiml.warm()
+
+        if inline_job_workers > 0:
+            self.start_job_loops(f"web-{os.getpid()}", inline_job_workers)
+            print(f"✅ Started {inline_job_workers} inline job worker(s)")
+        elif init_database:
+            await self._warn_without_job_workers()
+
+    async def _warn_without_job_workers(self):
+        """The web process runs no jobs: recordings wait for a separate `python worker.py`"""
+        print("⚠️ JOB_INLINE_WORKERS=0: recordings are only processed while `python worker.py` is running")
+        try:
+            overdue = await self.jobs.overdue()
+        except Exception as e:
+            print(f"⚠️ Failed to check the job backlog: {e}")
+            return
+        if overdue:
+            print(f"⚠️ {overdue} job(s) have been waiting over a minute; no job worker seems to be running")
+
+    def start_job_loops(self, name: str, count: int) -> asyncio.Event:
+        """Run `count` job loops in this process until close() (or the returned event is set)"""
+        self._job_stop = self._job_stop or asyncio.Event()
+        self._job_loops.extend(
+            asyncio.create_task(self.jobs.work(f"{name}:{i}", self._job_stop))
+            for i in range(count)
+        )
+        return self._job_stop
+
+    async def wait_for_job_loops(self):
+        await asyncio.gather(*self._job_loops, return_exceptions=True)
+
+    async def close(self):
+        """Stop job loops, flush pending task writes and notifications, close pooled connections"""
+        if self._job_stop is not None:
+            self._job_stop.set()
+            await self.wait_for_job_loops()
+            self._job_loops = []
+            self._job_stop = None
+
+        if self.tasks.group_commit:
+            await self.tasks.group_commit.close()
+        await self.voice.close()
+        await close_notification_dispatcher()
+        close_twilio_service()
+        await engine.dispose()
@@ -1,14 +1,110 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import Column, String, Float, DateTime, Boolean, Integer, Text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+from sqlalchemy import Column, String, Float, DateTime, Boolean, Integer, Text, Index, event
 import os
 from datetime import datetime
+from typing import Dict
 import uuid
 
+from app.priority import priority_at
+
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./data/receptionist.db")
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+# Per-driver defaults; each can be overridden with the DB_* variable of the same name
+ENGINE_DEFAULTS = {
+    "postgresql": {
+        "DB_POOL_SIZE": "10",
+        "DB_MAX_OVERFLOW": "20",
+        "DB_POOL_TIMEOUT": "30",
+        "DB_POOL_PRE_PING": "true",  # Survive Postgres restarts / idle connection reaping
+        "DB_POOL_RECYCLE": "1800",
+        "DB_STATEMENT_CACHE_SIZE": "100",  # asyncpg's per-connection statement cache (0 behind pgbouncer)
+        "DB_PREPARED_STATEMENT_CACHE_SIZE": "100",  # SQLAlchemy's prepared statement cache (0 disables)
+    },
+    "sqlite": {
+        "DB_POOL_SIZE": "5",  # 0 opens a new connection (and aiosqlite thread) per session
+        "DB_MAX_OVERFLOW": "10",
+        "DB_POOL_TIMEOUT": "30",
+        "DB_POOL_PRE_PING": "false",
+        "DB_POOL_RECYCLE": "-1",
+        "DB_SQLITE_JOURNAL_MODE": "WAL",  # Readers don't block the writer
+        "DB_SQLITE_SYNCHRONOUS": "NORMAL",  # fsync at checkpoints only; safe with WAL
+        "DB_SQLITE_BUSY_TIMEOUT_MS": "5000",
+        "DB_SQLITE_CACHE_SIZE_KB": "32768",  # Page cache per connection
+        "DB_SQLITE_SHARED_CACHE": "false",  # One page cache for all connections, but table-level locking
+    },
+}
+
+
+def _setting(backend: str, name: str) -> str:
+    return os.getenv(name, ENGINE_DEFAULTS[backend].get(name, ""))
+
+
+def _flag(backend: str, name: str) -> bool:
+    return _setting(backend, name).lower() in ("1", "true", "yes")
+
+
+def engine_settings(url: str = DATABASE_URL) -> Dict[str, str]:
+    """The effective DB_* settings for a database URL (for logging and benchmarks)"""
+    backend = make_url(url).get_backend_name()
+    return {name: _setting(backend, name) for name in ENGINE_DEFAULTS.get(backend, {})}
+
+
+def build_engine(url: str = DATABASE_URL) -> AsyncEngine:
+    """Create the async engine with pool and driver settings from the environment"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    options = {"echo": os.getenv("DB_ECHO", "false").lower() == "true"}
+    if backend not in ENGINE_DEFAULTS:
+        return create_async_engine(url, **options)
+
+    pool_size = int(_setting(backend, "DB_POOL_SIZE"))
+    if pool_size > 0:
+        options.update(
+            poolclass=AsyncAdaptedQueuePool,  # aiosqlite would otherwise default to NullPool
+            pool_size=pool_size,
+            max_overflow=int(_setting(backend, "DB_MAX_OVERFLOW")),
+            pool_timeout=float(_setting(backend, "DB_POOL_TIMEOUT")),
+            pool_pre_ping=_flag(backend, "DB_POOL_PRE_PING"),
+            pool_recycle=int(_setting(backend, "DB_POOL_RECYCLE")),
+        )
+    else:
+        options["poolclass"] = NullPool
+
+    if backend == "postgresql":
+        options["connect_args"] = {
+            "statement_cache_size": int(_setting(backend, "DB_STATEMENT_CACHE_SIZE")),
+            "prepared_statement_cache_size": int(_setting(backend, "DB_PREPARED_STATEMENT_CACHE_SIZE")),
+        }
+        return create_async_engine(url, **options)
+
+    memory = url.database in (None, "", ":memory:")
+    if _flag(backend, "DB_SQLITE_SHARED_CACHE") and not memory and not url.database.startswith("file:"):
+        url = url.set(database=f"file:{url.database}").update_query_dict({"uri": "true", "cache": "shared"})
+
+    engine = create_async_engine(url, **options)
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(_setting(backend, 'DB_SQLITE_BUSY_TIMEOUT_MS'))}",
+        f"PRAGMA cache_size = -{int(_setting(backend, 'DB_SQLITE_CACHE_SIZE_KB'))}",
+        f"PRAGMA synchronous = {_setting(backend, 'DB_SQLITE_SYNCHRONOUS')}",
+    ]
+    if not memory:
+        pragmas.insert(0, f"PRAGMA journal_mode = {_setting(backend, 'DB_SQLITE_JOURNAL_MODE')}")
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return engine
+
+
+engine = build_engine(DATABASE_URL)
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 Base = declarative_base()
 
@@ -22,15 +118,23 @@ class UserDB(Base):
     hashed_password = Column(String, nullable=False)
     business_name = Column(String, nullable=False)
     twilio_phone = Column(String, index=True, nullable=True)  # Map incoming calls to this business
+    custom_intents = Column(Text, nullable=True)  # JSON list overriding the default service categories
+    custom_greeting = Column(Text, nullable=True)  # JSON {language: greeting} spoken to inbound callers
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+def _task_priority_at(context):
+    """Default for tasks inserted without a priority key (the service always sets one)"""
+    row = context.get_current_parameters()
+    return priority_at(row.get("urgency"), row.get("created_at") or datetime.utcnow())
+
+
 class TaskDB(Base):
     """Database model for tasks"""
     __tablename__ = "tasks"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    business_id = Column(String, index=True, nullable=False)
+    business_id = Column(String, nullable=False)  # Indexed by the composites below
     intent = Column(String, nullable=False)
     issue = Column(Text, nullable=False)
     urgency = Column(String, nullable=False)
@@ -46,6 +150,19 @@ class TaskDB(Base):
     escalation_reason = Column(String, nullable=True)
     assigned_to = Column(String, nullable=True)  # Worker ID
     assigned_worker_name = Column(String, nullable=True)  # Worker name for quick display
+    prompt_version = Column(String, nullable=True)  # Extraction prompt/classifier that produced this task
+    # created_at minus the urgency head start (PRIORITY_AGING_SECONDS per level); earliest is most pressing
+    priority_at = Column(DateTime, nullable=True, default=_task_priority_at)
+
+    __table_args__ = (
+        # Dashboard listing: newest tasks for a business, optionally by status, without a
+        # sort; id is the keyset pagination tie-breaker
+        Index("ix_tasks_business_created", "business_id", "created_at", "id"),
+        Index("ix_tasks_business_status_created", "business_id", "status", "created_at", "id"),
+        # Priority listing (sort=priority) and the backlog order of assign_backlog
+        Index("ix_tasks_business_priority", "business_id", "priority_at", "id"),
+        Index("ix_tasks_business_status_priority", "business_id", "status", "priority_at", "id"),
+    )
 
 
 class WorkerDB(Base):
@@ -53,10 +170,9 @@ class WorkerDB(Base):
     __tablename__ = "workers"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    business_id = Column(String, index=True, nullable=False)
+    business_id = Column(String, nullable=False)  # Indexed by ix_workers_business_name
     name = Column(String, nullable=False)
     phone = Column(String, nullable=False)
-    skills = Column(Text, nullable=False)  # JSON string of skills array
     status = Column(String, default="available")  # available, busy, offline
     current_tasks = Column(Integer, default=0)
     max_tasks = Column(Integer, default=5)
@@ -65,6 +181,23 @@ class WorkerDB(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_workers_business_name", "business_id", "name", "id"),  # Worker listing order
+    )
+
+
+class WorkerSkillDB(Base):
+    """Database model for worker skills (one row per worker and skill)"""
+    __tablename__ = "worker_skills"
+
+    worker_id = Column(String, primary_key=True)  # Also serves "skills of these workers"
+    skill = Column(String, primary_key=True)
+    business_id = Column(String, nullable=False)
+
+    __table_args__ = (
+        Index("ix_worker_skills_business_skill", "business_id", "skill", "worker_id"),  # Workers with a skill
+    )
+
 
 class CallLogDB(Base):
     """Database model for call logs"""
@@ -93,6 +226,84 @@ class FailureLogDB(Base):
     context = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_failure_logs_created_at", "created_at", "id"),  # Failure log listing, newest first
+    )
+
+
+class BusinessCountersDB(Base):
+    """Per-business dashboard aggregates, updated in the same transaction as each mutation"""
+    __tablename__ = "business_counters"
+
+    business_id = Column(String, primary_key=True)
+    total_calls = Column(Integer, nullable=False, default=0)
+    tasks_created = Column(Integer, nullable=False, default=0)
+    escalations = Column(Integer, nullable=False, default=0)  # Tasks currently in "escalated"
+    failures = Column(Integer, nullable=False, default=0)
+    workers_total = Column(Integer, nullable=False, default=0)
+    workers_available = Column(Integer, nullable=False, default=0)
+    workers_busy = Column(Integer, nullable=False, default=0)
+    total_jobs = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Float, nullable=False, default=0.0)  # Sum of worker ratings (rated workers only)
+    rating_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class JobDB(Base):
+    """Database model for durable background jobs (see app/services/job_queue.py)"""
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    kind = Column(String, nullable=False)
+    idempotency_key = Column(String, unique=True, nullable=True)  # e.g. recording:<RecordingSid>
+    business_id = Column(String, nullable=True)
+    payload = Column(Text, nullable=False)  # JSON arguments for the handler
+    status = Column(String, default="queued")  # queued, running, done, dead
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=5)
+    run_at = Column(DateTime, default=datetime.utcnow)  # Not claimable before this (retry backoff)
+    locked_by = Column(String, nullable=True)
+    locked_until = Column(DateTime, nullable=True)  # Lease expiry; expired running jobs are reclaimed
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+        # Per-business job counts (also serves plain business_id lookups)
+        Index("ix_jobs_business_status", "business_id", "status"),
+    )
+
+
+class NotificationDB(Base):
+    """Database model for outbound notification delivery state (see app/services/notification_dispatcher.py)"""
+    __tablename__ = "notifications"
+
+    id = Column(String, primary_key=True)
+    business_id = Column(String, nullable=True)
+    recipient = Column(String, nullable=False)
+    channel = Column(String, nullable=False)  # sms, whatsapp
+    kind = Column(String, nullable=False)  # task_alert, escalation, assignment, ...
+    urgency = Column(String, default="medium")
+    status = Column(String, default="queued")  # queued, coalescing, sent, delivered, failed, simulated, ...
+    attempts = Column(Integer, default=0)
+    sid = Column(String, nullable=True, index=True)  # Twilio message SID, matched by status callbacks
+    digest_size = Column(Integer, default=1)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class WebhookReceiptDB(Base):
+    """Database model for processed webhook deliveries (idempotency keys)"""
+    __tablename__ = "webhook_receipts"
+
+    key = Column(String, primary_key=True)  # e.g. sms:<MessageSid>, recording:<RecordingSid>
+    status = Column(String, default="processing")  # processing, done
+    response = Column(Text, nullable=True)  # JSON body returned for the first delivery
+    task_id = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
 
 async def init_db():
     """Initialize database tables"""
@@ -100,8 +311,11 @@ async def init_db():
     if "sqlite" in DATABASE_URL:
         os.makedirs("./data", exist_ok=True)
     
+    from app.migrations import run_migrations
+    
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await run_migrations(conn)
 
 
 async def get_db():
@@ -0,0 +1,162 @@
+"""
+Lightweight schema migrations
+create_all() only creates missing tables; these steps evolve existing ones.
+Each migration runs once and is recorded in the schema_migrations table.
+"""
+import json
+from datetime import datetime
+from typing import Awaitable, Callable, List, Tuple
+from sqlalchemy import bindparam, inspect, insert, select, text, update
+from sqlalchemy.ext.asyncio import AsyncConnection
+from app.priority import priority_at
+
+Migration = Callable[[AsyncConnection], Awaitable[None]]
+
+
+async def _column_names(conn: AsyncConnection, table: str) -> set:
+    columns = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_columns(table))
+    return {column["name"] for column in columns}
+
+
+def add_column(table: str, column: str, ddl_type: str) -> Migration:
+    """Add a nullable column if the table doesn't already have it"""
+    async def migrate(conn: AsyncConnection):
+        if column not in await _column_names(conn, table):
+            await conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+    return migrate
+
+
+def create_index(table: str, name: str) -> Migration:
+    """Create an index declared in the model's __table_args__ on an existing table"""
+    async def migrate(conn: AsyncConnection):
+        from app.database import Base
+        index = next(index for index in Base.metadata.tables[table].indexes if index.name == name)
+        await conn.run_sync(lambda sync_conn: index.create(sync_conn, checkfirst=True))
+    return migrate
+
+
+def rebuild_index(table: str, name: str) -> Migration:
+    """Recreate an index whose column list changed in the model (skipped if it already matches)"""
+    drop, create = drop_index(name), create_index(table, name)
+
+    async def migrate(conn: AsyncConnection):
+        from app.database import Base
+        index = next(index for index in Base.metadata.tables[table].indexes if index.name == name)
+        existing = await conn.run_sync(lambda sync_conn: {
+            found["name"]: found["column_names"] for found in inspect(sync_conn).get_indexes(table)
+        })
+        if existing.get(name) == [column.name for column in index.columns]:
+            return
+        await drop(conn)
+        await create(conn)
+    return migrate
+
+
+def drop_index(name: str) -> Migration:
+    """Drop an index that a composite index has made redundant"""
+    async def migrate(conn: AsyncConnection):
+        await conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    return migrate
+
+
+def drop_column(table: str, column: str) -> Migration:
+    """Drop a column whose data has moved elsewhere"""
+    async def migrate(conn: AsyncConnection):
+        if column in await _column_names(conn, table):
+            await conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+    return migrate
+
+
+async def backfill_business_counters(conn: AsyncConnection):
+    """Seed business_counters from the existing rows"""
+    from app.services.counters import reconcile_all
+    await reconcile_all(conn)
+
+
+async def backfill_worker_skills(conn: AsyncConnection):
+    """Copy the JSON workers.skills arrays into worker_skills rows"""
+    if "skills" not in await _column_names(conn, "workers"):
+        return  # Fresh database: workers never had the JSON column
+
+    result = await conn.execute(text("SELECT id, business_id, skills FROM workers"))
+    rows = []
+    for worker_id, business_id, skills in result:
+        try:
+            skills = json.loads(skills or "[]")
+        except ValueError:
+            print(f"⚠️ Worker {worker_id[:8]} has unreadable skills, leaving it without any: {skills!r}")
+            continue
+        rows.extend(
+            {"worker_id": worker_id, "skill": skill, "business_id": business_id}
+            for skill in dict.fromkeys(skills) if isinstance(skill, str)
+        )
+
+    if rows:
+        from app.database import WorkerSkillDB
+        await conn.execute(insert(WorkerSkillDB), rows)
+
+
+async def backfill_task_priority(conn: AsyncConnection):
+    """Set tasks.priority_at from urgency and created_at"""
+    from app.database import TaskDB
+
+    # Typed select, so SQLite hands back created_at as a datetime
+    result = await conn.execute(
+        select(TaskDB.id, TaskDB.urgency, TaskDB.created_at).where(TaskDB.priority_at.is_(None))
+    )
+    rows = [
+        {"task_id": task_id, "priority_at": priority_at(urgency, created_at or datetime.utcnow())}
+        for task_id, urgency, created_at in result
+    ]
+    if rows:
+        await conn.execute(
+            update(TaskDB).where(TaskDB.id == bindparam("task_id")).values(priority_at=bindparam("priority_at")),
+            rows
+        )
+
+
+# Append only; ids must never be reused or reordered
+MIGRATIONS: List[Tuple[str, Migration]] = [
+    ("0001_tasks_prompt_version", add_column("tasks", "prompt_version", "VARCHAR")),
+    ("0002_users_custom_intents", add_column("users", "custom_intents", "TEXT")),
+    ("0003_users_custom_greeting", add_column("users", "custom_greeting", "TEXT")),
+    ("0004_business_counters_backfill", backfill_business_counters),
+    ("0005_tasks_business_created_index", create_index("tasks", "ix_tasks_business_created")),
+    ("0006_tasks_business_status_created_index", create_index("tasks", "ix_tasks_business_status_created")),
+    ("0007_workers_business_name_index", create_index("workers", "ix_workers_business_name")),
+    ("0008_failure_logs_created_at_index", create_index("failure_logs", "ix_failure_logs_created_at")),
+    ("0009_drop_tasks_business_id_index", drop_index("ix_tasks_business_id")),
+    ("0010_drop_workers_business_id_index", drop_index("ix_workers_business_id")),
+    ("0011_tasks_business_created_keyset", rebuild_index("tasks", "ix_tasks_business_created")),
+    ("0012_tasks_business_status_created_keyset", rebuild_index("tasks", "ix_tasks_business_status_created")),
+    ("0013_workers_business_name_keyset", rebuild_index("workers", "ix_workers_business_name")),
+    ("0014_failure_logs_created_at_keyset", rebuild_index("failure_logs", "ix_failure_logs_created_at")),
+    ("0015_worker_skills_backfill", backfill_worker_skills),
+    ("0016_drop_workers_skills", drop_column("workers", "skills")),
+    ("0017_tasks_priority_at", add_column("tasks", "priority_at", "TIMESTAMP")),
+    ("0018_tasks_priority_backfill", backfill_task_priority),
+    ("0019_tasks_business_priority_index", create_index("tasks", "ix_tasks_business_priority")),
+    ("0020_tasks_business_status_priority_index", create_index("tasks", "ix_tasks_business_status_priority")),
+    ("0021_jobs_business_status_index", create_index("jobs", "ix_jobs_business_status")),
+    ("0022_drop_jobs_business_id_index", drop_index("ix_jobs_business_id")),
+]
+
+
+async def run_migrations(conn: AsyncConnection):
+    """Apply pending migrations inside the caller's transaction"""
+    await conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "id VARCHAR PRIMARY KEY, applied_at TIMESTAMP NOT NULL)"
+    ))
+    result = await conn.execute(text("SELECT id FROM schema_migrations"))
+    applied = {row[0] for row in result}
+
+    for migration_id, migrate in MIGRATIONS:
+        if migration_id in applied:
+            continue
+        await migrate(conn)
+        await conn.execute(
+            text("INSERT INTO schema_migrations (id, applied_at) VALUES (:id, :applied_at)"),
+            {"id": migration_id, "applied_at": datetime.utcnow()}
+        )
+        print(f"✅ Applied migration {migration_id}")
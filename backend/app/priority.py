@@ -0,0 +1,46 @@
+"""
+Urgency priority - How much head start each urgency level gets
+Work is ordered lowest score first, where
+
+    score = time it started waiting - head start for its urgency
+
+and each urgency level above "low" is worth PRIORITY_AGING_SECONDS of
+waiting (default 900, so critical starts 45 minutes ahead of low). A critical
+item overtakes routine work queued less than its head start earlier, and
+anything that has waited longer than that goes first regardless, so low
+urgency work is delayed but never starved.
+
+The same score orders the in-process queues (app/services/priority_scheduler.py,
+the notification dispatcher) and the dashboard's priority listing, where it is
+stored per task from created_at (tasks.priority_at).
+"""
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+# Lower is more urgent; unknown urgencies sort with "low"
+URGENCY_RANK = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+
+
+def urgency_rank(urgency: Optional[str]) -> int:
+    return URGENCY_RANK.get((urgency or "").lower(), URGENCY_RANK["low"])
+
+
+def urgency_level(urgency: Optional[str]) -> str:
+    """Canonical urgency name ("Critical" -> "critical", unknown -> "low")"""
+    level = (urgency or "").lower()
+    return level if level in URGENCY_RANK else "low"
+
+
+def aging_seconds() -> float:
+    return float(os.getenv("PRIORITY_AGING_SECONDS", "900"))
+
+
+def head_start(urgency: Optional[str], aging: Optional[float] = None) -> float:
+    """Seconds of waiting that `urgency` is worth over "low" """
+    return (URGENCY_RANK["low"] - urgency_rank(urgency)) * (aging_seconds() if aging is None else aging)
+
+
+def priority_at(urgency: Optional[str], created_at: datetime, aging: Optional[float] = None) -> datetime:
+    """A task's stored priority key: earlier is handled first"""
+    return created_at - timedelta(seconds=head_start(urgency, aging))
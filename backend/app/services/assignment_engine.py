@@ -0,0 +1,62 @@
+"""
+Assignment Engine - Plans auto-assignment for a whole backlog at once
+Tasks are taken in priority order (priority_at: urgency with aging, as in the
+dashboard's priority listing) and each goes to the best worker for its intent
+under the same ranking as auto_assign_task: fewest current tasks, then
+highest rating. Every pick updates the worker's load in a private copy of
+the skill heaps, so later tasks in the batch see it and no worker is planned
+past max_tasks.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from app.priority import priority_at
+from app.services.skill_index import BusinessSkills, IndexedWorker
+
+
+def _priority(task):
+    # priority_at is set on insert and backfilled; computed only for rows that lack it
+    return task.priority_at or priority_at(task.urgency, task.created_at or datetime.utcnow()), task.id
+
+
+@dataclass
+class AssignmentPlan:
+    """Planned task ids per worker, plus the tasks no worker could take"""
+    by_worker: Dict[str, List[str]]
+    unassigned: List[str]
+
+
+def plan_assignments(tasks: Sequence, roster: BusinessSkills, limit: Optional[int] = None) -> AssignmentPlan:
+    """
+    Greedy plan for `tasks` (rows with id, intent, urgency, created_at, priority_at),
+    stopping after `limit` assignments. `roster` is consumed: its workers'
+    loads are advanced as tasks are planned.
+    """
+    by_worker: Dict[str, List[str]] = {}
+    unassigned: List[str] = []
+    planned = 0
+
+    for task in sorted(tasks, key=_priority):
+        if limit is not None and planned >= limit:
+            break
+
+        worker_id = roster.best(task.intent)
+        if worker_id is None:
+            unassigned.append(task.id)
+            continue
+
+        by_worker.setdefault(worker_id, []).append(task.id)
+        planned += 1
+        worker = roster.workers[worker_id]
+        current_tasks = worker.current_tasks + 1
+        roster.put(IndexedWorker(
+            id=worker.id,
+            skills=worker.skills,
+            status="busy" if current_tasks >= worker.max_tasks else worker.status,
+            current_tasks=current_tasks,
+            max_tasks=worker.max_tasks,
+            rating=worker.rating
+        ))
+
+    return AssignmentPlan(by_worker=by_worker, unassigned=unassigned)
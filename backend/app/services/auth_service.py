@@ -1,6 +1,6 @@
 import os
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from dotenv import load_dotenv
@@ -15,8 +15,9 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 1 week
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 from app.database import AsyncSessionLocal, UserDB
-from sqlalchemy import select
+from sqlalchemy import select, update
 import uuid
+import json
 
 class AuthService:
     """Service for handling authentication, hashing, and JWTs"""
@@ -95,3 +96,43 @@ class AuthService:
                 select(UserDB).where(UserDB.twilio_phone == phone)
             )
             return result.scalar_one_or_none()
+
+    async def get_business_greeting(self, business_id: str) -> Optional[Dict[str, str]]:
+        """Per-language greetings configured by a business"""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(UserDB.custom_greeting).where(UserDB.id == business_id)
+            )
+            greeting = result.scalar_one_or_none()
+            return json.loads(greeting) if greeting else None
+
+    async def get_custom_greeting(self, phone: str) -> Optional[Dict[str, str]]:
+        """Per-language greetings of the business that owns a Twilio number"""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(UserDB.custom_greeting).where(UserDB.twilio_phone == phone)
+            )
+            greeting = result.scalar_one_or_none()
+            return json.loads(greeting) if greeting else None
+
+    async def update_custom_greeting(self, business_id: str, greetings: Optional[Dict[str, str]]) -> bool:
+        """Store a business's inbound call greetings (None restores the defaults)"""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                update(UserDB)
+                .where(UserDB.id == business_id)
+                .values(custom_greeting=json.dumps(greetings) if greetings else None)
+            )
+            await session.commit()
+            return result.rowcount > 0
+
+    async def update_custom_intents(self, business_id: str, intents: Optional[List[str]]) -> bool:
+        """Store a business's custom intent list (None restores the defaults)"""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                update(UserDB)
+                .where(UserDB.id == business_id)
+                .values(custom_intents=json.dumps(intents) if intents else None)
+            )
+            await session.commit()
+            return result.rowcount > 0
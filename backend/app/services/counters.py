@@ -0,0 +1,133 @@
+"""
+Business Counters - Incrementally maintained dashboard aggregates
+Every mutation that changes a dashboard number calls bump() inside its own
+transaction, so the stats endpoints read one row instead of running COUNTs.
+compute_counters() rebuilds a business's row with a single query and is used
+for backfill and reconciliation.
+"""
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncConnection
+
+from app.database import BusinessCountersDB, CallLogDB, FailureLogDB, TaskDB, WorkerDB
+
+COUNTER_FIELDS = (
+    "total_calls", "tasks_created", "escalations", "failures",
+    "workers_total", "workers_available", "workers_busy",
+    "total_jobs", "rating_sum", "rating_count",
+)
+
+# Worker statuses with their own counter; anything else counts as offline
+WORKER_STATUS_FIELDS = {"available": "workers_available", "busy": "workers_busy"}
+
+
+def _insert(dialect_name: str):
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _dialect_name(conn) -> str:
+    """Works for both AsyncSession (bound to the engine) and AsyncConnection"""
+    if isinstance(conn, AsyncSession):
+        return conn.bind.dialect.name
+    return conn.dialect.name
+
+
+def _upsert(dialect_name: str, business_id: str, values: Dict, increment: bool):
+    """INSERT ... ON CONFLICT DO UPDATE, either adding `values` or replacing with them"""
+    now = datetime.utcnow()
+    insert = _insert(dialect_name)
+    stmt = insert(BusinessCountersDB).values(business_id=business_id, updated_at=now, **values)
+    if increment:
+        updates = {name: getattr(BusinessCountersDB, name) + stmt.excluded[name] for name in values}
+    else:
+        updates = {name: stmt.excluded[name] for name in values}
+    updates["updated_at"] = now
+    return stmt.on_conflict_do_update(index_elements=[BusinessCountersDB.business_id], set_=updates)
+
+
+async def bump(session: AsyncSession, business_id: Optional[str], **deltas):
+    """Add deltas to a business's counters as part of the caller's transaction"""
+    deltas = {name: value for name, value in deltas.items() if value}
+    if not business_id or not deltas:
+        return
+    await session.execute(_upsert(_dialect_name(session), business_id, deltas, increment=True))
+
+
+def worker_status_deltas(old_status: Optional[str], new_status: Optional[str]) -> Dict[str, int]:
+    """Counter changes for a worker moving between statuses (None = not existing)"""
+    deltas: Dict[str, int] = {}
+    if old_status == new_status:
+        return deltas
+    if old_status in WORKER_STATUS_FIELDS:
+        deltas[WORKER_STATUS_FIELDS[old_status]] = -1
+    if new_status in WORKER_STATUS_FIELDS:
+        name = WORKER_STATUS_FIELDS[new_status]
+        deltas[name] = deltas.get(name, 0) + 1
+    return deltas
+
+
+def escalation_delta(old_status: Optional[str], new_status: Optional[str]) -> int:
+    return int(new_status == "escalated") - int(old_status == "escalated")
+
+
+def _counters_query(business_id: str):
+    """All counters for one business in a single round trip (scalar subqueries)"""
+    def scalar(query):
+        return query.scalar_subquery()
+
+    workers = WorkerDB.business_id == business_id
+    return select(
+        scalar(select(func.count(CallLogDB.id)).where(CallLogDB.business_id == business_id)).label("total_calls"),
+        scalar(select(func.count(TaskDB.id)).where(TaskDB.business_id == business_id)).label("tasks_created"),
+        scalar(select(func.count(TaskDB.id)).where(
+            TaskDB.business_id == business_id, TaskDB.status == "escalated"
+        )).label("escalations"),
+        scalar(select(func.count(FailureLogDB.id)).where(FailureLogDB.business_id == business_id)).label("failures"),
+        scalar(select(func.count(WorkerDB.id)).where(workers)).label("workers_total"),
+        scalar(select(func.count(WorkerDB.id)).where(workers, WorkerDB.status == "available")).label("workers_available"),
+        scalar(select(func.count(WorkerDB.id)).where(workers, WorkerDB.status == "busy")).label("workers_busy"),
+        scalar(select(func.coalesce(func.sum(WorkerDB.total_jobs), 0)).where(workers)).label("total_jobs"),
+        scalar(select(func.coalesce(func.sum(WorkerDB.rating), 0.0)).where(
+            workers, WorkerDB.rating.isnot(None)
+        )).label("rating_sum"),
+        scalar(select(func.count(WorkerDB.id)).where(workers, WorkerDB.rating.isnot(None))).label("rating_count"),
+    )
+
+
+async def compute_counters(conn, business_id: str) -> Dict:
+    """Recount a business from the source tables (one query)"""
+    row = (await conn.execute(_counters_query(business_id))).mappings().one()
+    return {name: row[name] or 0 for name in COUNTER_FIELDS}
+
+
+async def reconcile(conn, business_id: str) -> Dict:
+    """Overwrite a business's counters with a fresh recount and return them"""
+    counters = await compute_counters(conn, business_id)
+    await conn.execute(_upsert(_dialect_name(conn), business_id, counters, increment=False))
+    return counters
+
+
+async def reconcile_all(conn: AsyncConnection):
+    """Backfill counters for every business that has any data"""
+    business_ids = set()
+    for column in (CallLogDB.business_id, TaskDB.business_id, FailureLogDB.business_id, WorkerDB.business_id):
+        result = await conn.execute(select(column).where(column.isnot(None)).distinct())
+        business_ids.update(row[0] for row in result)
+    for business_id in business_ids:
+        await reconcile(conn, business_id)
+
+
+async def read_counters(session: AsyncSession, business_id: str) -> Dict:
+    """The stored counters for a business (zeros if it has no activity yet)"""
+    result = await session.execute(
+        select(BusinessCountersDB).where(BusinessCountersDB.business_id == business_id)
+    )
+    row = result.scalar_one_or_none()
+    if row is None:
+        return {name: 0 for name in COUNTER_FIELDS}
+    return {name: getattr(row, name) or 0 for name in COUNTER_FIELDS}
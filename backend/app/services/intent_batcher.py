@@ -0,0 +1,107 @@
+"""
+Intent Batcher - Coalesces concurrent extract_intent calls into one LLM request
+Requests arriving within a short window (or until the batch is full) share a
+single multi-transcript prompt; results are fanned back out to each caller.
+Requests are grouped by prompt version so tenants with custom intent lists
+are never mixed into one call.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+# extract_batch(transcripts, prompt) / extract_one(transcript, prompt)
+BatchExtractor = Callable[[List[str], Any], Awaitable[List[Optional[Dict]]]]
+SingleExtractor = Callable[[str, Any], Awaitable[Dict]]
+
+
+class IntentBatcher:
+    """Async micro-batcher with per-item fallback to single extraction"""
+
+    def __init__(
+        self,
+        extract_batch: BatchExtractor,
+        extract_one: SingleExtractor,
+        window_seconds: float = 0.025,
+        max_batch_size: int = 16
+    ):
+        self.extract_batch = extract_batch
+        self.extract_one = extract_one
+        self.window_seconds = window_seconds
+        self.max_batch_size = max(1, max_batch_size)
+        self.batches_sent = 0
+        self.items_batched = 0
+        self.individual_retries = 0
+        # group key -> (prompt, pending items, flush timer)
+        self._groups: Dict[str, Tuple[Any, List[Tuple[str, asyncio.Future]], asyncio.TimerHandle]] = {}
+        self._running: Set[asyncio.Task] = set()
+
+    async def submit(self, transcript: str, prompt: Any, group: str = "") -> Dict:
+        """Queue a transcript and wait for its extraction"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if group not in self._groups:
+            timer = loop.call_later(self.window_seconds, self._dispatch, group)
+            self._groups[group] = (prompt, [], timer)
+        pending = self._groups[group][1]
+        pending.append((transcript, future))
+
+        if len(pending) >= self.max_batch_size:
+            self._dispatch(group)
+
+        return await future
+
+    def _dispatch(self, group: str):
+        entry = self._groups.pop(group, None)
+        if entry is None:
+            return
+        prompt, batch, timer = entry
+        timer.cancel()
+        batch = [(t, f) for t, f in batch if not f.done()]  # Drop cancelled callers
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._run(batch, prompt))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]], prompt: Any):
+        if len(batch) == 1:
+            await self._run_one(*batch[0], prompt)
+            return
+
+        self.batches_sent += 1
+        self.items_batched += len(batch)
+        try:
+            results = await self.extract_batch([t for t, _ in batch], prompt)
+        except Exception as e:
+            print(f"Batched intent extraction failed, retrying individually: {e}")
+            results = [None] * len(batch)
+
+        retries = []
+        for (transcript, future), result in zip(batch, results):
+            if result is None:
+                retries.append(self._run_one(transcript, future, prompt))
+            elif not future.done():
+                future.set_result(result)
+
+        if retries:
+            self.individual_retries += len(retries)
+            await asyncio.gather(*retries)
+
+    async def _run_one(self, transcript: str, future: asyncio.Future, prompt: Any):
+        try:
+            result = await self.extract_one(transcript, prompt)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
+
+    def stats(self) -> Dict:
+        return {
+            "window_ms": self.window_seconds * 1000,
+            "max_batch_size": self.max_batch_size,
+            "batches_sent": self.batches_sent,
+            "items_batched": self.items_batched,
+            "individual_retries": self.individual_retries,
+            "average_batch_size": round(self.items_batched / self.batches_sent, 2) if self.batches_sent else 0.0
+        }
@@ -0,0 +1,187 @@
+"""
+Intent Cache - Skips the LLM for repeated or near-identical customer messages
+Exact tier: normalized text -> extraction (LRU + TTL, scoped per tenant)
+Near tier (optional): character n-gram MinHash index per tenant, themselves
+kept in an LRU + TTL cache so idle tenants and superseded prompt versions
+don't keep their index forever
+"""
+import os
+import re
+import copy
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from app.services.cache import TTLCache
+
+
+_PUNCTUATION = re.compile(r"[^\w\s]+", re.UNICODE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Case-fold, drop punctuation and collapse whitespace"""
+    text = _PUNCTUATION.sub(" ", text.casefold())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class MinHashIndex:
+    """
+    Character n-gram MinHash signatures with LSH banding.
+    Finds previously seen texts whose estimated Jaccard similarity
+    is above a threshold without comparing against every entry.
+    """
+
+    _PRIME = (1 << 61) - 1
+    _MASK = (1 << 32) - 1
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, ngram: int = 3, max_entries: int = 2000):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram = ngram
+        self.max_entries = max_entries
+        # Fixed coefficients so signatures are stable across restarts
+        self._coefficients = [
+            (zlib.crc32(f"a{i}".encode()) | 1, zlib.crc32(f"b{i}".encode()))
+            for i in range(num_perm)
+        ]
+        self._signatures: "OrderedDict[str, Tuple[int, ...]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], set] = {}
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        padded = f" {text} "
+        if len(padded) <= self.ngram:
+            shingles = {padded}
+        else:
+            shingles = {padded[i:i + self.ngram] for i in range(len(padded) - self.ngram + 1)}
+        hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles]
+        prime, mask = self._PRIME, self._MASK
+        return tuple(
+            min(((a * h + b) % prime) & mask for h in hashes)
+            for a, b in self._coefficients
+        )
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield (band, signature[start:start + self.rows])
+
+    def add(self, key: str):
+        """Index a normalized text (the key doubles as the text)"""
+        if key in self._signatures:
+            self._signatures.move_to_end(key)
+            return
+        signature = self.signature(key)
+        self._signatures[key] = signature
+        for band_key in self._band_keys(signature):
+            self._buckets.setdefault(band_key, set()).add(key)
+        while len(self._signatures) > self.max_entries:
+            self.remove(next(iter(self._signatures)))
+
+    def remove(self, key: str):
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return
+        for band_key in self._band_keys(signature):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def query(self, text: str, threshold: float) -> List[Tuple[float, str]]:
+        """Candidate keys with estimated similarity >= threshold, best first"""
+        signature = self.signature(text)
+        candidates = set()
+        for band_key in self._band_keys(signature):
+            candidates.update(self._buckets.get(band_key, ()))
+
+        matches = []
+        for key in candidates:
+            other = self._signatures[key]
+            similarity = sum(1 for x, y in zip(signature, other) if x == y) / self.num_perm
+            if similarity >= threshold:
+                matches.append((similarity, key))
+        matches.sort(reverse=True)
+        return matches
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+
+class IntentCache:
+    """Per-tenant cache of LLM extractions keyed by normalized transcript"""
+
+    def __init__(
+        self,
+        max_entries: int = 2000,
+        ttl_seconds: float = 3600,
+        similarity_threshold: float = 0.0,
+        max_indexes: int = 100
+    ):
+        self.exact = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.near_hits = 0
+        # scope -> MinHashIndex; an index unwritten for a TTL only points at expired entries
+        self._indexes = TTLCache(max_entries=max_indexes, ttl_seconds=ttl_seconds)
+
+    @classmethod
+    def from_env(cls) -> "IntentCache":
+        return cls(
+            max_entries=int(os.getenv("INTENT_CACHE_SIZE", "2000")),
+            ttl_seconds=float(os.getenv("INTENT_CACHE_TTL", "3600")),
+            similarity_threshold=float(os.getenv("INTENT_SIMILARITY_THRESHOLD", "0")),
+            max_indexes=int(os.getenv("INTENT_SIMILARITY_MAX_SCOPES", "100"))
+        )
+
+    @property
+    def near_enabled(self) -> bool:
+        return self.similarity_threshold > 0
+
+    def get(self, scope: str, transcript: str) -> Optional[Dict]:
+        """Cached extraction for this tenant, exact match first, then near-duplicate"""
+        normalized = normalize_text(transcript)
+        if not normalized:
+            return None
+
+        result = self.exact.get((scope, normalized))
+        if result is not None:
+            return copy.deepcopy(result)
+
+        index = self._indexes.peek(scope)
+        if not self.near_enabled or index is None:
+            return None
+
+        for similarity, key in index.query(normalized, self.similarity_threshold):
+            result = self.exact.peek((scope, key))
+            if result is None:
+                index.remove(key)  # Expired or evicted from the exact tier
+                continue
+            self.near_hits += 1
+            return copy.deepcopy(result)
+        return None
+
+    def set(self, scope: str, transcript: str, result: Dict):
+        normalized = normalize_text(transcript)
+        if not normalized:
+            return
+        self.exact.set((scope, normalized), copy.deepcopy(result))
+        if self.near_enabled:
+            index = self._indexes.peek(scope)
+            if index is None:
+                index = MinHashIndex(max_entries=self.max_entries)
+            self._indexes.set(scope, index)  # Refreshes its TTL
+            index.add(normalized)
+
+    def stats(self) -> Dict:
+        return {
+            "exact": self.exact.stats(),
+            "near_enabled": self.near_enabled,
+            "near_hits": self.near_hits,
+            "similarity_threshold": self.similarity_threshold,
+            "tenants_indexed": len(self._indexes),
+            "indexes_evicted": self._indexes.evictions
+        }
@@ -0,0 +1,155 @@
+"""
+Intent Classifier - Local keyword/regex fast path in front of the LLM
+Handles obvious requests ("AC not cooling", "pipe burst") in well under 1 ms;
+anything below the confidence threshold falls through to Groq
+"""
+import os
+import re
+from typing import Collection, Dict, List, Optional, Pattern, Tuple
+
+
+def _compile(patterns: List[Tuple[str, float]]) -> List[Tuple[Pattern, float]]:
+    return [(re.compile(p, re.IGNORECASE), weight) for p, weight in patterns]
+
+
+# (pattern, weight) per intent. Weight 4 = unambiguous on its own,
+# lower weights only add up when several cues agree.
+INTENT_LEXICON = {
+    "AC Repair": _compile([
+        (r"\b(ac|a/c|a\.c\.?|air ?con(ditioner|ditioning)?|hvac|split unit)\b", 4),
+        (r"\bnot cooling\b|\bno cooling\b|\bcompressor\b|\bgas refill\b", 3),
+        (r"\bcooling\b|\bthermostat\b", 1),
+    ]),
+    "Plumbing": _compile([
+        (r"\bplumb(er|ing)\b", 4),
+        (r"\b(pipe|pipes|tap|taps|faucet|drain|toilet|sink|geyser|water heater|sewage|nal)\b", 3),
+        (r"\b(leak(ing|age|s)?|clog(ged)?|block(ed|age)|overflow(ing)?|burst)\b", 2),
+        (r"\bwater\b", 1),
+    ]),
+    "Electrical": _compile([
+        (r"\belectric(ian|al|ity)?\b|\bbijli\b", 4),
+        (r"\b(wiring|short circuit|fuse|breaker|mcb|socket|switch ?board|sparks?|inverter)\b", 3),
+        (r"\b(no power|power cut|power outage|tripping|light(s)? not working|fan not working)\b", 3),
+        (r"\b(lights?|fan|power|voltage)\b", 1),
+    ]),
+    "Pest Control": _compile([
+        (r"\b(pest|pests|exterminator|fumigat(e|ion))\b", 4),
+        (r"\b(cockroach(es)?|termites?|rats?|mice|mouse|bed ?bugs?|ants|mosquito(es)?|rodents?)\b", 4),
+    ]),
+    "Painting": _compile([
+        (r"\b(paint(ing|er|ers)?|repaint(ing)?|whitewash)\b", 4),
+        (r"\b(wall colou?r|primer|putty|peeling)\b", 2),
+    ]),
+    "Carpentry": _compile([
+        (r"\bcarpent(er|ry)\b", 4),
+        (r"\b(wardrobe|cabinet|cupboard|furniture|door hinge|hinges?|drawer|wooden|plywood)\b", 3),
+        (r"\b(door|table|chair|bed frame|shelf)\b", 1),
+    ]),
+    "Clinic Appointment": _compile([
+        (r"\b(doctor|clinic|dentist|physician|checkup|check-up|consultation)\b", 4),
+        (r"\b(appointment|fever|prescription|vaccin(e|ation))\b", 2),
+    ]),
+    "Property Inspection": _compile([
+        (r"\b(inspection|inspect|site visit|property visit|walkthrough|survey)\b", 4),
+        (r"\b(property|flat|apartment|house)\b.*\b(buy|rent|lease|check)\b", 1),
+    ]),
+    "General Maintenance": _compile([
+        (r"\b(handyman|general maintenance|odd jobs)\b", 4),
+        (r"\b(maintenance|servicing)\b", 2),
+        (r"\b(repair|fix|broken)\b", 1),
+    ]),
+}
+
+URGENCY_LEXICON = [
+    ("critical", re.compile(
+        r"\b(emergency|danger(ous)?|fire|smoke|sparks?|gas leak|flood(ing|ed)?|burst|electrocut\w*|"
+        r"no power at all|completely (dead|flooded)|immediately)\b", re.IGNORECASE)),
+    ("high", re.compile(
+        r"\b(urgent(ly)?|asap|right now|today|tonight|not working|stopped working|no water|no power|"
+        r"not cooling|leak(ing)?)\b", re.IGNORECASE)),
+    ("low", re.compile(
+        r"\b(no rush|whenever|sometime|next (week|month)|quote|estimate|routine|flexible|"
+        r"at your convenience)\b", re.IGNORECASE)),
+]
+
+_TIME_PATTERN = re.compile(
+    r"\b(today|tonight|tomorrow( (morning|afternoon|evening))?|this (morning|afternoon|evening|weekend)|"
+    r"(next|this|on) (monday|tuesday|wednesday|thursday|friday|saturday|sunday|week)|"
+    r"(at |by |after |before )?\d{1,2}(:\d{2})? ?(am|pm))\b",
+    re.IGNORECASE
+)
+
+_LOCATION_PATTERN = re.compile(
+    r"\b(?:in|at|near|on)\s+((?:(?:flat|apt|apartment|house|plot|block|sector|phase|unit|floor)\s*#?\s*\w+[\s,]*)?"
+    r"(?:[\w-]+\s){0,3}(?:road|rd|street|st|lane|nagar|colony|sector\s*\d+|block\s*\w+|layout|"
+    r"apartments?|towers?|society|complex|market|extension|enclave|\d+\w*))\b",
+    re.IGNORECASE
+)
+
+
+class IntentClassifier:
+    """Weighted keyword classifier returning the same shape as the LLM extraction"""
+
+    # Recorded as the task's prompt_version; bump when the lexicon changes
+    VERSION = "lexicon-v1"
+
+    def __init__(self, threshold: float = 0.8, lexicon: Optional[Dict] = None):
+        self.threshold = threshold
+        self.lexicon = lexicon or INTENT_LEXICON
+
+    @classmethod
+    def from_env(cls) -> "IntentClassifier":
+        return cls(threshold=float(os.getenv("INTENT_FASTPATH_THRESHOLD", "0.8")))
+
+    def score(self, text: str) -> List[Tuple[float, str]]:
+        """Lexicon score per intent, highest first"""
+        scores = []
+        for intent, patterns in self.lexicon.items():
+            total = sum(weight for pattern, weight in patterns if pattern.search(text))
+            if total:
+                scores.append((total, intent))
+        scores.sort(reverse=True)
+        return scores
+
+    def classify(self, transcript: str) -> Dict:
+        """
+        Always returns an extraction; callers compare confidence with threshold.
+        Confidence is the winning score's share against the runner-up plus
+        a fixed prior, so a single strong keyword lands at 0.8.
+        """
+        text = transcript.strip()
+        scores = self.score(text)
+
+        if scores:
+            best, intent = scores[0]
+            runner_up = scores[1][0] if len(scores) > 1 else 0.0
+            confidence = best / (best + runner_up + 1.0)
+        else:
+            intent, confidence = "Other", 0.0
+
+        location = _LOCATION_PATTERN.search(text)
+        preferred_time = _TIME_PATTERN.search(text)
+
+        return {
+            "intent": intent,
+            "issue": text[:200],
+            "urgency": self.urgency(text),
+            "location": location.group(1).strip(" ,") if location else None,
+            "preferred_time": preferred_time.group(0).strip() if preferred_time else None,
+            "confidence": round(confidence, 3)
+        }
+
+    def urgency(self, text: str) -> str:
+        for level, pattern in URGENCY_LEXICON:
+            if pattern.search(text):
+                return level
+        return "medium"
+
+    def try_classify(self, transcript: str, allowed_intents: Optional[Collection[str]] = None) -> Optional[Dict]:
+        """Confident local extraction, or None to fall through to the LLM"""
+        result = self.classify(transcript)
+        if result["confidence"] < self.threshold:
+            return None
+        if allowed_intents is not None and result["intent"] not in allowed_intents:
+            return None
+        return result
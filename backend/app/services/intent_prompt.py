@@ -0,0 +1,63 @@
+"""
+Intent Prompt - Precompiled, versioned extraction prompts
+Built once per intent list and reused for every request
+"""
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Tuple
+
+# Bump whenever the wording below changes so stored tasks stay reproducible
+PROMPT_TEMPLATE_VERSION = "v1"
+
+SYSTEM_PROMPT_TEMPLATE = """You are an AI assistant for a local service business intake system.
+Your job is to analyze customer voice transcripts and extract structured information.
+
+SUPPORTED SERVICE CATEGORIES:
+{intents}
+
+Extract the following:
+1. Intent: Which service category does this relate to?
+2. Issue: What is the specific problem/request?
+3. Urgency: How urgent is this? (low, medium, high, critical)
+4. Location: Where is the service needed? (extract if mentioned)
+5. Preferred Time: When do they want service? (extract if mentioned)
+6. Confidence: How confident are you in this extraction? (0.0 to 1.0)
+
+URGENCY GUIDELINES:
+- Critical: Emergency, immediate danger, complete outage
+- High: Problem affecting daily life, needs same-day attention
+- Medium: Inconvenient but not urgent, can wait 1-2 days
+- Low: Routine request, can be scheduled flexibly
+
+Return ONLY a valid JSON object with these exact keys:
+{{"intent", "issue", "urgency", "location", "preferred_time", "confidence"}}
+
+If any field is not mentioned, use null for optional fields."""
+
+BATCH_INSTRUCTIONS = (
+    "\n\nYou will receive a JSON array of transcripts, each with an \"id\". "
+    "Return ONLY a JSON object of the form {\"results\": [...]} containing one "
+    "extraction object per transcript, each with the same \"id\" plus the keys above."
+)
+
+
+@dataclass(frozen=True)
+class CompiledPrompt:
+    """System messages and membership set for one intent list"""
+    version: str
+    intents: Tuple[str, ...]
+    intent_set: FrozenSet[str] = field(repr=False)
+    system_message: Dict[str, str] = field(repr=False, hash=False, compare=False)
+    batch_system_message: Dict[str, str] = field(repr=False, hash=False, compare=False)
+
+
+def compile_prompt(intents: Tuple[str, ...]) -> CompiledPrompt:
+    digest = hashlib.sha1("\n".join(intents).encode("utf-8")).hexdigest()[:8]
+    system_prompt = SYSTEM_PROMPT_TEMPLATE.format(intents=", ".join(intents))
+    return CompiledPrompt(
+        version=f"{PROMPT_TEMPLATE_VERSION}-{digest}",
+        intents=intents,
+        intent_set=frozenset(intents),
+        system_message={"role": "system", "content": system_prompt},
+        batch_system_message={"role": "system", "content": system_prompt + BATCH_INSTRUCTIONS}
+    )
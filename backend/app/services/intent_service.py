@@ -4,8 +4,17 @@ Uses Groq API for ultra-fast inference with Llama 3 models
 """
 import os
 import json
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 from groq import AsyncGroq
+from sqlalchemy import select
+from app.database import AsyncSessionLocal, UserDB
+from app.priority import urgency_rank
+from app.services.cache import TTLCache
+from app.services.intent_cache import IntentCache
+from app.services.intent_classifier import IntentClassifier
+from app.services.intent_batcher import IntentBatcher
+from app.services.intent_prompt import CompiledPrompt, compile_prompt
+from app.services.rate_limiter import get_groq_governor
 
 
 class IntentService:
@@ -17,7 +26,37 @@ class IntentService:
         if not api_key:
             print("WARNING: GROQ_API_KEY not set. Please add it to backend/.env")
             print("Get your free key at: https://console.groq.com/keys")
-        self.client = AsyncGroq(api_key=api_key) if api_key else None
+        # Retries and 429 backoff are handled by the shared governor
+        self.client = AsyncGroq(api_key=api_key, max_retries=0) if api_key else None
+        self.governor = get_groq_governor()
+        
+        # Obvious requests and repeated SMS/WhatsApp wording skip the LLM call
+        self.classifier = IntentClassifier.from_env()
+        self.cache = IntentCache.from_env()
+        
+        # Prompts are compiled once per intent list; request options never change
+        self._default_intents = tuple(self.SUPPORTED_INTENTS)
+        self._prompts = TTLCache(max_entries=256, ttl_seconds=float("inf"))
+        self._tenant_intents = TTLCache(
+            max_entries=10000,
+            ttl_seconds=float(os.getenv("TENANT_INTENTS_TTL", "300"))
+        )
+        self._request_options = {
+            "model": self.MODEL,  # Ultra-fast Groq model
+            "temperature": 0.3,  # Low temperature for consistent extraction
+            "response_format": {"type": "json_object"}
+        }
+        
+        # Optional micro-batching of LLM calls for SMS/WhatsApp bursts
+        window_ms = float(os.getenv("INTENT_BATCH_WINDOW_MS", "0"))
+        self.batcher = IntentBatcher(
+            self._llm_extract_batch,
+            self._llm_extract,
+            window_seconds=window_ms / 1000,
+            max_batch_size=int(os.getenv("INTENT_BATCH_MAX_SIZE", "16"))
+        ) if window_ms > 0 else None
+    
+    MODEL = "llama-3.3-70b-versatile"
     
     SUPPORTED_INTENTS = [
         "AC Repair",
@@ -32,9 +71,12 @@ class IntentService:
         "Other"
     ]
     
-    async def extract_intent(self, transcript: str) -> Dict:
+    async def extract_intent(self, transcript: str, business_id: Optional[str] = None) -> Dict:
         """
         Extract intent and entities from transcript using Groq (Llama 3)
+        A local keyword classifier answers confident cases first, and LLM
+        results are cached per business_id, so repeated messages skip the LLM.
+        Businesses with a custom intent list get their own precompiled prompt.
         
         Returns:
             {
@@ -43,9 +85,17 @@ class IntentService:
                 "urgency": str (low/medium/high/critical),
                 "location": str (optional),
                 "preferred_time": str (optional),
-                "confidence": float (0-1)
+                "confidence": float (0-1),
+                "prompt_version": str (prompt/classifier that produced the result)
             }
         """
+        prompt = self.prompt_for(await self.get_tenant_intents(business_id))
+        
+        # Fast path: confident local classification, no network round trip
+        local_result = self.classifier.try_classify(transcript, prompt.intent_set)
+        if local_result is not None:
+            local_result["prompt_version"] = IntentClassifier.VERSION
+            return local_result
         
         # Check if client is initialized
         if not self.client:
@@ -55,63 +105,23 @@ class IntentService:
                 "urgency": "medium",
                 "location": None,
                 "preferred_time": None,
-                "confidence": 0.0
+                "confidence": 0.0,
+                "prompt_version": None
             }
         
-        system_prompt = f"""You are an AI assistant for a local service business intake system.
-Your job is to analyze customer voice transcripts and extract structured information.
-
-SUPPORTED SERVICE CATEGORIES:
-{', '.join(self.SUPPORTED_INTENTS)}
-
-Extract the following:
-1. Intent: Which service category does this relate to?
-2. Issue: What is the specific problem/request?
-3. Urgency: How urgent is this? (low, medium, high, critical)
-4. Location: Where is the service needed? (extract if mentioned)
-5. Preferred Time: When do they want service? (extract if mentioned)
-6. Confidence: How confident are you in this extraction? (0.0 to 1.0)
-
-URGENCY GUIDELINES:
-- Critical: Emergency, immediate danger, complete outage
-- High: Problem affecting daily life, needs same-day attention
-- Medium: Inconvenient but not urgent, can wait 1-2 days
-- Low: Routine request, can be scheduled flexibly
-
-Return ONLY a valid JSON object with these exact keys:
-{{"intent", "issue", "urgency", "location", "preferred_time", "confidence"}}
-
-If any field is not mentioned, use null for optional fields."""
-
-        user_prompt = f"Customer transcript: {transcript}"
+        # Scope by prompt version too, so changing a tenant's intents invalidates old results
+        scope = f"{business_id or 'system'}:{prompt.version}"
+        cached = self.cache.get(scope, transcript)
+        if cached is not None:
+            return cached
         
         try:
-            response = await self.client.chat.completions.create(
-                model="llama-3.3-70b-versatile",  # Ultra-fast Groq model
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3,  # Low temperature for consistent extraction
-                response_format={"type": "json_object"}
-            )
-            
-            result = json.loads(response.choices[0].message.content)
-            
-            # Validate and normalize
-            if result["intent"] not in self.SUPPORTED_INTENTS:
-                result["intent"] = "Other"
-                result["confidence"] = max(0.0, result.get("confidence", 0.5) - 0.2)
-            
-            # Ensure confidence is in valid range
-            result["confidence"] = max(0.0, min(1.0, result.get("confidence", 0.5)))
-            
-            # Normalize urgency
-            if result.get("urgency", "").lower() not in ["low", "medium", "high", "critical"]:
-                result["urgency"] = "medium"
+            if self.batcher is not None:
+                result = await self.batcher.submit(transcript, prompt, group=prompt.version)
             else:
-                result["urgency"] = result["urgency"].lower()
+                result = await self._llm_extract(transcript, prompt)
             
+            self.cache.set(scope, transcript, result)
             return result
             
         except Exception as e:
@@ -123,9 +133,124 @@ If any field is not mentioned, use null for optional fields."""
                 "urgency": "medium",
                 "location": None,
                 "preferred_time": None,
-                "confidence": 0.3  # Low confidence triggers escalation
+                "confidence": 0.3,  # Low confidence triggers escalation
+                "prompt_version": None
             }
     
+    def prompt_for(self, intents: Optional[Tuple[str, ...]] = None) -> CompiledPrompt:
+        """Precompiled prompt for an intent list (default list when None)"""
+        intents = intents or self._default_intents
+        prompt = self._prompts.get(intents)
+        if prompt is None:
+            prompt = compile_prompt(intents)
+            self._prompts.set(intents, prompt)
+        return prompt
+    
+    async def get_tenant_intents(self, business_id: Optional[str]) -> Optional[Tuple[str, ...]]:
+        """A business's custom intent list, cached for TENANT_INTENTS_TTL seconds"""
+        if not business_id or business_id == "system":
+            return None
+        
+        intents = self._tenant_intents.peek(business_id)
+        if intents is not None:
+            return intents or None
+        
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(UserDB.custom_intents).where(UserDB.id == business_id)
+                )
+                raw = result.scalar_one_or_none()
+            intents = self.parse_intents(json.loads(raw)) if raw else ()
+        except Exception as e:
+            print(f"Could not load custom intents for {business_id}, using defaults: {e}")
+            return None
+        
+        self._tenant_intents.set(business_id, intents)  # () marks "uses defaults"
+        return intents or None
+    
+    def invalidate_tenant(self, business_id: str):
+        """
+        Drop a cached intent list after the business updates it. Only this
+        process's copy: elsewhere the old list is used until its
+        TENANT_INTENTS_TTL runs out, which bounds how long a change takes to
+        reach every worker.
+        """
+        self._tenant_intents.discard(business_id)
+    
+    @classmethod
+    def parse_intents(cls, intents: List[str]) -> Tuple[str, ...]:
+        """Clean a custom intent list; 'Other' is always kept as the catch-all"""
+        cleaned = []
+        for intent in intents:
+            intent = str(intent).strip()
+            if intent and intent not in cleaned and intent != "Other":
+                cleaned.append(intent)
+        return tuple(cleaned) + ("Other",) if cleaned else ()
+    
+    async def _llm_extract(self, transcript: str, prompt: CompiledPrompt) -> Dict:
+        """Single-transcript LLM call; raises on API or parse errors"""
+        # Queue for the governor by the keyword urgency estimate, so "burst pipe"
+        # overtakes a backlog of routine quotes
+        response = await self.governor.run(lambda: self.client.chat.completions.with_raw_response.create(
+            messages=[
+                prompt.system_message,
+                {"role": "user", "content": f"Customer transcript: {transcript}"}
+            ],
+            **self._request_options
+        ), urgency=self.classifier.urgency(transcript))
+        
+        return self._normalize_result(json.loads(response.choices[0].message.content), prompt)
+    
+    async def _llm_extract_batch(self, transcripts: List[str], prompt: CompiledPrompt) -> List[Optional[Dict]]:
+        """
+        One LLM call for several transcripts.
+        Returns a result per transcript, or None where the model's answer
+        was missing or unparseable (the batcher retries those individually).
+        """
+        items = [{"id": i, "transcript": t} for i, t in enumerate(transcripts)]
+        urgency = min((self.classifier.urgency(t) for t in transcripts), key=urgency_rank)
+        
+        response = await self.governor.run(lambda: self.client.chat.completions.with_raw_response.create(
+            messages=[
+                prompt.batch_system_message,
+                {"role": "user", "content": json.dumps(items, ensure_ascii=False)}
+            ],
+            **self._request_options
+        ), urgency=urgency)
+        
+        results: List[Optional[Dict]] = [None] * len(transcripts)
+        try:
+            payload = json.loads(response.choices[0].message.content)
+            entries = payload.get("results", []) if isinstance(payload, dict) else []
+        except (ValueError, AttributeError):
+            return results
+        
+        for entry in entries:
+            try:
+                index = int(entry.pop("id"))
+                if 0 <= index < len(results) and results[index] is None:
+                    results[index] = self._normalize_result(entry, prompt)
+            except (KeyError, TypeError, ValueError, AttributeError):
+                continue
+        return results
+    
+    def _normalize_result(self, result: Dict, prompt: CompiledPrompt) -> Dict:
+        """Validate and normalize an LLM extraction"""
+        if result["intent"] not in prompt.intent_set:
+            result["intent"] = "Other"
+            result["confidence"] = max(0.0, result.get("confidence", 0.5) - 0.2)
+        
+        # Ensure confidence is in valid range
+        result["confidence"] = max(0.0, min(1.0, float(result.get("confidence", 0.5))))
+        
+        # Normalize urgency
+        urgency = str(result.get("urgency") or "").lower()
+        result["urgency"] = urgency if urgency in ["low", "medium", "high", "critical"] else "medium"
+        
+        result["prompt_version"] = prompt.version
+        return result
+    
     async def should_escalate(self, intent_result: Dict) -> tuple[bool, str]:
         """
         Determine if this should be escalated based on confidence and context
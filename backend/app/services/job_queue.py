@@ -0,0 +1,285 @@
+"""
+Job Queue - Durable background jobs stored in the application database
+Webhooks enqueue work and return immediately; worker processes (worker.py)
+claim jobs under a lease, retry failures with backoff and dead-letter jobs
+that keep failing. Enqueueing is idempotent on a caller-supplied key.
+"""
+import os
+import json
+import random
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from sqlalchemy import select, update, func, or_, and_
+from sqlalchemy.exc import IntegrityError
+
+from app.database import AsyncSessionLocal, JobDB
+
+JobHandler = Callable[..., Awaitable[Any]]
+
+
+class JobQueue:
+    """Database-backed job queue with claim/lease semantics"""
+
+    def __init__(
+        self,
+        lease_seconds: float = 300.0,
+        max_attempts: int = 5,
+        retry_base_seconds: float = 10.0,
+        poll_interval: float = 1.0
+    ):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.poll_interval = poll_interval
+        self.handlers: Dict[str, JobHandler] = {}
+        self.dead_letter_handlers: Dict[str, JobHandler] = {}
+
+    @classmethod
+    def from_env(cls) -> "JobQueue":
+        return cls(
+            lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", "300")),
+            max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "5")),
+            retry_base_seconds=float(os.getenv("JOB_RETRY_BASE_SECONDS", "10")),
+            poll_interval=float(os.getenv("JOB_POLL_INTERVAL", "1"))
+        )
+
+    def register(self, kind: str, handler: JobHandler, on_dead: Optional[JobHandler] = None):
+        """
+        Handlers are called with the job payload as keyword arguments.
+        on_dead is called once, with the payload and the last error, when a
+        job of this kind is dead-lettered (e.g. to record one failure per job
+        rather than one per attempt).
+        """
+        self.handlers[kind] = handler
+        if on_dead is not None:
+            self.dead_letter_handlers[kind] = on_dead
+
+    # --- Producer side ---
+
+    async def enqueue(
+        self,
+        kind: str,
+        payload: Dict,
+        idempotency_key: Optional[str] = None,
+        business_id: Optional[str] = None
+    ) -> Tuple[str, bool]:
+        """
+        Queue a job. Returns (job_id, created); a repeated idempotency key
+        returns the existing job instead of queueing a duplicate.
+        """
+        if idempotency_key:
+            existing = await self._find_by_key(idempotency_key)
+            if existing:
+                return existing, False
+
+        job = JobDB(
+            kind=kind,
+            idempotency_key=idempotency_key,
+            business_id=business_id,
+            payload=json.dumps(payload),
+            status="queued",
+            attempts=0,
+            max_attempts=self.max_attempts,
+            run_at=datetime.utcnow()
+        )
+        async with AsyncSessionLocal() as session:
+            session.add(job)
+            try:
+                await session.commit()
+            except IntegrityError:
+                # Lost a race with a concurrent delivery of the same webhook
+                await session.rollback()
+                return await self._find_by_key(idempotency_key), False
+        return job.id, True
+
+    async def _find_by_key(self, idempotency_key: str) -> Optional[str]:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(JobDB.id).where(JobDB.idempotency_key == idempotency_key)
+            )
+            return result.scalar_one_or_none()
+
+    # --- Worker side ---
+
+    @staticmethod
+    def _claimable(now: datetime):
+        return or_(
+            and_(JobDB.status == "queued", JobDB.run_at <= now),
+            and_(JobDB.status == "running", JobDB.locked_until < now)  # Worker died mid-job
+        )
+
+    async def claim(self, worker_id: str) -> Optional[Dict]:
+        """
+        Take the next due job under a lease. The conditional UPDATE only
+        succeeds for one worker, so concurrent claimers never share a job.
+        An expired lease on a job with no attempts left means it keeps
+        taking its worker down, so it is dead-lettered instead of reclaimed.
+        """
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(JobDB.id, JobDB.kind, JobDB.status, JobDB.attempts, JobDB.max_attempts, JobDB.payload)
+                .where(self._claimable(now))
+                .order_by(JobDB.run_at)
+                .limit(5)
+            )
+            for job_id, kind, status, attempts, max_attempts, payload in result.all():
+                if status == "running" and attempts >= max_attempts:
+                    reaped = await session.execute(
+                        update(JobDB)
+                        .where(JobDB.id == job_id, self._claimable(now), JobDB.attempts >= JobDB.max_attempts)
+                        .values(
+                            status="dead",
+                            locked_by=None,
+                            locked_until=None,
+                            last_error=f"Lease expired on the last of {attempts} attempts",
+                            updated_at=now
+                        )
+                        .execution_options(synchronize_session=False)
+                    )
+                    await session.commit()
+                    if reaped.rowcount == 1:
+                        print(f"💀 Job {job_id} ({kind}) dead-lettered after {attempts} attempts: lease expired")
+                        await self._dead_lettered(kind, json.loads(payload), "Lease expired")
+                    continue
+
+                claimed = await session.execute(
+                    update(JobDB)
+                    .where(JobDB.id == job_id, self._claimable(now), JobDB.attempts < JobDB.max_attempts)
+                    .values(
+                        status="running",
+                        locked_by=worker_id,
+                        locked_until=now + timedelta(seconds=self.lease_seconds),
+                        attempts=JobDB.attempts + 1,
+                        updated_at=now
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                await session.commit()
+                if claimed.rowcount != 1:
+                    continue  # Another worker got it first
+
+                job = (await session.execute(select(JobDB).where(JobDB.id == job_id))).scalar_one()
+                return {
+                    "id": job.id,
+                    "kind": job.kind,
+                    "payload": json.loads(job.payload),
+                    "attempts": job.attempts,
+                    "max_attempts": job.max_attempts
+                }
+        return None
+
+    async def _finish(self, job_id: str, worker_id: str, **values):
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(JobDB)
+                .where(JobDB.id == job_id, JobDB.locked_by == worker_id)
+                .values(updated_at=datetime.utcnow(), **values)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+    async def complete(self, job_id: str, worker_id: str):
+        await self._finish(job_id, worker_id, status="done", locked_by=None, locked_until=None, last_error=None)
+
+    async def fail(self, job: Dict, worker_id: str, error: str):
+        """Reschedule with exponential backoff, or dead-letter after max_attempts"""
+        if job["attempts"] >= job["max_attempts"]:
+            print(f"💀 Job {job['id']} ({job['kind']}) dead-lettered after {job['attempts']} attempts: {error}")
+            await self._finish(job["id"], worker_id, status="dead", locked_by=None, locked_until=None, last_error=error)
+            await self._dead_lettered(job["kind"], job["payload"], error)
+            return
+
+        delay = min(3600.0, self.retry_base_seconds * 2 ** (job["attempts"] - 1))
+        delay *= 0.5 + random.random() / 2
+        print(f"⚠️ Job {job['id']} ({job['kind']}) failed, retrying in {delay:.0f}s: {error}")
+        await self._finish(
+            job["id"], worker_id,
+            status="queued",
+            locked_by=None,
+            locked_until=None,
+            run_at=datetime.utcnow() + timedelta(seconds=delay),
+            last_error=error
+        )
+
+    async def _dead_lettered(self, kind: str, payload: Dict, error: str):
+        on_dead = self.dead_letter_handlers.get(kind)
+        if on_dead is None:
+            return
+        try:
+            await on_dead(error=error, **payload)
+        except Exception as e:
+            print(f"❌ Dead-letter handler for {kind} failed: {e}")
+
+    async def _heartbeat(self, job_id: str, worker_id: str):
+        """Extend the lease while a long job (e.g. a big transcription) runs"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self._finish(
+                    job_id, worker_id,
+                    locked_until=datetime.utcnow() + timedelta(seconds=self.lease_seconds)
+                )
+            except Exception as e:
+                # Try again next beat; the lease has two more beats before it expires
+                print(f"⚠️ Failed to renew the lease on job {job_id}: {e}")
+
+    async def run_job(self, job: Dict, worker_id: str):
+        handler = self.handlers.get(job["kind"])
+        if handler is None:
+            await self.fail(dict(job, attempts=job["max_attempts"]), worker_id, f"No handler for job kind '{job['kind']}'")
+            return
+
+        heartbeat = asyncio.create_task(self._heartbeat(job["id"], worker_id))
+        try:
+            try:
+                await handler(**job["payload"])
+            finally:
+                heartbeat.cancel()
+                # Wait for it to stop, and retrieve whatever it ended with
+                for outcome in await asyncio.gather(heartbeat, return_exceptions=True):
+                    if isinstance(outcome, Exception):
+                        print(f"⚠️ Lease heartbeat for job {job['id']} failed: {outcome}")
+        except Exception as e:
+            await self.fail(job, worker_id, str(e) or type(e).__name__)
+        else:
+            await self.complete(job["id"], worker_id)
+
+    async def work(self, worker_id: str, stop: asyncio.Event):
+        """Claim and run jobs until `stop` is set"""
+        while not stop.is_set():
+            try:
+                job = await self.claim(worker_id)
+            except Exception as e:
+                print(f"❌ Job claim failed: {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self.run_job(job, worker_id)
+
+    async def overdue(self, older_than_seconds: float = 60.0) -> int:
+        """Queued jobs that have been due for a while, i.e. nothing is claiming them"""
+        cutoff = datetime.utcnow() - timedelta(seconds=older_than_seconds)
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(func.count(JobDB.id)).where(JobDB.status == "queued", JobDB.run_at <= cutoff)
+            )
+            return result.scalar_one()
+
+    async def stats(self, business_id: Optional[str] = None) -> Dict:
+        """Job counts by status, for one business or (business_id=None) all of them"""
+        query = select(JobDB.status, func.count(JobDB.id)).group_by(JobDB.status)
+        if business_id is not None:
+            query = query.where(JobDB.business_id == business_id)
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(query)
+            counts = {"queued": 0, "running": 0, "done": 0, "dead": 0}
+            counts.update({status: count for status, count in result.all()})
+            return counts
@@ -0,0 +1,442 @@
+"""
+Notification Dispatcher - Central outbound queue for operational SMS/WhatsApp
+Alerts are queued and sent by a bounded worker pool. A coalescable alert goes
+out straight away and opens a window; further alerts of the same kind to that
+recipient within the window are merged into a single digest, failed sends
+are retried with jittered backoff, and each notification's delivery status is
+tracked (updated by Twilio status callbacks when BACKEND_URL is set).
+Delivery state is kept in memory by the process that sends and written to the
+notifications table, so any web process can report it and apply callbacks for
+messages sent by worker.py.
+When sends back up, the queue is drained by urgency (with aging), and critical
+alerts are never held back for a digest.
+"""
+import os
+import time
+import uuid
+import random
+import asyncio
+import itertools
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import delete, insert, select, update
+
+from app.database import AsyncSessionLocal, NotificationDB
+from app.services.cache import TTLCache
+from app.priority import aging_seconds, head_start, urgency_rank
+from app.services.twilio_service import get_twilio_service
+
+# Twilio statuses after which a message won't change any more
+FINAL_STATUSES = {"delivered", "undelivered", "failed", "read"}
+
+DIGEST_TITLES = {
+    "task_alert": "NEW TASK ALERTS",
+    "escalation": "ESCALATION ALERTS",
+    "assignment": "NEW TASK ASSIGNMENTS",
+}
+
+
+@dataclass
+class Notification:
+    """One logical notification and its delivery state"""
+    recipient: str
+    channel: str
+    kind: str
+    message: str
+    summary: Optional[str] = None
+    urgency: str = "medium"
+    business_id: Optional[str] = None  # Tenant allowed to read its status
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    status: str = "queued"  # queued, coalescing, sending, sent, delivered, failed, simulated, ...
+    attempts: int = 0
+    sid: Optional[str] = None
+    digest_size: int = 1
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "recipient": self.recipient,
+            "channel": self.channel,
+            "kind": self.kind,
+            "urgency": self.urgency,
+            "status": self.status,
+            "attempts": self.attempts,
+            "sid": self.sid,
+            "digest_size": self.digest_size,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
+        }
+
+    def to_row(self) -> Dict:
+        row = {key: value for key, value in self.to_dict().items() if key not in ("created_at", "updated_at")}
+        row.update(
+            business_id=self.business_id,
+            created_at=datetime.utcfromtimestamp(self.created_at),
+            updated_at=datetime.utcfromtimestamp(self.updated_at)
+        )
+        return row
+
+
+def _row_to_dict(row: NotificationDB) -> Dict:
+    return {
+        "id": row.id,
+        "recipient": row.recipient,
+        "channel": row.channel,
+        "kind": row.kind,
+        "urgency": row.urgency,
+        "status": row.status,
+        "attempts": row.attempts,
+        "sid": row.sid,
+        "digest_size": row.digest_size,
+        "error": row.error,
+        "created_at": row.created_at.replace(tzinfo=timezone.utc).timestamp(),
+        "updated_at": row.updated_at.replace(tzinfo=timezone.utc).timestamp()
+    }
+
+
+class NotificationDispatcher:
+    """Async outbound queue with per-recipient coalescing and retries"""
+
+    def __init__(
+        self,
+        workers: int = 4,
+        coalesce_seconds: float = 30.0,
+        max_attempts: int = 3,
+        retry_base_seconds: float = 2.0,
+        digest_max_lines: int = 10,
+        status_callback_url: Optional[str] = None,
+        aging_seconds: float = 900.0
+    ):
+        self.workers = max(1, workers)
+        self.coalesce_seconds = coalesce_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base_seconds = retry_base_seconds
+        self.digest_max_lines = digest_max_lines
+        self.status_callback_url = status_callback_url
+        self.aging_seconds = aging_seconds
+        self.tracked = TTLCache(max_entries=5000, ttl_seconds=86400)  # id -> Notification
+        self._by_sid = TTLCache(max_entries=5000, ttl_seconds=86400)  # Twilio sid -> [Notification]
+        self._queue: Optional[asyncio.PriorityQueue] = None  # (score, seq, batch)
+        self._seq = itertools.count()
+        self._tasks: List[asyncio.Task] = []
+        # (channel, recipient, kind) -> (follow-ups held for the digest, end-of-window timer)
+        self._buckets: Dict[Tuple[str, str, str], Tuple[List[Notification], asyncio.TimerHandle]] = {}
+        # retry number -> (batch waiting out its backoff, re-queue timer)
+        self._retrying: Dict[int, Tuple[List[Notification], asyncio.TimerHandle]] = {}
+        self._closing = False
+        self.sends = 0
+        self.digests = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.failures = 0
+
+    @classmethod
+    def from_env(cls) -> "NotificationDispatcher":
+        backend_url = os.getenv("BACKEND_URL", "").rstrip("/")
+        return cls(
+            workers=int(os.getenv("NOTIFY_WORKERS", "4")),
+            coalesce_seconds=float(os.getenv("NOTIFY_COALESCE_SECONDS", "30")),
+            max_attempts=int(os.getenv("NOTIFY_MAX_ATTEMPTS", "3")),
+            retry_base_seconds=float(os.getenv("NOTIFY_RETRY_BASE_SECONDS", "2")),
+            digest_max_lines=int(os.getenv("NOTIFY_DIGEST_MAX_LINES", "10")),
+            status_callback_url=f"{backend_url}/api/twilio/message-status" if backend_url else None,
+            aging_seconds=aging_seconds()
+        )
+
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def notify(
+        self,
+        recipient: str,
+        message: str,
+        channel: str = "sms",
+        kind: str = "alert",
+        summary: Optional[str] = None,
+        coalesce: bool = False,
+        urgency: Optional[str] = "medium",
+        business_id: Optional[str] = None
+    ) -> str:
+        """
+        Queue a notification and return its id without waiting for delivery.
+        With coalesce=True, the first notification of a kind to a recipient
+        is sent straight away and opens a coalescing window; the ones that
+        follow within it go out together as one digest when it closes.
+        Critical ones are always sent on their own straight away.
+        """
+        self._ensure_started()
+        notification = Notification(
+            recipient=recipient, channel=channel, kind=kind, message=message, summary=summary,
+            urgency=(urgency or "medium").lower(), business_id=business_id
+        )
+        key = (channel, recipient, kind)
+        coalesced = coalesce and self.coalesce_seconds > 0 and urgency_rank(notification.urgency) > 0
+        if coalesced and key in self._buckets:
+            notification.status = "coalescing"
+        self.tracked.set(notification.id, notification)
+        # Stored before it can be sent, so delivery updates always find the row
+        await self._record(notification)
+
+        bucket = self._buckets.get(key) if coalesced else None
+        if bucket is None:
+            if coalesced:
+                self._open_window(key)
+            notification.status = "queued"
+            self._enqueue([notification])
+            return notification.id
+        notification.status = "coalescing"
+        bucket[0].append(notification)
+        return notification.id
+
+    def _open_window(self, key: Tuple[str, str, str]):
+        timer = asyncio.get_running_loop().call_later(self.coalesce_seconds, self._flush, key)
+        self._buckets[key] = ([], timer)
+
+    def _flush(self, key: Tuple[str, str, str]):
+        """Close a window: send its follow-ups as a digest, and keep coalescing while they keep coming"""
+        entry = self._buckets.pop(key, None)
+        if entry is None:
+            return
+        batch, timer = entry
+        timer.cancel()
+        if not batch:
+            return
+        for notification in batch:
+            notification.status = "queued"
+        self._enqueue(batch)
+        if not self._closing:
+            self._open_window(key)
+
+    def _enqueue(self, batch: List[Notification]):
+        """Queue a batch behind anything more urgent (a digest ranks by its most urgent line)"""
+        if self._queue is None:
+            self._mark(batch, "failed", error="Dispatcher closed")
+            return
+        urgency = min((n.urgency for n in batch), key=urgency_rank)
+        score = time.monotonic() - head_start(urgency, self.aging_seconds)
+        self._queue.put_nowait((score, next(self._seq), batch))
+
+    def _digest(self, batch: List[Notification]) -> str:
+        title = DIGEST_TITLES.get(batch[0].kind, "NOTIFICATIONS")
+        lines = [n.summary or n.message.strip().splitlines()[0] for n in batch]
+        shown = lines[:self.digest_max_lines]
+        text = f"📋 {len(batch)} {title} (last {self.coalesce_seconds:.0f}s)\n\n" + "\n".join(shown)
+        if len(lines) > len(shown):
+            text += f"\n+{len(lines) - len(shown)} more"
+        return text + "\n\nView dashboard for details."
+
+    async def _worker(self):
+        while True:
+            _, _, batch = await self._queue.get()
+            try:
+                await self._deliver(batch)
+            except Exception as e:
+                print(f"❌ Notification delivery error: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _mark(self, batch: List[Notification], status: str, **values):
+        now = time.time()
+        for notification in batch:
+            notification.status = status
+            notification.updated_at = now
+            for name, value in values.items():
+                setattr(notification, name, value)
+
+    async def _deliver(self, batch: List[Notification]):
+        """Make one send attempt, then store where the batch ended up"""
+        try:
+            await self._attempt(batch)
+        finally:
+            await self._save(batch)
+
+    async def _attempt(self, batch: List[Notification]):
+        head = batch[0]
+        message = head.message if len(batch) == 1 else self._digest(batch)
+        self._mark(batch, "sending", attempts=head.attempts + 1, digest_size=len(batch))
+
+        twilio = get_twilio_service()
+        send = twilio.send_whatsapp_notification if head.channel == "whatsapp" else twilio.send_sms_notification
+        sid = await send(head.recipient, message, status_callback=self.status_callback_url)
+
+        if sid:
+            self.sends += 1
+            if len(batch) > 1:
+                self.digests += 1
+                self.coalesced += len(batch) - 1
+            self._mark(batch, "sent", sid=sid, error=None)
+            self._by_sid.set(sid, batch)
+            return
+
+        if twilio.client is None:
+            self._mark(batch, "simulated")  # No credentials: the send was only printed
+            return
+
+        if head.attempts >= self.max_attempts:
+            self.failures += 1
+            self._mark(batch, "failed", error=f"Gave up after {head.attempts} attempts")
+            print(f"❌ Notification to {head.recipient} failed after {head.attempts} attempts")
+            return
+
+        if self._closing:
+            self.failures += 1
+            self._mark(batch, "failed", error="Send failed during shutdown")
+            print(f"❌ Notification to {head.recipient} failed during shutdown")
+            return
+
+        # Re-queue later instead of holding a worker slot during the backoff
+        self.retries += 1
+        delay = self.retry_base_seconds * 2 ** (head.attempts - 1) * (0.5 + random.random())
+        self._mark(batch, "queued", error="Send failed, retrying")
+        retry = next(self._seq)
+        timer = asyncio.get_running_loop().call_later(delay, self._retry, retry)
+        self._retrying[retry] = (batch, timer)
+
+    def _retry(self, retry: int):
+        entry = self._retrying.pop(retry, None)
+        if entry is not None:
+            self._enqueue(entry[0])
+
+    async def _record(self, notification: Notification):
+        """Insert a new notification's row (status tracking must never block the send)"""
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(insert(NotificationDB).values(**notification.to_row()))
+                await session.commit()
+        except Exception as e:
+            print(f"⚠️ Failed to record notification {notification.id}: {e}")
+
+    async def _save(self, batch: List[Notification]):
+        """Store a batch's delivery state; a digest's notifications all share it"""
+        head = batch[0]
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(
+                    update(NotificationDB)
+                    .where(NotificationDB.id.in_([n.id for n in batch]))
+                    .values(
+                        status=head.status,
+                        attempts=head.attempts,
+                        sid=head.sid,
+                        digest_size=head.digest_size,
+                        error=head.error,
+                        updated_at=datetime.utcfromtimestamp(head.updated_at)
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                await session.commit()
+        except Exception as e:
+            print(f"⚠️ Failed to save notification status: {e}")
+
+    async def update_delivery_status(self, sid: str, status: str, error_code: Optional[str] = None) -> bool:
+        """
+        Apply a Twilio status callback, whichever process sent the message;
+        returns False for unknown message SIDs
+        """
+        error = f"Twilio error {error_code}" if error_code else None
+        batch = self._by_sid.peek(sid)
+        if batch is not None:
+            self._mark(batch, status, error=error)
+            if status in FINAL_STATUSES:
+                self._by_sid.discard(sid)
+
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                update(NotificationDB)
+                .where(NotificationDB.sid == sid)
+                .values(status=status, error=error, updated_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        return batch is not None or result.rowcount > 0
+
+    async def get_status(self, notification_id: str, business_id: Optional[str] = None) -> Optional[Dict]:
+        """Delivery state of a notification; None if unknown or (given business_id) another tenant's"""
+        notification = self.tracked.peek(notification_id)
+        if notification is not None:
+            if business_id is not None and notification.business_id != business_id:
+                return None
+            return notification.to_dict()
+
+        # Sent by another process (e.g. a job in worker.py)
+        async with AsyncSessionLocal() as session:
+            row = (await session.execute(
+                select(NotificationDB).where(NotificationDB.id == notification_id)
+            )).scalar_one_or_none()
+        if row is None or (business_id is not None and row.business_id != business_id):
+            return None
+        return _row_to_dict(row)
+
+    async def prune(self, older_than_days: float = 7):
+        """Drop stored delivery state older than anyone will ask about"""
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(NotificationDB).where(NotificationDB.created_at < cutoff))
+            await session.commit()
+
+    async def close(self, timeout: float = 10.0):
+        """
+        Send anything still coalescing or backing off (one last attempt, no
+        further retries), drain the queue and stop the workers. Whatever is
+        left unsent is marked failed.
+        """
+        if self._queue is None:
+            return
+        self._closing = True
+        for key in list(self._buckets):
+            self._flush(key)
+        for retry in list(self._retrying):
+            batch, timer = self._retrying.pop(retry)
+            timer.cancel()
+            self._enqueue(batch)
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ {self._queue.qsize()} notification(s) not sent before shutdown")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        while not self._queue.empty():
+            _, _, batch = self._queue.get_nowait()
+            self._mark(batch, "failed", error="Not sent before shutdown")
+            await self._save(batch)
+        self._queue = None
+        self._tasks = []
+        self._closing = False
+
+    def stats(self) -> Dict:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "coalescing": sum(len(batch) for batch, _ in self._buckets.values()),
+            "retrying": sum(len(batch) for batch, _ in self._retrying.values()),
+            "sends": self.sends,
+            "digests": self.digests,
+            "messages_saved": self.coalesced,
+            "retries": self.retries,
+            "failures": self.failures
+        }
+
+
+_dispatcher: Optional[NotificationDispatcher] = None
+
+
+def get_notification_dispatcher() -> NotificationDispatcher:
+    """Process-wide dispatcher shared by the task, worker and webhook paths"""
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = NotificationDispatcher.from_env()
+    return _dispatcher
+
+
+async def close_notification_dispatcher():
+    global _dispatcher
+    if _dispatcher is not None:
+        await _dispatcher.close()
+        _dispatcher = None
@@ -0,0 +1,111 @@
+"""
+Pagination - Keyset (cursor) paging for the listing endpoints
+Pages continue from the last row seen, (sort, id) < (last sort, last id),
+instead of skipping OFFSET rows. With an index on the filter columns plus
+(sort, id), page 10,000 costs the same as page 1. Cursors are opaque
+url-safe tokens; clients pass them back unchanged.
+"""
+import json
+import base64
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from sqlalchemy import DateTime, Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class CursorError(ValueError):
+    """A cursor that is malformed or belongs to a different listing"""
+
+
+@dataclass
+class Page:
+    """One page of rows plus the cursors for its neighbours (None at either end)"""
+    items: List[Any]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+class Keyset:
+    """Ordering of a listing by a sort column with the primary key as tie-breaker"""
+
+    def __init__(self, name: str, sort_column, id_column, descending: bool = True):
+        self.name = name
+        self.sort_column = sort_column
+        self.id_column = id_column
+        self.descending = descending
+
+    def encode(self, row, direction: str) -> str:
+        value = getattr(row, self.sort_column.key)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        token = json.dumps({"l": self.name, "d": direction, "k": [value, getattr(row, self.id_column.key)]})
+        return base64.urlsafe_b64encode(token.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def decode(self, cursor: str) -> Tuple[str, Tuple[Any, Any]]:
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            direction, (value, row_id) = data["d"], data["k"]
+            if data["l"] != self.name or direction not in ("next", "prev"):
+                raise ValueError
+            if isinstance(self.sort_column.type, DateTime):
+                value = datetime.fromisoformat(value)
+        except Exception:
+            raise CursorError("Invalid cursor")
+        return direction, (value, row_id)
+
+    async def fetch(
+        self,
+        session: AsyncSession,
+        query: Select,
+        limit: Optional[int] = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Page:
+        """
+        Run `query` (already filtered, not yet ordered) for the page after or
+        before `cursor`. limit=None without a cursor returns every row.
+        Entity queries yield ORM objects; column queries yield Row tuples,
+        which must include the sort and id columns under their own names.
+        """
+        if limit is None and cursor is None:
+            return Page(items=await self._rows(session, query.order_by(*self._order(self.descending))))
+
+        limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+        direction, after = self.decode(cursor) if cursor else ("next", None)
+        forward = direction == "next"
+
+        # Walking backwards reverses both the comparison and the order
+        descending = self.descending == forward
+        if after is not None:
+            key = tuple_(self.sort_column, self.id_column)
+            query = query.where(key < after if descending else key > after)
+
+        rows = await self._rows(session, query.order_by(*self._order(descending)).limit(limit + 1))
+        more = len(rows) > limit
+        rows = rows[:limit]
+        if not forward:
+            rows.reverse()
+
+        has_next = more if forward else True
+        has_prev = after is not None if forward else more
+        return Page(
+            items=rows,
+            next_cursor=self.encode(rows[-1], "next") if rows and has_next else None,
+            prev_cursor=self.encode(rows[0], "prev") if rows and has_prev else None
+        )
+
+    @staticmethod
+    async def _rows(session: AsyncSession, query: Select) -> List[Any]:
+        result = await session.execute(query)
+        descriptions = query.column_descriptions
+        if len(descriptions) == 1 and descriptions[0]["expr"] is descriptions[0]["entity"]:
+            return list(result.scalars().all())
+        return list(result.all())
+
+    def _order(self, descending: bool):
+        if descending:
+            return self.sort_column.desc(), self.id_column.desc()
+        return self.sort_column.asc(), self.id_column.asc()
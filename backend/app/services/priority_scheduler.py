@@ -0,0 +1,94 @@
+"""
+Priority Scheduler - Urgency-ordered admission with aging
+Work competing for a limited resource (Groq slots, auto-assignment) is
+admitted lowest score first, using the urgency head start from app/priority.py,
+so routine work is delayed by urgent work but never starved.
+"""
+import time
+import heapq
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+
+from app.priority import URGENCY_RANK, aging_seconds, head_start, urgency_level
+
+
+class PriorityScheduler:
+    """
+    Like asyncio.Semaphore(capacity), but waiters are admitted by score
+    instead of arrival order. With aging_seconds=0 it is plain FIFO.
+    """
+
+    def __init__(self, capacity: int, aging_seconds: float = 900.0):
+        self.capacity = max(1, capacity)
+        self.aging_seconds = aging_seconds
+        self.running = 0
+        self.waiting = 0
+        # (score, seq, urgency, enqueued_at, future); abandoned entries are skipped on release
+        self._waiters: List[Tuple[float, int, str, float, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self.admitted = {level: 0 for level in URGENCY_RANK}
+        self.longest_wait = {level: 0.0 for level in URGENCY_RANK}
+
+    @classmethod
+    def from_env(cls, capacity: int) -> "PriorityScheduler":
+        return cls(capacity, aging_seconds=aging_seconds())
+
+    def score(self, urgency: Optional[str], now: Optional[float] = None) -> float:
+        return (time.monotonic() if now is None else now) - head_start(urgency, self.aging_seconds)
+
+    async def acquire(self, urgency: Optional[str] = "medium", timeout: Optional[float] = None):
+        """Wait for a slot; raises asyncio.TimeoutError after `timeout` seconds"""
+        level = urgency_level(urgency)
+        if self.running < self.capacity and not self.waiting:
+            self.running += 1
+            self._admit(level, 0.0)
+            return
+
+        now = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (self.score(level, now), next(self._seq), level, now, future))
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(future, timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            if future.done() and not future.cancelled():
+                self.release()  # The slot was handed over just as we gave up
+            else:
+                self.waiting -= 1
+            raise
+
+    def release(self):
+        """Hand the slot to the best waiter, or free it"""
+        while self._waiters:
+            _, _, level, enqueued_at, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue  # Timed out or cancelled
+            self.waiting -= 1
+            future.set_result(None)
+            self._admit(level, time.monotonic() - enqueued_at)
+            return
+        self.running -= 1
+
+    @asynccontextmanager
+    async def slot(self, urgency: Optional[str] = "medium", timeout: Optional[float] = None):
+        await self.acquire(urgency, timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def _admit(self, level: str, waited: float):
+        self.admitted[level] += 1
+        self.longest_wait[level] = max(self.longest_wait[level], waited)
+
+    def stats(self) -> Dict:
+        return {
+            "capacity": self.capacity,
+            "aging_seconds": self.aging_seconds,
+            "running": self.running,
+            "waiting": self.waiting,
+            "admitted": dict(self.admitted),
+            "longest_wait_seconds": {level: round(waited, 3) for level, waited in self.longest_wait.items()}
+        }
@@ -0,0 +1,221 @@
+"""
+Rate Limiter - Shared governor for every Groq API call
+Token bucket (requests/sec) + concurrency cap, adapted from the provider's
+rate-limit headers. Over-limit calls queue until a deadline instead of failing,
+and queued calls get slots by urgency (with aging) rather than arrival order.
+"""
+import os
+import re
+import time
+import random
+import asyncio
+import inspect
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import groq
+
+from app.priority import aging_seconds
+from app.services.priority_scheduler import PriorityScheduler
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a queued call could not be sent before its deadline"""
+
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse Groq reset headers like '2m59.56s', '7.66s', '120ms' or plain seconds"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    scale = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * scale[unit] for amount, unit in parts)
+
+
+class GroqGovernor:
+    """
+    Adaptive token bucket + semaphore.
+
+    - 429s halve the send rate and pause everyone until retry-after;
+      successes grow it back additively (AIMD).
+    - When remaining-requests headers say the window is nearly spent,
+      the bucket is trimmed to what is left and, once it is empty,
+      sending pauses until the window resets.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float = 5.0,
+        burst: int = 10,
+        max_concurrency: int = 8,
+        queue_timeout: float = 30.0,
+        max_retries: int = 2,
+        min_rate: float = 0.2,
+        aging_seconds: float = 900.0
+    ):
+        self.max_rate = requests_per_second
+        self.rate = requests_per_second
+        self.min_rate = min(min_rate, requests_per_second)
+        self.burst = max(1, burst)
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._slots = PriorityScheduler(max_concurrency, aging_seconds)
+        self._token_lock = asyncio.Lock()  # FIFO: callers get tokens in arrival order
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.sent = 0
+        self.succeeded = 0
+        self.rate_limited = 0
+        self.timed_out = 0
+
+    @classmethod
+    def from_env(cls) -> "GroqGovernor":
+        return cls(
+            requests_per_second=float(os.getenv("GROQ_MAX_RPS", "5")),
+            burst=int(os.getenv("GROQ_BURST", "10")),
+            max_concurrency=int(os.getenv("GROQ_MAX_CONCURRENCY", "8")),
+            queue_timeout=float(os.getenv("GROQ_QUEUE_TIMEOUT", "30")),
+            max_retries=int(os.getenv("GROQ_MAX_RETRIES", "2")),
+            aging_seconds=aging_seconds()
+        )
+
+    async def run(
+        self,
+        request: Callable[[], Awaitable[Any]],
+        deadline: Optional[float] = None,
+        urgency: Optional[str] = "medium"
+    ) -> Any:
+        """
+        Send a raw-response Groq request under the governor and return the
+        parsed result. `request` must build a fresh call on every invocation
+        (e.g. lambda: client.chat.completions.with_raw_response.create(...)).
+        When calls queue for a slot, more urgent ones are admitted first.
+        """
+        deadline = deadline or (time.monotonic() + self.queue_timeout)
+        failures = 0
+
+        while True:
+            await self._acquire_slot(deadline, urgency)
+            try:
+                await self._acquire_token(deadline)
+                self.sent += 1
+                self.in_flight += 1
+                try:
+                    raw = await request()
+                finally:
+                    self.in_flight -= 1
+            except groq.RateLimitError as e:
+                self.rate_limited += 1
+                self._on_rate_limited(e.response.headers)
+                continue  # Wait for the pause and try again until the deadline
+            except (groq.APIConnectionError, groq.InternalServerError):
+                failures += 1
+                if failures > self.max_retries:
+                    raise
+                await self._sleep_until(min(deadline, time.monotonic() + self._backoff(failures)), deadline)
+                continue
+            finally:
+                self._slots.release()
+
+            self._on_success(raw.headers)
+            parsed = raw.parse()
+            return await parsed if inspect.isawaitable(parsed) else parsed
+
+    # --- Acquisition ---
+
+    async def _acquire_slot(self, deadline: float, urgency: Optional[str]):
+        try:
+            await self._slots.acquire(urgency, timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise RateLimitTimeout("Timed out waiting for a Groq concurrency slot")
+
+    async def _acquire_token(self, deadline: float):
+        async with self._token_lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await self._sleep_until(self._paused_until, deadline)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await self._sleep_until(now + (1 - self.tokens) / self.rate, deadline)
+
+    async def _sleep_until(self, wake_at: float, deadline: float):
+        if wake_at > deadline:
+            self.timed_out += 1
+            raise RateLimitTimeout("Groq rate limit queue deadline exceeded")
+        await asyncio.sleep(max(0.0, wake_at - time.monotonic()))
+
+    def _refill(self, now: float):
+        self.tokens = min(float(self.burst), self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _backoff(self, attempt: int) -> float:
+        return min(8.0, 0.5 * 2 ** (attempt - 1)) * (0.5 + random.random() / 2)
+
+    # --- Adaptation ---
+
+    def _on_rate_limited(self, headers):
+        now = time.monotonic()
+        self._refill(now)
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = min(self.tokens, 0.0)
+        retry_after = parse_duration(headers.get("retry-after")) or 1.0 / self.rate
+        self._paused_until = max(self._paused_until, now + retry_after * (1 + random.random() / 10))
+
+    def _on_success(self, headers):
+        now = time.monotonic()
+        self.succeeded += 1
+        self._refill(now)
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+        remaining = headers.get("x-ratelimit-remaining-requests")
+        reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+        if remaining is None or not reset:
+            return
+        try:
+            remaining = float(remaining)
+        except ValueError:
+            return
+        if remaining < 1:
+            # Window spent: hold everyone until it resets instead of eating 429s
+            self._paused_until = max(self._paused_until, now + reset)
+        elif remaining <= self.max_concurrency:
+            self.tokens = min(self.tokens, remaining)
+
+    def stats(self) -> Dict:
+        return {
+            "rate_per_second": round(self.rate, 3),
+            "max_rate_per_second": self.max_rate,
+            "in_flight": self.in_flight,
+            "sent": self.sent,
+            "succeeded": self.succeeded,
+            "rate_limited": self.rate_limited,
+            "timed_out": self.timed_out,
+            "slots": self._slots.stats()
+        }
+
+
+_governor: Optional[GroqGovernor] = None
+
+
+def get_groq_governor() -> GroqGovernor:
+    """Process-wide governor shared by VoiceService and IntentService"""
+    global _governor
+    if _governor is None:
+        _governor = GroqGovernor.from_env()
+    return _governor
@@ -0,0 +1,176 @@
+"""
+Skill Index - In-process intent -> worker lookup for auto-assignment
+Per business, each skill maps to a heap of eligible workers ordered the way
+auto_assign_task ranks them: fewest current tasks first, then highest rating.
+Skills are read from worker_skills once, when a business is loaded or a
+worker's skills change, so picking a worker is a heap peek instead of a
+roster scan.
+
+Heap entries are never updated in place: a change pushes fresh entries and
+bumps the worker's version, and stale entries are dropped when they reach the
+top. Other processes (more web workers, worker.py) change workers too, so a
+business is reloaded from the database after SKILL_INDEX_TTL seconds and
+callers re-check capacity in the database before trusting a pick.
+"""
+import os
+import time
+import heapq
+import itertools
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+ELIGIBLE_STATUSES = ("available", "busy")
+
+
+@dataclass
+class IndexedWorker:
+    """The fields of a worker that decide whether and how it ranks"""
+    id: str
+    skills: Tuple[str, ...]
+    status: str
+    current_tasks: int
+    max_tasks: int
+    rating: Optional[float]
+    version: int = 0
+
+    @property
+    def eligible(self) -> bool:
+        return self.status in ELIGIBLE_STATUSES and self.current_tasks < self.max_tasks
+
+    @classmethod
+    def from_row(cls, worker, skills: Iterable[str]) -> "IndexedWorker":
+        """Build from a WorkerDB object or a row with the same column names"""
+        return cls(
+            id=worker.id,
+            skills=tuple(skills),
+            status=worker.status,
+            current_tasks=worker.current_tasks or 0,
+            max_tasks=worker.max_tasks,
+            rating=worker.rating
+        )
+
+
+class BusinessSkills:
+    """One business's workers and its per-skill heaps"""
+
+    def __init__(self, loaded_at: float):
+        self.loaded_at = loaded_at
+        self.workers: Dict[str, IndexedWorker] = {}
+        # skill -> [(current_tasks, -rating, seq, worker_id, version)]
+        self.heaps: Dict[str, List[Tuple]] = {}
+        self._seq = itertools.count()
+
+    @classmethod
+    def from_rows(cls, workers, skills: Dict[str, List[str]]) -> "BusinessSkills":
+        """Build from worker rows and their skills (by worker id)"""
+        business = cls(loaded_at=time.monotonic())
+        for worker in workers:
+            business.put(IndexedWorker.from_row(worker, skills.get(worker.id, ())))
+        return business
+
+    def put(self, worker: IndexedWorker):
+        previous = self.workers.get(worker.id)
+        worker.version = previous.version + 1 if previous else 0
+        self.workers[worker.id] = worker
+        if not worker.eligible:
+            return
+
+        # Unrated workers rank after rated ones, like the old ORDER BY rating DESC on SQLite
+        entry = (worker.current_tasks, -(worker.rating or 0.0), next(self._seq), worker.id, worker.version)
+        for skill in worker.skills:
+            heapq.heappush(self.heaps.setdefault(skill, []), entry)
+
+    def remove(self, worker_id: str):
+        self.workers.pop(worker_id, None)
+
+    def best(self, skill: str, exclude: frozenset = frozenset()) -> Optional[str]:
+        heap = self.heaps.get(skill)
+        if not heap:
+            return None
+
+        # Drop entries superseded by a later put() or belonging to removed workers
+        while heap:
+            _, _, _, worker_id, version = heap[0]
+            worker = self.workers.get(worker_id)
+            if worker is not None and worker.version == version and worker.eligible:
+                break
+            heapq.heappop(heap)
+
+        if not heap:
+            return None
+        if not exclude:
+            return heap[0][3]
+
+        # Rare path (a pick was rejected by the database): walk the heap in order
+        for entry in heapq.nsmallest(len(heap), heap):
+            worker = self.workers.get(entry[3])
+            if entry[3] not in exclude and worker is not None and worker.version == entry[4] and worker.eligible:
+                return entry[3]
+        return None
+
+    def __len__(self) -> int:
+        return len(self.workers)
+
+
+class SkillIndex:
+    """Per-business skill heaps, loaded lazily and refreshed after a TTL"""
+
+    def __init__(self, ttl_seconds: float = 60):
+        self.ttl_seconds = ttl_seconds
+        self.lookups = 0
+        self.loads = 0
+        self._businesses: Dict[str, BusinessSkills] = {}
+        self._business_of: Dict[str, str] = {}  # worker_id -> business_id
+
+    @classmethod
+    def from_env(cls) -> "SkillIndex":
+        return cls(ttl_seconds=float(os.getenv("SKILL_INDEX_TTL", "60")))
+
+    def is_loaded(self, business_id: str) -> bool:
+        business = self._businesses.get(business_id)
+        return business is not None and time.monotonic() - business.loaded_at < self.ttl_seconds
+
+    def load(self, business_id: str, workers, skills: Dict[str, List[str]]):
+        """Replace a business's index with the given worker rows and their skills (by worker id)"""
+        business = BusinessSkills.from_rows(workers, skills)
+        for worker_id in business.workers:
+            self._business_of[worker_id] = business_id
+        self._businesses[business_id] = business
+        self.loads += 1
+
+    def put(self, business_id: str, worker, skills: Optional[Iterable[str]] = None):
+        """
+        Record a created or changed worker (a WorkerDB object or matching row).
+        skills=None keeps the skills already indexed for the worker.
+        """
+        business = self._businesses.get(business_id)
+        if business is None:
+            return  # Not loaded yet; the first lookup reads it from the database
+        if skills is None:
+            known = business.workers.get(worker.id)
+            skills = known.skills if known else ()
+        business.put(IndexedWorker.from_row(worker, skills))
+        self._business_of[worker.id] = business_id
+
+    def remove(self, worker_id: str):
+        business_id = self._business_of.pop(worker_id, None)
+        business = self._businesses.get(business_id)
+        if business is not None:
+            business.remove(worker_id)
+
+    def best(self, business_id: str, skill: str, exclude: frozenset = frozenset()) -> Optional[str]:
+        """Id of the best eligible worker with `skill`; the business must be loaded"""
+        self.lookups += 1
+        return self._businesses[business_id].best(skill, exclude)
+
+    def invalidate(self, business_id: str):
+        self._businesses.pop(business_id, None)
+
+    def stats(self) -> Dict:
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "businesses": len(self._businesses),
+            "workers": sum(len(business) for business in self._businesses.values()),
+            "lookups": self.lookups,
+            "loads": self.loads
+        }
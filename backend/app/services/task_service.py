@@ -1,16 +1,66 @@
 """
 Task Service - Handles task creation, updates, and orchestration
 """
+import os
 import uuid
+from collections import Counter
 from datetime import datetime
-from typing import Optional, List, Dict
-from sqlalchemy import select, func, desc
+from typing import Optional, List, Dict, Sequence, Tuple
+from sqlalchemy import select, insert
 from app.database import AsyncSessionLocal, TaskDB, CallLogDB, FailureLogDB
+from app.priority import priority_at, urgency_rank
+from app.services.counters import bump, escalation_delta, read_counters, reconcile
+from app.services.pagination import Keyset, Page
+from app.services.task_writer import TaskWriter
+
+# Newest first; served by the (business_id[, status], created_at, id) indexes
+TASK_KEYSET = Keyset("tasks", TaskDB.created_at, TaskDB.id)
+# Most pressing first (urgency with aging); served by the (business_id[, status], priority_at, id) indexes
+TASK_PRIORITY_KEYSET = Keyset("tasks_priority", TaskDB.priority_at, TaskDB.id, descending=False)
+TASK_SORTS = {"created": TASK_KEYSET, "priority": TASK_PRIORITY_KEYSET}
+FAILURE_KEYSET = Keyset("failures", FailureLogDB.created_at, FailureLogDB.id)
+
+# Fields a task listing can return (?fields=...); task_id is the row id
+TASK_LIST_FIELDS = {
+    "task_id": TaskDB.id,
+    "intent": TaskDB.intent,
+    "issue": TaskDB.issue,
+    "urgency": TaskDB.urgency,
+    "location": TaskDB.location,
+    "preferred_time": TaskDB.preferred_time,
+    "confidence": TaskDB.confidence,
+    "status": TaskDB.status,
+    "customer_phone": TaskDB.customer_phone,
+    "customer_name": TaskDB.customer_name,
+    "created_at": TaskDB.created_at,
+    "updated_at": TaskDB.updated_at,
+    "escalation_reason": TaskDB.escalation_reason,
+    "assigned_to": TaskDB.assigned_to,
+    "assigned_worker_name": TaskDB.assigned_worker_name,
+    "prompt_version": TaskDB.prompt_version,
+    "priority_at": TaskDB.priority_at,
+    "transcript": TaskDB.transcript,
+}
+
+# The dashboard's columns; transcripts are large and only sent when asked for
+DEFAULT_TASK_FIELDS = (
+    "task_id", "intent", "issue", "urgency", "location", "preferred_time",
+    "confidence", "status", "customer_phone", "created_at",
+)
 
 
 class TaskService:
     """Service for managing tasks and orchestration"""
     
+    def __init__(self):
+        # Optional group commit: bursts of new tasks share one transaction
+        window_ms = float(os.getenv("TASK_GROUP_COMMIT_MS", "0"))
+        self.group_commit = TaskWriter(
+            self._insert_tasks,
+            window_seconds=window_ms / 1000,
+            max_batch_size=int(os.getenv("TASK_GROUP_COMMIT_MAX", "100"))
+        ) if window_ms > 0 else None
+    
     async def create_task(
         self,
         intent: str,
@@ -22,94 +72,121 @@ class TaskService:
         business_id: str,
         location: Optional[str] = None,
         preferred_time: Optional[str] = None,
-        customer_name: Optional[str] = None
+        customer_name: Optional[str] = None,
+        prompt_version: Optional[str] = None
     ) -> Dict:
-        """Create a new task from extracted intent"""
+        """
+        Create a new task from extracted intent, plus its call log, in one
+        transaction. Every value (ids, timestamps) is generated here, so the
+        row never has to be read back.
+        """
+        now = datetime.utcnow()
+        task = {
+            "id": str(uuid.uuid4()),
+            "business_id": business_id,
+            "intent": intent,
+            "issue": issue,
+            "urgency": urgency,
+            "location": location,
+            "preferred_time": preferred_time,
+            "confidence": confidence,
+            "status": "new",
+            "customer_phone": customer_phone,
+            "customer_name": customer_name,
+            "transcript": transcript,
+            "prompt_version": prompt_version,
+            "created_at": now,
+            "updated_at": now,
+            "priority_at": priority_at(urgency, now)
+        }
+        
+        if self.group_commit:
+            await self.group_commit.submit(task)
+        else:
+            await self._insert_tasks([task])
+        
+        return {key: value for key, value in task.items() if key != "business_id"}
+    
+    async def _insert_tasks(self, tasks: List[Dict]):
+        """Insert task rows and their call logs with multi-row INSERTs and a single commit"""
+        call_logs = [
+            {
+                "id": str(uuid.uuid4()),
+                "business_id": task["business_id"],
+                "phone_number": task["customer_phone"],
+                "transcript": task["transcript"],
+                "confidence_score": task["confidence"],
+                "task_id": task["id"],
+                "success": True,
+                "created_at": task["created_at"]
+            }
+            for task in tasks
+        ]
         
         async with AsyncSessionLocal() as session:
-            task = TaskDB(
-                id=str(uuid.uuid4()),
-                business_id=business_id,
-                intent=intent,
-                issue=issue,
-                urgency=urgency,
-                location=location,
-                preferred_time=preferred_time,
-                confidence=confidence,
-                status="new",
-                customer_phone=customer_phone,
-                customer_name=customer_name,
-                transcript=transcript,
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
-            )
+            await session.execute(insert(TaskDB), tasks)
+            await session.execute(insert(CallLogDB), call_logs)
             
-            session.add(task)
-            await session.commit()
-            await session.refresh(task)
-            
-            # Also log the call
-            call_log = CallLogDB(
-                id=str(uuid.uuid4()),
-                business_id=business_id,
-                phone_number=customer_phone,
-                transcript=transcript,
-                confidence_score=confidence,
-                task_id=task.id,
-                success=True,
-                created_at=datetime.utcnow()
-            )
-            session.add(call_log)
+            # Sorted so concurrent batches lock counter rows in the same order
+            for business_id, count in sorted(Counter(task["business_id"] for task in tasks).items()):
+                await bump(session, business_id, tasks_created=count, total_calls=count)
             await session.commit()
-            
-            return {
-                "id": task.id,
-                "intent": task.intent,
-                "issue": task.issue,
-                "urgency": task.urgency,
-                "location": task.location,
-                "preferred_time": task.preferred_time,
-                "confidence": task.confidence,
-                "status": task.status,
-                "customer_phone": task.customer_phone,
-                "customer_name": task.customer_name,
-                "transcript": task.transcript,
-                "created_at": task.created_at,
-                "updated_at": task.updated_at
-            }
     
     async def get_tasks(
         self,
         business_id: str,
         status: Optional[str] = None,
-        limit: int = 50
-    ) -> List[Dict]:
-        """Get tasks with optional status filter"""
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+        sort: str = "created"
+    ) -> Page:
+        """
+        Get a page of tasks with optional status filter, newest first or,
+        with sort="priority", most pressing first (urgency with aging, the
+        order the schedulers work in). Only the requested columns are
+        selected and rows are mapped straight to dicts, without loading
+        TaskDB entities.
+        """
+        fields = self.parse_task_fields(fields)
+        keyset = TASK_SORTS.get(sort)
+        if keyset is None:
+            raise ValueError(f"Unknown sort '{sort}', expected one of: {', '.join(TASK_SORTS)}")
+        
+        # id and the sort column are always selected: the page cursors are built from them
+        sort_column = keyset.sort_column
+        columns = [TaskDB.id, sort_column] + [
+            TASK_LIST_FIELDS[name].label(name) for name in fields if name not in ("task_id", sort_column.key)
+        ]
         
         async with AsyncSessionLocal() as session:
-            query = select(TaskDB).where(TaskDB.business_id == business_id).order_by(desc(TaskDB.created_at)).limit(limit)
+            query = select(*columns).where(TaskDB.business_id == business_id)
             
             if status:
                 query = query.where(TaskDB.status == status)
             
-            result = await session.execute(query)
-            tasks = result.scalars().all()
-            
-            return [
-                {
-                    "task_id": task.id,
-                    "intent": task.intent,
-                    "issue": task.issue,
-                    "urgency": task.urgency,
-                    "location": task.location,
-                    "preferred_time": task.preferred_time,
-                    "confidence": task.confidence,
-                    "status": task.status,
-                    "customer_phone": task.customer_phone,
-                    "created_at": task.created_at
-                }
-                for task in tasks
-            ]
+            page = await keyset.fetch(session, query, limit, cursor)
+        
+        page.items = [
+            {name: row.id if name == "task_id" else getattr(row, name) for name in fields}
+            for row in page.items
+        ]
+        return page
+    
+    @staticmethod
+    def parse_task_fields(fields: Optional[Sequence[str]]) -> Tuple[str, ...]:
+        """Validate a field selection (a list or a comma-separated string)"""
+        if not fields:
+            return DEFAULT_TASK_FIELDS
+        if isinstance(fields, str):
+            fields = fields.split(",")
+        
+        # task_id always comes first so clients can address the rows they get
+        selected = tuple(dict.fromkeys(["task_id"] + [name.strip() for name in fields if name.strip()]))
+        unknown = [name for name in selected if name not in TASK_LIST_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown task fields: {', '.join(unknown)}")
+        return selected
     
     async def get_task(self, task_id: str) -> Optional[Dict]:
         """Get a specific task by ID"""
@@ -137,7 +214,8 @@ class TaskService:
                 "transcript": task.transcript,
                 "created_at": task.created_at,
                 "updated_at": task.updated_at,
-                "escalation_reason": task.escalation_reason
+                "escalation_reason": task.escalation_reason,
+                "prompt_version": task.prompt_version
             }
     
     async def update_task_status(self, task_id: str, status: str) -> Optional[Dict]:
@@ -152,6 +230,7 @@ class TaskService:
             if not task:
                 return None
             
+            await bump(session, task.business_id, escalations=escalation_delta(task.status, status))
             task.status = status
             task.updated_at = datetime.utcnow()
             
@@ -176,6 +255,7 @@ class TaskService:
             if not task:
                 return None
             
+            await bump(session, task.business_id, escalations=escalation_delta(task.status, "escalated"))
             task.status = "escalated"
             task.escalation_reason = reason
             task.updated_at = datetime.utcnow()
@@ -187,7 +267,8 @@ class TaskService:
             await self.send_escalation_notification(
                 {"intent": task.intent, "issue": task.issue},
                 reason,
-                task.customer_phone
+                task.customer_phone,
+                business_id=task.business_id
             )
             
             return {
@@ -197,84 +278,74 @@ class TaskService:
             }
     
     async def get_dashboard_stats(self, business_id: str) -> Dict:
-        """Get dashboard statistics"""
+        """Get dashboard statistics (one primary-key read of business_counters)"""
         
         async with AsyncSessionLocal() as session:
-            # Total calls
-            total_calls_result = await session.execute(
-                select(func.count(CallLogDB.id)).where(CallLogDB.business_id == business_id)
-            )
-            total_calls = total_calls_result.scalar() or 0
-            
-            # Tasks created
-            tasks_created_result = await session.execute(
-                select(func.count(TaskDB.id)).where(TaskDB.business_id == business_id)
-            )
-            tasks_created = tasks_created_result.scalar() or 0
-            
-            # Escalations
-            escalations_result = await session.execute(
-                select(func.count(TaskDB.id)).where(
-                    TaskDB.business_id == business_id,
-                    TaskDB.status == "escalated"
-                )
-            )
-            escalations = escalations_result.scalar() or 0
-            
-            # Failures
-            failures_result = await session.execute(
-                select(func.count(FailureLogDB.id)).where(FailureLogDB.business_id == business_id)
-            )
-            failures = failures_result.scalar() or 0
-            
-            # Success rate
-            success_rate = (tasks_created / total_calls * 100) if total_calls > 0 else 0
-            
-            return {
-                "total_calls": total_calls,
-                "tasks_created": tasks_created,
-                "escalations": escalations,
-                "failures": failures,
-                "success_rate": round(success_rate, 2)
-            }
+            counters = await read_counters(session, business_id)
+        
+        return self._dashboard_stats(counters)
     
-    async def log_failure(self, error_message: str, phone_number: Optional[str] = None):
+    async def reconcile_stats(self, business_id: str) -> Dict:
+        """Recount a business's counters from the source tables and store them"""
+        
+        async with AsyncSessionLocal() as session:
+            counters = await reconcile(session, business_id)
+            await session.commit()
+        
+        return self._dashboard_stats(counters)
+    
+    @staticmethod
+    def _dashboard_stats(counters: Dict) -> Dict:
+        total_calls = counters["total_calls"]
+        tasks_created = counters["tasks_created"]
+        
+        # Success rate
+        success_rate = (tasks_created / total_calls * 100) if total_calls > 0 else 0
+        
+        return {
+            "total_calls": total_calls,
+            "tasks_created": tasks_created,
+            "escalations": counters["escalations"],
+            "failures": counters["failures"],
+            "success_rate": round(success_rate, 2)
+        }
+    
+    async def log_failure(
+        self,
+        error_message: str,
+        phone_number: Optional[str] = None,
+        business_id: Optional[str] = None
+    ):
         """Log a system failure"""
         
         async with AsyncSessionLocal() as session:
             failure = FailureLogDB(
                 id=str(uuid.uuid4()),
+                business_id=business_id,
                 error_message=error_message,
                 phone_number=phone_number,
                 created_at=datetime.utcnow()
             )
             session.add(failure)
+            await bump(session, business_id, failures=1)
             await session.commit()
     
-    async def get_failures(self, limit: int = 50) -> List[Dict]:
-        """Get failure logs"""
+    async def get_failures(self, limit: int = 50, cursor: Optional[str] = None) -> Page:
+        """Get a page of failure logs, newest first"""
         
         async with AsyncSessionLocal() as session:
-            result = await session.execute(
-                select(FailureLogDB)
-                .order_by(desc(FailureLogDB.created_at))
-                .limit(limit)
+            query = select(
+                FailureLogDB.id, FailureLogDB.error_message, FailureLogDB.phone_number, FailureLogDB.created_at
             )
-            failures = result.scalars().all()
-            
-            return [
-                {
-                    "id": f.id,
-                    "error_message": f.error_message,
-                    "phone_number": f.phone_number,
-                    "created_at": f.created_at
-                }
-                for f in failures
-            ]
+            page = await FAILURE_KEYSET.fetch(session, query, limit, cursor)
+        
+        page.items = [dict(row._mapping) for row in page.items]
+        return page
     
-    async def send_task_notification(self, task: Dict):
-        """Send notification about new task using Twilio (SMS/WhatsApp)"""
-        from app.services.twilio_service import TwilioService
+    async def send_task_notification(self, task: Dict, business_id: Optional[str] = None):
+        """Queue a new-task alert; bursts to the ops phone are coalesced into digests"""
+        from app.services.twilio_service import get_twilio_service
+        from app.services.notification_dispatcher import get_notification_dispatcher
         import os
         
         # Log to console
@@ -284,24 +355,39 @@ class TaskService:
         print(f"   Customer: {task['customer_phone']}")
         
         # Send real notification via Twilio
-        twilio = TwilioService()
+        twilio = get_twilio_service()
         notification_phone = os.getenv("ESCALATION_PHONE", "")
         notification_whatsapp = os.getenv("ESCALATION_WHATSAPP", "")
         
         # Try WhatsApp first, fall back to SMS
         if notification_whatsapp:
-            await twilio.send_task_notification(task, notification_whatsapp, channel="whatsapp")
+            recipient, channel = notification_whatsapp, "whatsapp"
         elif notification_phone:
-            await twilio.send_task_notification(task, notification_phone, channel="sms")
+            recipient, channel = notification_phone, "sms"
+        else:
+            return
+        
+        await get_notification_dispatcher().notify(
+            recipient,
+            twilio.format_task_alert(task),
+            channel=channel,
+            kind="task_alert",
+            summary=twilio.format_task_summary(task),
+            coalesce=True,
+            urgency=task["urgency"],
+            business_id=business_id
+        )
     
     async def send_escalation_notification(
         self,
         intent_result: Dict,
         reason: str,
-        phone_number: str
+        phone_number: str,
+        business_id: Optional[str] = None
     ):
-        """Send escalation notification using Twilio (SMS/WhatsApp)"""
-        from app.services.twilio_service import TwilioService
+        """Queue an escalation alert (sent immediately, never coalesced)"""
+        from app.services.twilio_service import get_twilio_service
+        from app.services.notification_dispatcher import get_notification_dispatcher
         import os
         
         # Log to console
@@ -311,7 +397,7 @@ class TaskService:
         print(f"   Details: {intent_result}")
         
         # Send real notification via Twilio
-        twilio = TwilioService()
+        twilio = get_twilio_service()
         notification_phone = os.getenv("ESCALATION_PHONE", "")
         notification_whatsapp = os.getenv("ESCALATION_WHATSAPP", "")
         
@@ -324,10 +410,18 @@ class TaskService:
         
         # Try WhatsApp first (preferred for escalations)
         if notification_whatsapp:
-            await twilio.send_escalation_notification(
-                task_data, reason, notification_whatsapp, channel="whatsapp"
-            )
+            recipient, channel = notification_whatsapp, "whatsapp"
         elif notification_phone:
-            await twilio.send_escalation_notification(
-                task_data, reason, notification_phone, channel="sms"
-            )
+            recipient, channel = notification_phone, "sms"
+        else:
+            return
+        
+        await get_notification_dispatcher().notify(
+            recipient,
+            twilio.format_escalation_alert(task_data, reason),
+            channel=channel,
+            kind="escalation",
+            # Escalations wait on a person: at least "high", whatever the caller asked for
+            urgency=min(intent_result.get("urgency") or "high", "high", key=urgency_rank),
+            business_id=business_id
+        )
@@ -0,0 +1,95 @@
+"""
+Task Writer - Group commit for task inserts during bursts
+create_task calls arriving within a short window (or until the batch is full)
+are written with multi-row INSERTs in one transaction, so a burst of inbound
+calls costs one commit/fsync instead of one per call. If a batch fails, its
+rows are retried one by one so a single bad row only fails its own caller.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+# write_rows(task_rows) inserts the tasks (and their call logs) in one transaction
+RowWriter = Callable[[List[Dict]], Awaitable[None]]
+
+
+class TaskWriter:
+    """Async group-commit batcher for task rows"""
+
+    def __init__(self, write_rows: RowWriter, window_seconds: float = 0.005, max_batch_size: int = 100):
+        self.write_rows = write_rows
+        self.window_seconds = window_seconds
+        self.max_batch_size = max(1, max_batch_size)
+        self.commits = 0
+        self.rows_written = 0
+        self.individual_retries = 0
+        self._pending: List[Tuple[Dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Set[asyncio.Task] = set()
+
+    async def submit(self, row: Dict):
+        """Queue a task row and wait until its transaction has committed"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._dispatch)
+        self._pending.append((row, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+
+        await future
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        # Callers that were cancelled still get their row written: they may
+        # have been cancelled after the task was promised to the customer
+        task = asyncio.ensure_future(self._run(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[Dict, asyncio.Future]]):
+        try:
+            await self.write_rows([row for row, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                self._resolve(batch[0][1], e)
+                return
+            print(f"⚠️ Group commit of {len(batch)} tasks failed, writing individually: {e}")
+            self.individual_retries += len(batch)
+            await asyncio.gather(*(self._run([item]) for item in batch))
+            return
+
+        self.commits += 1
+        self.rows_written += len(batch)
+        for _, future in batch:
+            self._resolve(future)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, error: Optional[Exception] = None):
+        if future.done():
+            return
+        if error is None:
+            future.set_result(None)
+        else:
+            future.set_exception(error)
+
+    async def close(self):
+        """Write anything still waiting for its window and wait for in-flight commits"""
+        self._dispatch()
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {
+            "window_ms": self.window_seconds * 1000,
+            "max_batch_size": self.max_batch_size,
+            "commits": self.commits,
+            "rows_written": self.rows_written,
+            "individual_retries": self.individual_retries,
+            "average_batch_size": round(self.rows_written / self.commits, 2) if self.commits else 0.0
+        }
@@ -0,0 +1,121 @@
+"""
+Transcript Cache - Content-addressed cache of Whisper transcripts
+Keyed by sha256(audio) + language + model so redelivered webhooks and
+forwarded voice notes are transcribed once
+"""
+import os
+import time
+import asyncio
+import sqlite3
+import threading
+from typing import Optional, Dict
+from app.services.cache import TTLCache
+
+
+class TranscriptCache:
+    """Two-tier transcript cache: in-memory LRU plus optional SQLite file"""
+
+    PURGE_EVERY = 500  # Writes between sweeps of expired SQLite rows
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl_seconds: float = 86400,
+        db_path: Optional[str] = None
+    ):
+        self.memory = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path or None
+        self.persistent_hits = 0
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    @classmethod
+    def from_env(cls) -> "TranscriptCache":
+        return cls(
+            max_entries=int(os.getenv("TRANSCRIPT_CACHE_SIZE", "1000")),
+            ttl_seconds=float(os.getenv("TRANSCRIPT_CACHE_TTL", "86400")),
+            db_path=os.getenv("TRANSCRIPT_CACHE_DB", "")
+        )
+
+    @staticmethod
+    def make_key(audio_digest: str, language: Optional[str], model: str) -> str:
+        return f"{model}:{language or 'auto'}:{audio_digest}"
+
+    async def get(self, key: str) -> Optional[str]:
+        """Look up a transcript, promoting persistent hits into memory"""
+        transcript = self.memory.get(key)
+        if transcript is not None:
+            return transcript
+
+        if self.db_path:
+            transcript = await asyncio.to_thread(self._db_get, key)
+            if transcript is not None:
+                self.persistent_hits += 1
+                self.memory.set(key, transcript)
+                return transcript
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, transcript: str):
+        self.memory.set(key, transcript)
+        if self.db_path:
+            await asyncio.to_thread(self._db_set, key, transcript)
+
+    def stats(self) -> Dict:
+        lookups = self.memory.hits + self.persistent_hits + self.misses
+        hits = self.memory.hits + self.persistent_hits
+        return {
+            "memory": self.memory.stats(),
+            "persistent_enabled": bool(self.db_path),
+            "persistent_hits": self.persistent_hits,
+            "hits": hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # --- SQLite tier (always called from a worker thread) ---
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS transcripts ("
+                "key TEXT PRIMARY KEY, transcript TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_transcripts_expires_at ON transcripts (expires_at)")
+        return self._conn
+
+    def _db_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT transcript FROM transcripts WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def _db_set(self, key: str, transcript: str):
+        with self._lock:
+            conn = self._connection()
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO transcripts (key, transcript, expires_at) VALUES (?, ?, ?)",
+                (key, transcript, now + self.ttl_seconds)
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM transcripts WHERE expires_at <= ?", (now,))
+            conn.commit()
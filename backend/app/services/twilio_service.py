@@ -3,8 +3,13 @@ Twilio Service - Handles real phone calls, SMS, and WhatsApp notifications
 Phase 2 Implementation
 """
 import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict
+from requests.adapters import HTTPAdapter
 from twilio.rest import Client
+from twilio.http.http_client import TwilioHttpClient
 from twilio.twiml.voice_response import VoiceResponse, Gather
 from datetime import datetime
 
@@ -12,25 +17,62 @@ from datetime import datetime
 class TwilioService:
     """Service for Twilio voice calls, SMS, and WhatsApp integration"""
     
+    URGENCY_EMOJI = {
+        "high": "🔴",
+        "medium": "🟡", 
+        "low": "🟢"
+    }
+    
     def __init__(self):
         """Initialize Twilio client"""
         account_sid = os.getenv("TWILIO_ACCOUNT_SID")
         auth_token = os.getenv("TWILIO_AUTH_TOKEN")
         self.phone_number = os.getenv("TWILIO_PHONE_NUMBER")
         
+        # The Twilio SDK is synchronous: sends run on a bounded thread pool so a
+        # slow HTTPS round trip never blocks the event loop
+        self.send_workers = int(os.getenv("TWILIO_SEND_WORKERS", "8"))
+        self._executor = ThreadPoolExecutor(max_workers=self.send_workers, thread_name_prefix="twilio-send")
+        
         if not account_sid or not auth_token:
             print("WARNING: Twilio credentials not set. SMS/WhatsApp features disabled.")
             self.client = None
         else:
-            self.client = Client(account_sid, auth_token)
+            self.client = Client(account_sid, auth_token, http_client=self._build_http_client())
             print("✅ Twilio service initialized")
     
-    def generate_greeting_twiml(self, language: str = "en") -> str:
+    def _build_http_client(self) -> TwilioHttpClient:
+        """Keep-alive session with one pooled connection per send worker"""
+        http_client = TwilioHttpClient(
+            pool_connections=True,
+            timeout=float(os.getenv("TWILIO_HTTP_TIMEOUT", "15"))
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.send_workers)
+        http_client.session.mount("https://", adapter)
+        http_client.session.mount("http://", adapter)
+        return http_client
+    
+    async def _create_message(self, **params):
+        """Run the blocking messages.create call on the send pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            functools.partial(self.client.messages.create, **params)
+        )
+    
+    def close(self):
+        """Release the send pool and pooled connections (called on app shutdown)"""
+        self._executor.shutdown(wait=False)
+        if self.client is not None and getattr(self.client.http_client, "session", None) is not None:
+            self.client.http_client.session.close()
+    
+    def generate_greeting_twiml(self, language: str = "en", greeting: Optional[str] = None) -> str:
         """
         Generate TwiML for greeting and recording customer voice
         
         Args:
             language: 'en' for English, 'hi' for Hindi
+            greeting: Business-specific greeting replacing the default text
             
         Returns:
             TwiML XML string
@@ -43,7 +85,7 @@ class TwilioService:
             "hi": "नमस्ते! कॉल करने के लिए धन्यवाद। कृपया बीप के बाद अपनी सेवा की आवश्यकता बताएं।"
         }
         
-        greeting = greetings.get(language, greetings["en"])
+        greeting = greeting or greetings.get(language, greetings["en"])
         
         # Say greeting
         response.say(greeting, language=language, voice="alice")
@@ -81,7 +123,8 @@ class TwilioService:
     async def send_sms_notification(
         self,
         to_phone: str,
-        message: str
+        message: str,
+        status_callback: Optional[str] = None
     ) -> Optional[str]:
         """
         Send SMS notification
@@ -89,6 +132,7 @@ class TwilioService:
         Args:
             to_phone: Recipient phone number (E.164 format)
             message: Message body
+            status_callback: URL Twilio posts delivery status updates to
             
         Returns:
             Message SID or None if failed
@@ -99,11 +143,10 @@ class TwilioService:
             return None
         
         try:
-            msg = self.client.messages.create(
-                body=message,
-                from_=self.phone_number,
-                to=to_phone
-            )
+            params = {"body": message, "from_": self.phone_number, "to": to_phone}
+            if status_callback:
+                params["status_callback"] = status_callback
+            msg = await self._create_message(**params)
             print(f"✅ SMS sent to {to_phone}: {msg.sid}")
             return msg.sid
         except Exception as e:
@@ -113,7 +156,8 @@ class TwilioService:
     async def send_whatsapp_notification(
         self,
         to_phone: str,
-        message: str
+        message: str,
+        status_callback: Optional[str] = None
     ) -> Optional[str]:
         """
         Send WhatsApp notification
@@ -121,6 +165,7 @@ class TwilioService:
         Args:
             to_phone: Recipient phone number (E.164 format)
             message: Message body
+            status_callback: URL Twilio posts delivery status updates to
             
         Returns:
             Message SID or None if failed
@@ -135,11 +180,10 @@ class TwilioService:
             to_whatsapp = f"whatsapp:{to_phone}"
             from_whatsapp = f"whatsapp:{self.phone_number}"
             
-            msg = self.client.messages.create(
-                body=message,
-                from_=from_whatsapp,
-                to=to_whatsapp
-            )
+            params = {"body": message, "from_": from_whatsapp, "to": to_whatsapp}
+            if status_callback:
+                params["status_callback"] = status_callback
+            msg = await self._create_message(**params)
             print(f"✅ WhatsApp sent to {to_phone}: {msg.sid}")
             return msg.sid
         except Exception as e:
@@ -163,16 +207,20 @@ class TwilioService:
         Returns:
             True if sent successfully
         """
-        # Format message
-        urgency_emoji = {
-            "high": "🔴",
-            "medium": "🟡", 
-            "low": "🟢"
-        }
+        message = self.format_task_alert(task)
+        
+        if channel == "whatsapp":
+            result = await self.send_whatsapp_notification(notification_phone, message)
+        else:
+            result = await self.send_sms_notification(notification_phone, message)
         
-        emoji = urgency_emoji.get(task.get("urgency", "").lower(), "📋")
+        return result is not None
+    
+    def format_task_alert(self, task: Dict) -> str:
+        """Full NEW TASK ALERT body for the operations team"""
+        emoji = self.URGENCY_EMOJI.get(task.get("urgency", "").lower(), "📋")
         
-        message = f"""{emoji} NEW TASK ALERT
+        return f"""{emoji} NEW TASK ALERT
 
 Intent: {task.get('intent', 'N/A')}
 Issue: {task.get('issue', 'N/A')}
@@ -185,13 +233,14 @@ Task ID: {task.get('id', 'N/A')[:8]}
 Confidence: {task.get('confidence', 0):.0%}
 
 View dashboard to assign worker."""
-        
-        if channel == "whatsapp":
-            result = await self.send_whatsapp_notification(notification_phone, message)
-        else:
-            result = await self.send_sms_notification(notification_phone, message)
-        
-        return result is not None
+    
+    def format_task_summary(self, task: Dict) -> str:
+        """One-line version of a task alert, used in coalesced digests"""
+        emoji = self.URGENCY_EMOJI.get(task.get("urgency", "").lower(), "📋")
+        issue = task.get("issue") or "N/A"
+        if len(issue) > 60:
+            issue = issue[:57] + "..."
+        return f"{emoji} {task.get('intent', 'N/A')}: {issue} ({task.get('id', 'N/A')[:8]})"
     
     async def send_escalation_notification(
         self,
@@ -212,7 +261,18 @@ View dashboard to assign worker."""
         Returns:
             True if sent successfully
         """
-        message = f"""🚨 ESCALATION ALERT
+        message = self.format_escalation_alert(task, reason)
+        
+        if channel == "whatsapp":
+            result = await self.send_whatsapp_notification(notification_phone, message)
+        else:
+            result = await self.send_sms_notification(notification_phone, message)
+        
+        return result is not None
+    
+    def format_escalation_alert(self, task: Dict, reason: str) -> str:
+        """ESCALATION ALERT body for the operations team"""
+        return f"""🚨 ESCALATION ALERT
 
 Reason: {reason}
 
@@ -224,13 +284,6 @@ Customer: {task.get('customer_phone', 'N/A')}
 Confidence: {task.get('confidence', 0):.0%}
 
 ⚠️ REQUIRES MANUAL REVIEW"""
-        
-        if channel == "whatsapp":
-            result = await self.send_whatsapp_notification(notification_phone, message)
-        else:
-            result = await self.send_sms_notification(notification_phone, message)
-        
-        return result is not None
     
     async def send_customer_confirmation(
         self,
@@ -298,3 +351,21 @@ Reference: {task.get('id', 'N/A')[:8]}""",
         # Twilio recording URLs are available at:
         base_url = "https://api.twilio.com"
         return f"{base_url}{recording.uri.replace('.json', '.mp3')}"
+
+
+_twilio_service: Optional[TwilioService] = None
+
+
+def get_twilio_service() -> TwilioService:
+    """Process-wide TwilioService (one client, one connection pool)"""
+    global _twilio_service
+    if _twilio_service is None:
+        _twilio_service = TwilioService()
+    return _twilio_service
+
+
+def close_twilio_service():
+    global _twilio_service
+    if _twilio_service is not None:
+        _twilio_service.close()
+        _twilio_service = None
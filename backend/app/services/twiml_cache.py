@@ -0,0 +1,109 @@
+"""
+TwiML Cache - Prebuilt greeting/confirmation responses for the voice webhooks
+The TwiML only depends on language, BACKEND_URL and (for greetings) the
+called business, so it is serialized once and served as bytes. Entries are
+rebuilt automatically when BACKEND_URL changes.
+"""
+import os
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from app.services.cache import TTLCache
+from app.services.twilio_service import get_twilio_service
+
+# lookup(to_number) -> {language: greeting} for the business owning that number
+GreetingLookup = Callable[[str], Awaitable[Optional[Dict[str, str]]]]
+
+
+class TwiMLCache:
+    """Per-language TwiML bytes, plus per-number greetings for tenants"""
+
+    LANGUAGES = ("en", "hi")
+    MAX_STATIC_ENTRIES = 64  # Language comes from the request; don't grow without bound
+
+    def __init__(self, tenant_ttl: float = 300, tenant_max_entries: int = 5000):
+        self._static: Dict[Tuple[str, str], bytes] = {}
+        self._tenants = TTLCache(max_entries=tenant_max_entries, ttl_seconds=tenant_ttl)  # (to_number, language) -> bytes
+        self._backend_url: Optional[str] = None
+        self.rebuilds = 0
+
+    @classmethod
+    def from_env(cls) -> "TwiMLCache":
+        return cls(
+            tenant_ttl=float(os.getenv("TWIML_TENANT_CACHE_TTL", "300")),
+            tenant_max_entries=int(os.getenv("TWIML_TENANT_CACHE_SIZE", "5000"))
+        )
+
+    def _check_config(self):
+        """Drop everything if the callback URLs baked into the TwiML changed"""
+        backend_url = os.getenv("BACKEND_URL", "")
+        if backend_url != self._backend_url:
+            if self._backend_url is not None:
+                self.rebuilds += 1
+            self._static.clear()
+            self._tenants.clear()
+            self._backend_url = backend_url
+
+    def warm(self):
+        """Build the default responses for every supported language (app startup)"""
+        for language in self.LANGUAGES:
+            self.greeting(language)
+            self.confirmation(language)
+
+    def _static_entry(self, kind: str, language: str, build: Callable[[], str]) -> bytes:
+        self._check_config()
+        twiml = self._static.get((kind, language))
+        if twiml is None:
+            twiml = build().encode("utf-8")
+            if len(self._static) < self.MAX_STATIC_ENTRIES:
+                self._static[(kind, language)] = twiml
+        return twiml
+
+    def greeting(self, language: str = "en") -> bytes:
+        return self._static_entry(
+            "greeting", language,
+            lambda: get_twilio_service().generate_greeting_twiml(language=language)
+        )
+
+    def confirmation(self, language: str = "en") -> bytes:
+        return self._static_entry(
+            "confirmation", language,
+            lambda: get_twilio_service().generate_confirmation_twiml(language=language)
+        )
+
+    async def greeting_for_number(self, to_number: str, language: str, lookup: GreetingLookup) -> bytes:
+        """
+        Greeting for a call to `to_number`, using the owning business's custom
+        text if it has one. Numbers without one are cached too, so repeat
+        calls never hit the database.
+        """
+        if not to_number:
+            return self.greeting(language)
+
+        self._check_config()
+        key = (to_number, language)
+        twiml = self._tenants.get(key)
+        if twiml is not None:
+            return twiml
+
+        try:
+            custom = (await lookup(to_number) or {}).get(language)
+        except Exception as e:
+            print(f"⚠️ Greeting lookup failed for {to_number}, using default: {e}")
+            return self.greeting(language)
+
+        if custom:
+            twiml = get_twilio_service().generate_greeting_twiml(language=language, greeting=custom).encode("utf-8")
+        else:
+            twiml = self.greeting(language)
+        self._tenants.set(key, twiml)
+        return twiml
+
+    def invalidate_tenants(self):
+        """
+        Call after a business changes its greeting. Clears this process only;
+        other processes serve the old greeting until their TTL runs out.
+        """
+        self._tenants.clear()
+
+    def stats(self) -> Dict:
+        return dict(self._tenants.stats(), static_entries=len(self._static), config_rebuilds=self.rebuilds)
@@ -2,21 +2,187 @@
 Voice Service - Handles voice transcription and audio processing
 For MVP, uses Groq Whisper API for ultra-fast speech-to-text
 """
+import io
 import os
+import asyncio
+import hashlib
+import tempfile
 import httpx
-from typing import Optional
-from groq import AsyncGroq
+from typing import Optional, Dict, IO, Tuple
+from urllib.parse import urlsplit
+from groq import AsyncGroq, Groq
+from app.services.transcript_cache import TranscriptCache
+from app.services.rate_limiter import get_groq_governor
+
+
+AUDIO_CONTENT_TYPES = {
+    "audio/mpeg": ".mp3",
+    "audio/mp3": ".mp3",
+    "audio/wav": ".wav",
+    "audio/x-wav": ".wav",
+    "audio/ogg": ".ogg",
+    "audio/mp4": ".m4a",
+    "audio/webm": ".webm",
+}
+
+
+class AudioBuffer:
+    """
+    Holds a downloaded recording in memory, spilling to an anonymous
+    temp file only once it grows past max_memory bytes.
+    All disk I/O for spilled buffers runs off the event loop, and uploads
+    stream from the buffer, so a recording is never held in memory twice.
+    """
+    
+    def __init__(self, max_memory: int, filename: str = "recording.mp3"):
+        self.max_memory = max_memory
+        self.filename = filename
+        self.size = 0
+        self._memory = io.BytesIO()
+        self._file: Optional[IO[bytes]] = None
+        self._sha256 = hashlib.sha256()
+    
+    @property
+    def digest(self) -> str:
+        """sha256 of everything written so far (content address of the recording)"""
+        return self._sha256.hexdigest()
+    
+    @property
+    def spilled(self) -> bool:
+        return self._file is not None
+    
+    async def write(self, chunk: bytes):
+        """Append a downloaded chunk"""
+        self.size += len(chunk)
+        self._sha256.update(chunk)
+        if self._file is None:
+            if self.size <= self.max_memory:
+                self._memory.write(chunk)
+                return
+            # Crossed the ceiling: move what we have so far to disk
+            self._file = await asyncio.to_thread(tempfile.TemporaryFile)
+            memory, self._memory = self._memory, io.BytesIO()
+            with memory.getbuffer() as pending:
+                await asyncio.to_thread(self._file.write, pending)
+            memory.close()
+        await asyncio.to_thread(self._file.write, chunk)
+    
+    async def upload_payload(self) -> Tuple[str, IO[bytes]]:
+        """
+        (filename, file) tuple accepted by the Groq transcription client,
+        rewound to the start. httpx reads it in 64 KiB chunks while sending,
+        so a spilled buffer must be uploaded from a thread (see
+        VoiceService._transcribe_buffer).
+        """
+        if self._file is None:
+            self._memory.seek(0)
+            return (self.filename, self._memory)
+        await asyncio.to_thread(self._file.seek, 0)
+        return (self.filename, self._file)
+    
+    async def close(self):
+        self._memory.close()
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+            self._file = None
 
 
 class VoiceService:
     """Service for voice transcription and audio processing"""
     
+    WHISPER_MODEL = "whisper-large-v3"
+    
     def __init__(self):
         """Initialize the service with Groq client"""
         api_key = os.getenv("GROQ_API_KEY")
         if not api_key:
             print("WARNING: GROQ_API_KEY not set. Please add it to backend/.env")
-        self.client = AsyncGroq(api_key=api_key) if api_key else None
+        # Retries and 429 backoff are handled by the shared governor
+        self.client = AsyncGroq(api_key=api_key, max_retries=0) if api_key else None
+        # Blocking twin for uploads streamed from disk in a thread (created on first use)
+        self._api_key = api_key
+        self._disk_upload_client: Optional[Groq] = None
+        self.governor = get_groq_governor()
+        
+        # Pooled HTTP client for audio downloads, owned by the app lifespan
+        self.http_client: Optional[httpx.AsyncClient] = None
+        self.max_connections_per_host = int(os.getenv("AUDIO_HTTP_MAX_PER_HOST", "10"))
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        
+        # Recordings above this size spill to a temp file instead of RAM
+        self.max_audio_memory = int(os.getenv("AUDIO_MAX_MEMORY_BYTES", str(4 * 1024 * 1024)))
+        
+        # Identical recordings (webhook retries, forwarded notes) are transcribed once
+        self.transcript_cache = TranscriptCache.from_env()
+        self._inflight: Dict[str, asyncio.Future] = {}
+    
+    def _build_http_client(self, **overrides) -> httpx.AsyncClient:
+        """Create the keep-alive, HTTP/2 capable client used for audio downloads"""
+        limits = httpx.Limits(
+            max_connections=int(os.getenv("AUDIO_HTTP_MAX_CONNECTIONS", "50")),
+            max_keepalive_connections=int(os.getenv("AUDIO_HTTP_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("AUDIO_HTTP_KEEPALIVE_EXPIRY", "120"))
+        )
+        options = {
+            "http2": os.getenv("AUDIO_HTTP2", "true").lower() == "true",
+            "limits": limits,
+            "timeout": httpx.Timeout(30.0, connect=10.0),
+            "follow_redirects": True,  # Twilio media URLs redirect to a CDN
+        }
+        options.update(overrides)
+        return httpx.AsyncClient(**options)
+    
+    async def start(self):
+        """Open the shared download client (called on app startup)"""
+        if self.http_client is None:
+            self.http_client = self._build_http_client()
+    
+    async def close(self):
+        """Close pooled connections (called on app shutdown)"""
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+        if self._disk_upload_client is not None:
+            self._disk_upload_client.close()
+            self._disk_upload_client = None
+        self.transcript_cache.close()
+    
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        """Per-host connection cap so one slow media host can't drain the pool"""
+        host = urlsplit(url).netloc
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = asyncio.Semaphore(self.max_connections_per_host)
+            self._host_slots[host] = slot
+        return slot
+    
+    def _audio_filename(self, audio_url: str, content_type: str) -> str:
+        """Pick a filename whose extension tells Whisper the audio format"""
+        path = urlsplit(audio_url).path
+        if self.validate_audio_format(path):
+            return os.path.basename(path)
+        extension = AUDIO_CONTENT_TYPES.get(content_type.split(";")[0].strip().lower(), ".mp3")
+        return f"recording{extension}"
+    
+    async def download_audio(self, audio_url: str) -> AudioBuffer:
+        """Stream a recording over the pooled client into an AudioBuffer"""
+        if self.http_client is None:
+            await self.start()
+        
+        async with self._host_slot(audio_url):
+            async with self.http_client.stream("GET", audio_url) as response:
+                response.raise_for_status()
+                buffer = AudioBuffer(
+                    self.max_audio_memory,
+                    self._audio_filename(audio_url, response.headers.get("content-type", ""))
+                )
+                try:
+                    async for chunk in response.aiter_bytes():
+                        await buffer.write(chunk)
+                except BaseException:
+                    await buffer.close()
+                    raise
+                return buffer
     
     async def transcribe_audio(self, audio_url: str, language: str = "en") -> str:
         """
@@ -33,46 +199,81 @@ class VoiceService:
         if not self.client:
             raise Exception("Groq API key not configured. Please add GROQ_API_KEY to backend/.env")
         
+        # If language is 'hi', Whisper will transcribe Hindi
+        # If None, auto-detect
+        if language not in ["en", "hi"]:
+            language = None
+        
         try:
-            # Download audio file
-            async with httpx.AsyncClient() as http_client:
-                response = await http_client.get(audio_url, timeout=30.0)
-                response.raise_for_status()
-                audio_data = response.content
-            
-            # Save temporarily (Windows compatible path)
-            import tempfile
-            temp_file = tempfile.mktemp(suffix=".mp3")
-            with open(temp_file, "wb") as f:
-                f.write(audio_data)
+            # Stream the download into memory (spills to disk only for very large files)
+            audio = await self.download_audio(audio_url)
             
-            # Transcribe using Groq Whisper (supports multiple languages!)
-            with open(temp_file, "rb") as audio_file:
-                # If language is 'hi', Whisper will transcribe Hindi
-                # If None, auto-detect
-                transcript_params = {
-                    "model": "whisper-large-v3",
-                    "file": audio_file,
-                }
+            try:
+                key = TranscriptCache.make_key(audio.digest, language, self.WHISPER_MODEL)
+                cached = await self.transcript_cache.get(key)
+                if cached is not None:
+                    print(f"♻️ Transcript cache hit ({language or 'auto'}): {cached[:100]}...")
+                    return cached
                 
-                if language and language in ["en", "hi"]:
-                    transcript_params["language"] = language
+                # Share one Whisper call between concurrent copies of the same audio.
+                # None means the caller making it was cancelled: the next one takes over
+                pending = self._inflight.get(key)
+                while pending is not None:
+                    shared = await asyncio.shield(pending)
+                    if shared is not None:
+                        return shared
+                    pending = self._inflight.get(key)
                 
-                transcript = await self.client.audio.transcriptions.create(**transcript_params)
+                pending = asyncio.get_running_loop().create_future()
+                self._inflight[key] = pending
+                try:
+                    text = await self._transcribe_buffer(audio, language)
+                    await self.transcript_cache.set(key, text)
+                    pending.set_result(text)
+                except asyncio.CancelledError:
+                    pending.set_result(None)
+                    raise
+                except Exception as e:
+                    pending.set_exception(e)
+                    pending.exception()  # Mark retrieved when nobody else is waiting
+                    raise
+                finally:
+                    del self._inflight[key]
+            finally:
+                await audio.close()
             
-            # Clean up
-            try:
-                os.remove(temp_file)
-            except:
-                pass
-            
-            print(f"✅ Transcribed ({language or 'auto'}): {transcript.text[:100]}...")
-            return transcript.text
+            print(f"✅ Transcribed ({language or 'auto'}): {text[:100]}...")
+            return text
             
         except Exception as e:
             print(f"Transcription failed: {e}")
             raise Exception(f"Failed to transcribe audio: {str(e)}")
     
+    def _disk_uploads(self) -> Groq:
+        if self._disk_upload_client is None:
+            self._disk_upload_client = Groq(api_key=self._api_key, max_retries=0)
+        return self._disk_upload_client
+    
+    async def _transcribe_buffer(self, audio: AudioBuffer, language: Optional[str]) -> str:
+        """Send a downloaded recording to Groq Whisper (supports multiple languages!)"""
+        transcript_params = {"model": self.WHISPER_MODEL}
+        
+        if language:
+            transcript_params["language"] = language
+        
+        async def request():
+            # Rewinds the buffer, so governor retries resend the whole file
+            transcript_params["file"] = await audio.upload_payload()
+            if audio.spilled:
+                # httpx reads the file synchronously as it sends: keep those disk reads off the loop
+                create = self._disk_uploads().audio.transcriptions.with_raw_response.create
+                return await asyncio.to_thread(create, **transcript_params)
+            return await self.client.audio.transcriptions.with_raw_response.create(**transcript_params)
+        
+        # Urgency is unknown until the words are out: transcriptions queue as "medium"
+        transcript = await self.governor.run(request, urgency="medium")
+        return transcript.text
+    
     async def transcribe_file(self, file_path: str) -> str:
         """
         Transcribe audio from local file using Groq Whisper
@@ -89,7 +290,7 @@ class VoiceService:
         try:
             with open(file_path, "rb") as audio_file:
                 transcript = await self.client.audio.transcriptions.create(
-                    model="whisper-large-v3",  # Groq's Whisper model
+                    model=self.WHISPER_MODEL,  # Groq's Whisper model
                     file=audio_file,
                     language="en"
                 )
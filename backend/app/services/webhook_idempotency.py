@@ -0,0 +1,122 @@
+"""
+Webhook Idempotency - Short-circuits Twilio webhook retries
+Twilio redelivers webhooks it considers slow. The first delivery of a
+MessageSid/RecordingSid claims a row in webhook_receipts; repeats get the
+stored response back (from an in-memory recent-keys cache in O(1), or from
+the table after a restart) instead of creating another task.
+"""
+import os
+import json
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy import select, update, delete
+from sqlalchemy.exc import IntegrityError
+
+from app.database import AsyncSessionLocal, WebhookReceiptDB
+from app.services.cache import TTLCache
+
+# Returned to a retry that arrives while the first delivery is still being processed
+IN_PROGRESS_RESPONSE = {"status": "processing"}
+
+
+class WebhookIdempotency:
+    """Claim / finish / release protocol around webhook handlers"""
+
+    def __init__(self, recent_size: int = 10000, recent_ttl: float = 3600, processing_timeout: float = 300):
+        self.recent = TTLCache(max_entries=recent_size, ttl_seconds=recent_ttl)
+        self.processing_timeout = processing_timeout
+        self.duplicates = 0
+
+    @classmethod
+    def from_env(cls) -> "WebhookIdempotency":
+        return cls(
+            recent_size=int(os.getenv("WEBHOOK_RECENT_KEYS", "10000")),
+            recent_ttl=float(os.getenv("WEBHOOK_RECENT_TTL", "3600")),
+            processing_timeout=float(os.getenv("WEBHOOK_PROCESSING_TIMEOUT", "300"))
+        )
+
+    async def begin(self, key: Optional[str]) -> Optional[Dict]:
+        """
+        Claim `key` for processing. Returns None if the caller should process
+        the webhook, or the response to send back for a duplicate delivery.
+        """
+        if not key:
+            return None
+
+        cached = self.recent.get(key)
+        if cached is not None:
+            self.duplicates += 1
+            return cached
+
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as session:
+            session.add(WebhookReceiptDB(key=key, status="processing", created_at=now))
+            try:
+                await session.commit()
+                return None
+            except IntegrityError:
+                await session.rollback()
+
+            receipt = (await session.execute(
+                select(WebhookReceiptDB).where(WebhookReceiptDB.key == key)
+            )).scalar_one_or_none()
+            if receipt is None:
+                return None  # Released between our insert and select; treat as new
+
+            if receipt.status == "done":
+                response = json.loads(receipt.response) if receipt.response else {}
+                self.recent.set(key, response)
+                self.duplicates += 1
+                return response
+
+            # Still processing: take over only if the first attempt looks abandoned
+            stale_before = now - timedelta(seconds=self.processing_timeout)
+            if receipt.created_at < stale_before:
+                result = await session.execute(
+                    update(WebhookReceiptDB)
+                    .where(WebhookReceiptDB.key == key, WebhookReceiptDB.created_at == receipt.created_at)
+                    .values(created_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+                await session.commit()
+                if result.rowcount == 1:
+                    return None
+
+            self.duplicates += 1
+            return IN_PROGRESS_RESPONSE
+
+    async def finish(self, key: Optional[str], response: Dict, task_id: Optional[str] = None):
+        """Record the response so later deliveries of `key` replay it"""
+        if not key:
+            return
+        self.recent.set(key, response)
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(WebhookReceiptDB)
+                .where(WebhookReceiptDB.key == key)
+                .values(status="done", response=json.dumps(response, default=str), task_id=task_id)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+    async def release(self, key: Optional[str]):
+        """Forget a failed attempt so Twilio's retry is processed normally"""
+        if not key:
+            return
+        self.recent.discard(key)
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                delete(WebhookReceiptDB)
+                .where(WebhookReceiptDB.key == key, WebhookReceiptDB.status == "processing")
+            )
+            await session.commit()
+
+    async def prune(self, older_than_days: float = 7):
+        """Drop receipts older than Twilio's retry horizon"""
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(WebhookReceiptDB).where(WebhookReceiptDB.created_at < cutoff))
+            await session.commit()
+
+    def stats(self) -> Dict:
+        return dict(self.recent.stats(), duplicates=self.duplicates)
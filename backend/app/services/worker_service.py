@@ -2,17 +2,118 @@
 Worker Service - Manages workers/service providers
 Handles worker CRUD, assignment, and availability tracking
 """
+import os
 import uuid
-import json
 from datetime import datetime
-from typing import Optional, List, Dict
-from sqlalchemy import select, func, desc, or_
-from app.database import AsyncSessionLocal, WorkerDB, TaskDB
+from typing import Optional, List, Dict, Sequence
+from sqlalchemy import Float, select, update, delete, case, bindparam
+from app.database import AsyncSessionLocal, WorkerDB, WorkerSkillDB, TaskDB
+from app.services.assignment_engine import plan_assignments
+from app.services.counters import bump, worker_status_deltas, read_counters
+from app.services.pagination import Keyset, Page
+from app.services.priority_scheduler import PriorityScheduler
+from app.services.skill_index import BusinessSkills, SkillIndex
+
+# Alphabetical; served by the (business_id, name, id) index
+WORKER_KEYSET = Keyset("workers", WorkerDB.name, WorkerDB.id, descending=False)
+
+# Candidates tried by auto_assign_task when the database rejects a stale pick
+AUTO_ASSIGN_ATTEMPTS = 3
+
+# Worker ids per IN (...) when reading skills, below SQLite's bound parameter limit
+SKILL_LOOKUP_CHUNK = 500
+
+# Capacity changes are compare-and-set: each UPDATE applies only if the worker's
+# status (and rating) are still what the caller read, and moves current_tasks
+# inside the statement, so concurrent assigns/completes can neither lose an
+# update nor push a worker past max_tasks. RETURNING gives the new values.
+# Built once so every execution reuses the compiled SQL.
+WORKER_LOAD_COLUMNS = (
+    WorkerDB.id, WorkerDB.business_id, WorkerDB.name, WorkerDB.phone, WorkerDB.status,
+    WorkerDB.current_tasks, WorkerDB.max_tasks, WorkerDB.rating
+)
+RESERVE_CAPACITY = (
+    update(WorkerDB)
+    .where(
+        WorkerDB.id == bindparam("w_id"),
+        WorkerDB.status == bindparam("w_status"),
+        WorkerDB.current_tasks + bindparam("n") <= WorkerDB.max_tasks
+    )
+    .values(
+        current_tasks=WorkerDB.current_tasks + bindparam("n"),
+        status=case((WorkerDB.current_tasks + bindparam("n") >= WorkerDB.max_tasks, "busy"), else_=WorkerDB.status),
+        updated_at=bindparam("now")
+    )
+    .returning(*WORKER_LOAD_COLUMNS)
+)
+_RELEASED_TASKS = case(
+    (WorkerDB.current_tasks > bindparam("n"), WorkerDB.current_tasks - bindparam("n")),
+    else_=0
+)
+RELEASE_CAPACITY = (
+    update(WorkerDB)
+    .where(
+        WorkerDB.id == bindparam("w_id"),
+        WorkerDB.status == bindparam("w_status"),
+        WorkerDB.rating.is_not_distinct_from(bindparam("w_rating"))
+    )
+    .values(
+        current_tasks=_RELEASED_TASKS,
+        status=case((_RELEASED_TASKS < WorkerDB.max_tasks, "available"), else_=WorkerDB.status),
+        total_jobs=WorkerDB.total_jobs + bindparam("jobs"),
+        # Running average over completed jobs; a completion without a rating keeps it
+        rating=case(
+            (bindparam("r", type_=Float).is_(None), WorkerDB.rating),
+            (WorkerDB.rating.is_(None), bindparam("r", type_=Float)),
+            else_=(WorkerDB.rating * WorkerDB.total_jobs + bindparam("r", type_=Float)) / (WorkerDB.total_jobs + 1)
+        ),
+        updated_at=bindparam("now")
+    )
+    .returning(*WORKER_LOAD_COLUMNS)
+)
+CLAIM_TASK = (
+    update(TaskDB)
+    .where(
+        TaskDB.id == bindparam("t_id"),
+        TaskDB.assigned_to.is_not_distinct_from(bindparam("previous"))  # Not reassigned meanwhile
+    )
+    .values(
+        assigned_to=bindparam("w_id"),
+        assigned_worker_name=bindparam("w_name"),
+        status="in_progress",
+        updated_at=bindparam("now")
+    )
+    .returning(TaskDB.id)
+)
+CLAIM_TASKS = (
+    update(TaskDB)
+    .where(
+        TaskDB.id.in_(bindparam("task_ids", expanding=True)),
+        TaskDB.status == "new",
+        TaskDB.assigned_to.is_(None)
+    )
+    .values(
+        assigned_to=bindparam("w_id"),
+        assigned_worker_name=bindparam("w_name"),
+        status="in_progress",
+        updated_at=bindparam("now")
+    )
+    .returning(TaskDB.id)
+)
+
+# Re-reads of a worker whose status/rating changed under a capacity update
+CAPACITY_ATTEMPTS = 5
 
 
 class WorkerService:
     """Service for managing workers and task assignments"""
     
+    def __init__(self):
+        # intent -> best eligible worker, per business, kept in sync by every write below
+        self.skill_index = SkillIndex.from_env()
+        # Concurrent auto-assigns pick workers one slot at a time, most urgent task first
+        self.assign_scheduler = PriorityScheduler.from_env(int(os.getenv("AUTO_ASSIGN_CONCURRENCY", "4")))
+    
     async def create_worker(
         self,
         name: str,
@@ -36,12 +137,12 @@ class WorkerService:
             if existing:
                 raise ValueError(f"Worker with phone {phone} already exists")
             
+            skills = sorted(set(skills))
             worker = WorkerDB(
                 id=str(uuid.uuid4()),
                 business_id=business_id,
                 name=name,
                 phone=phone,
-                skills=json.dumps(skills),
                 status="available",
                 current_tasks=0,
                 max_tasks=max_tasks,
@@ -52,36 +153,42 @@ class WorkerService:
             )
             
             session.add(worker)
+            session.add_all(self._skill_rows(worker, skills))
+            await bump(session, business_id, workers_total=1, **worker_status_deltas(None, "available"))
             await session.commit()
             await session.refresh(worker)
+            self.skill_index.put(business_id, worker, skills)
             
-            return self._worker_to_dict(worker)
+            return self._worker_to_dict(worker, skills)
     
     async def get_workers(
         self,
         business_id: str,
         status: Optional[str] = None,
-        skill: Optional[str] = None
-    ) -> List[Dict]:
-        """Get all workers with optional filters"""
+        skill: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Page:
+        """Get workers with optional filters; every worker unless limit/cursor is given"""
         
         async with AsyncSessionLocal() as session:
-            query = select(WorkerDB).where(WorkerDB.business_id == business_id).order_by(WorkerDB.name)
+            query = select(WorkerDB).where(WorkerDB.business_id == business_id)
             
             if status:
                 query = query.where(WorkerDB.status == status)
             
-            result = await session.execute(query)
-            workers = result.scalars().all()
-            
-            # Filter by skill if provided
+            # Only the workers with the skill are read, via the (business_id, skill) index
             if skill:
-                workers = [
-                    w for w in workers
-                    if skill in json.loads(w.skills)
-                ]
+                query = query.join(WorkerSkillDB, WorkerSkillDB.worker_id == WorkerDB.id).where(
+                    WorkerSkillDB.business_id == business_id,
+                    WorkerSkillDB.skill == skill
+                )
+            
+            page = await WORKER_KEYSET.fetch(session, query, limit, cursor)
+            skills = await self._skills_of(session, [w.id for w in page.items])
             
-            return [self._worker_to_dict(w) for w in workers]
+            page.items = [self._worker_to_dict(w, skills[w.id]) for w in page.items]
+            return page
     
     async def get_worker(self, worker_id: str) -> Optional[Dict]:
         """Get specific worker by ID"""
@@ -95,7 +202,8 @@ class WorkerService:
             if not worker:
                 return None
             
-            return self._worker_to_dict(worker)
+            skills = await self._skills_of(session, [worker.id])
+            return self._worker_to_dict(worker, skills[worker.id])
     
     async def update_worker(
         self,
@@ -122,8 +230,11 @@ class WorkerService:
             if phone:
                 worker.phone = phone
             if skills:
-                worker.skills = json.dumps(skills)
+                skills = sorted(set(skills))
+                await session.execute(delete(WorkerSkillDB).where(WorkerSkillDB.worker_id == worker_id))
+                session.add_all(self._skill_rows(worker, skills))
             if status:
+                await bump(session, worker.business_id, **worker_status_deltas(worker.status, status))
                 worker.status = status
             if max_tasks is not None:
                 worker.max_tasks = max_tasks
@@ -132,8 +243,11 @@ class WorkerService:
             
             await session.commit()
             await session.refresh(worker)
+            self.skill_index.put(worker.business_id, worker, skills or None)
             
-            return self._worker_to_dict(worker)
+            if not skills:
+                skills = (await self._skills_of(session, [worker.id]))[worker.id]
+            return self._worker_to_dict(worker, skills)
     
     async def delete_worker(self, worker_id: str) -> bool:
         """Delete a worker"""
@@ -147,8 +261,18 @@ class WorkerService:
             if not worker:
                 return False
             
+            await bump(
+                session, worker.business_id,
+                workers_total=-1,
+                total_jobs=-(worker.total_jobs or 0),
+                rating_sum=-(worker.rating or 0.0),
+                rating_count=-1 if worker.rating is not None else 0,
+                **worker_status_deltas(worker.status, None)
+            )
+            await session.execute(delete(WorkerSkillDB).where(WorkerSkillDB.worker_id == worker_id))
             await session.delete(worker)
             await session.commit()
+            self.skill_index.remove(worker_id)
             
             return True
     
@@ -157,14 +281,12 @@ class WorkerService:
         task_id: str,
         worker_id: str
     ) -> Optional[Dict]:
-        """Assign a task to a worker"""
+        """Assign a task to a worker, taking one of the worker's slots atomically"""
+        now = datetime.utcnow()
         
         async with AsyncSessionLocal() as session:
             # Get worker
-            worker_result = await session.execute(
-                select(WorkerDB).where(WorkerDB.id == worker_id)
-            )
-            worker = worker_result.scalar_one_or_none()
+            worker = await self._read_worker(session, worker_id)
             
             if not worker:
                 raise ValueError("Worker not found")
@@ -178,41 +300,59 @@ class WorkerService:
             if not task:
                 raise ValueError("Task not found")
             
-            # Check if worker has capacity
-            if worker.current_tasks >= worker.max_tasks:
+            if task.assigned_to == worker_id:
+                # Already this worker's; taking a second slot would leak capacity
+                return {
+                    "task_id": task.id,
+                    "worker_id": worker.id,
+                    "worker_name": worker.name,
+                    "status": task.status
+                }
+            
+            # Take a slot only if the worker still has one
+            seen, updated = await self._change_load(
+                session, worker, RESERVE_CAPACITY, {"n": 1, "now": now},
+                possible=lambda w: w.current_tasks < w.max_tasks
+            )
+            if seen is None:
+                raise ValueError("Worker not found")
+            if updated is None:
                 raise ValueError(f"Worker {worker.name} is at maximum capacity")
             
-            # Assign task
-            task.assigned_to = worker_id
-            task.assigned_worker_name = worker.name
-            task.status = "in_progress"
-            task.updated_at = datetime.utcnow()
-            
-            # Update worker
-            worker.current_tasks += 1
-            if worker.current_tasks >= worker.max_tasks:
-                worker.status = "busy"
-            worker.updated_at = datetime.utcnow()
+            # Assign task, unless another request assigned it since it was read
+            conn = await session.connection()
+            claimed = await conn.execute(CLAIM_TASK, {
+                "t_id": task_id, "previous": task.assigned_to,
+                "w_id": worker_id, "w_name": worker.name, "now": now
+            })
+            if claimed.first() is None:
+                await session.rollback()
+                raise ValueError("Task was assigned by another request, try again")
+            await bump(session, updated.business_id, **worker_status_deltas(seen.status, updated.status))
+            
+            # A reassigned task frees its slot with the previous worker
+            released = None
+            if task.assigned_to:
+                previous = await self._read_worker(session, task.assigned_to)
+                if previous:
+                    before, released = await self._change_load(
+                        session, previous, RELEASE_CAPACITY, {"n": 1, "jobs": 0, "r": None, "now": now}
+                    )
+                if released is not None:
+                    await bump(session, released.business_id, **worker_status_deltas(before.status, released.status))
             
             await session.commit()
-            await session.refresh(task)
+            self.skill_index.put(updated.business_id, updated)
+            if released is not None:
+                self.skill_index.put(released.business_id, released)
             
-            # Send notification to worker
-            from app.services.twilio_service import TwilioService
-            twilio = TwilioService()
+            # Notify the worker through the outbound dispatcher
+            from app.services.notification_dispatcher import get_notification_dispatcher
             
-            message = f"""🔔 NEW TASK ASSIGNED
-
-Issue: {task.issue}
-Location: {task.location or 'N/A'}
-Urgency: {task.urgency.upper()}
-Customer: {task.customer_phone}
-
-Please confirm or call customer ASAP.
-
-Task ID: {task.id[:8]}"""
-            
-            await twilio.send_sms_notification(worker.phone, message)
+            await get_notification_dispatcher().notify(
+                worker.phone, self._assignment_message(task), kind="assignment", urgency=task.urgency,
+                business_id=worker.business_id
+            )
             
             print(f"✅ Task {task_id[:8]} assigned to {worker.name}")
             
@@ -220,7 +360,7 @@ Task ID: {task.id[:8]}"""
                 "task_id": task.id,
                 "worker_id": worker.id,
                 "worker_name": worker.name,
-                "status": task.status
+                "status": "in_progress"
             }
     
     async def auto_assign_task(
@@ -239,31 +379,147 @@ Task ID: {task.id[:8]}"""
             if not task:
                 return None
             
-            # Find available workers with matching skills
-            workers_result = await session.execute(
-                select(WorkerDB).where(
-                    WorkerDB.status.in_(["available", "busy"])
-                ).order_by(
-                    WorkerDB.current_tasks,  # Prefer workers with fewer tasks
-                    WorkerDB.rating.desc()    # Then by rating
-                )
-            )
-            workers = workers_result.scalars().all()
-            
-            # Filter by skill match and capacity
-            best_worker = None
-            for worker in workers:
-                skills = json.loads(worker.skills)
-                if task.intent in skills and worker.current_tasks < worker.max_tasks:
-                    best_worker = worker
+            # Load the business's roster into the skill index on first use (or after its TTL)
+            if not self.skill_index.is_loaded(task.business_id):
+                self.skill_index.load(task.business_id, *await self._load_roster(session, task.business_id))
+        
+        # Fewest current tasks, then highest rating, among workers with the skill.
+        # The index may lag changes made by other processes, so a pick the
+        # database rejects is refreshed and the next candidate tried. When
+        # workers are scarce, the most urgent waiting task gets the next pick.
+        async with self.assign_scheduler.slot(task.urgency):
+            rejected = set()
+            for _ in range(AUTO_ASSIGN_ATTEMPTS):
+                worker_id = self.skill_index.best(task.business_id, task.intent, frozenset(rejected))
+                if worker_id is None:
                     break
+                
+                try:
+                    return await self.assign_task_to_worker(task_id, worker_id)
+                except ValueError as e:
+                    print(f"⚠️ Skill index pick for task {task_id[:8]} was stale ({e}), trying the next worker")
+                    rejected.add(worker_id)
+                    await self._refresh_indexed_worker(task.business_id, worker_id)
+        
+        print(f"⚠️ No available worker found for task {task_id[:8]}")
+        return None
+    
+    async def assign_backlog(
+        self,
+        business_id: str,
+        task_ids: Optional[List[str]] = None,
+        limit: Optional[int] = None
+    ) -> Dict:
+        """
+        Auto-assign a business's unassigned "new" tasks (or just `task_ids`)
+        in one transaction: plan the whole batch in priority order, then
+        reserve each chosen worker's capacity and claim its tasks with
+        conditional UPDATEs. Notifications are queued after the commit.
+        """
+        now = datetime.utcnow()
+        
+        async with AsyncSessionLocal() as session:
+            query = select(
+                TaskDB.id, TaskDB.intent, TaskDB.urgency, TaskDB.created_at, TaskDB.priority_at,
+                TaskDB.issue, TaskDB.location, TaskDB.customer_phone
+            ).where(
+                TaskDB.business_id == business_id,
+                TaskDB.status == "new",
+                TaskDB.assigned_to.is_(None)
+            )
+            tasks = {task.id: task for task in (await session.execute(query)).all()}
+            if task_ids is not None:
+                # Filtered here rather than with IN (...), which has a bound parameter limit
+                wanted = set(task_ids)
+                tasks = {task_id: task for task_id, task in tasks.items() if task_id in wanted}
+            
+            workers, skills = await self._load_roster(session, business_id)
+            plan = plan_assignments(list(tasks.values()), BusinessSkills.from_rows(workers, skills), limit)
+            workers = {worker.id: worker for worker in workers}
+            conn = await session.connection()
+            
+            assigned: List[Dict] = []
+            conflicts: List[str] = []
+            reserved: List = []
+            status_deltas: Dict[str, int] = {}
+            for worker_id, planned in plan.by_worker.items():
+                worker = workers[worker_id]
+                count = len(planned)
+                
+                # Reserve capacity only if the worker is still as planned (another
+                # request may have assigned to it since the roster was read)
+                result = await conn.execute(
+                    RESERVE_CAPACITY, {"w_id": worker_id, "w_status": worker.status, "n": count, "now": now}
+                )
+                updated = result.first()
+                if updated is None:
+                    conflicts.extend(planned)
+                    continue
+                
+                # Claim the tasks that are still unassigned
+                result = await conn.execute(
+                    CLAIM_TASKS, {"task_ids": planned, "w_id": worker_id, "w_name": worker.name, "now": now}
+                )
+                claimed = list(result.scalars().all())
+                if len(claimed) < count:
+                    conflicts.extend(set(planned) - set(claimed))
+                    result = await conn.execute(RELEASE_CAPACITY, {
+                        "w_id": worker_id, "w_status": updated.status, "w_rating": updated.rating,
+                        "n": count - len(claimed), "jobs": 0, "r": None, "now": now
+                    })
+                    updated = result.first()
+                
+                reserved.append(updated)
+                for key, delta in worker_status_deltas(worker.status, updated.status).items():
+                    status_deltas[key] = status_deltas.get(key, 0) + delta
+                assigned.extend(
+                    {"task_id": task_id, "worker_id": worker_id, "worker_name": worker.name}
+                    for task_id in claimed
+                )
             
-            if not best_worker:
-                print(f"⚠️ No available worker found for task {task_id[:8]}")
-                return None
-            
-            # Assign to best worker
-            return await self.assign_task_to_worker(task_id, best_worker.id)
+            await bump(session, business_id, **status_deltas)
+            await session.commit()
+        
+        for updated in reserved:
+            self.skill_index.put(business_id, updated)
+        
+        # A worker given several tasks gets them as one digest
+        from app.services.notification_dispatcher import get_notification_dispatcher
+        
+        dispatcher = get_notification_dispatcher()
+        for assignment in assigned:
+            task = tasks[assignment["task_id"]]
+            await dispatcher.notify(
+                workers[assignment["worker_id"]].phone,
+                self._assignment_message(task),
+                kind="assignment",
+                summary=f"{(task.urgency or '').upper()} {task.issue[:40]} ({task.id[:8]})",
+                coalesce=True,
+                urgency=task.urgency,
+                business_id=business_id
+            )
+        
+        print(f"✅ Assigned {len(assigned)} of {len(tasks)} backlog tasks for business {business_id[:8]}")
+        
+        return {
+            "assigned": assigned,
+            "unassigned": plan.unassigned,
+            "conflicts": conflicts
+        }
+    
+    async def _refresh_indexed_worker(self, business_id: str, worker_id: str):
+        """Re-read one worker into the skill index (or drop it if deleted)"""
+        
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(WorkerDB).where(WorkerDB.id == worker_id)
+            )
+            worker = result.scalar_one_or_none()
+        
+        if worker is None:
+            self.skill_index.remove(worker_id)
+        else:
+            self.skill_index.put(business_id, worker)
     
     async def complete_task(
         self,
@@ -275,100 +531,154 @@ Task ID: {task.id[:8]}"""
         async with AsyncSessionLocal() as session:
             # Get task
             task_result = await session.execute(
-                select(TaskDB).where(TaskDB.id == task_id)
+                select(TaskDB.assigned_to).where(TaskDB.id == task_id)
             )
-            task = task_result.scalar_one_or_none()
+            assigned_to = task_result.scalar_one_or_none()
             
-            if not task or not task.assigned_to:
+            if not assigned_to:
                 return
             
             # Get worker
-            worker_result = await session.execute(
-                select(WorkerDB).where(WorkerDB.id == task.assigned_to)
-            )
-            worker = worker_result.scalar_one_or_none()
+            worker = await self._read_worker(session, assigned_to)
             
             if not worker:
                 return
             
-            # Update worker stats
-            worker.current_tasks = max(0, worker.current_tasks - 1)
-            worker.total_jobs += 1
-            
-            if rating and worker.rating:
-                # Update average rating
-                worker.rating = (worker.rating * (worker.total_jobs - 1) + rating) / worker.total_jobs
-            elif rating:
-                worker.rating = rating
-            
-            if worker.current_tasks < worker.max_tasks:
-                worker.status = "available"
-            
-            worker.updated_at = datetime.utcnow()
+            # Free the slot, count the job and fold the rating into the average in one UPDATE
+            seen, updated = await self._change_load(
+                session, worker, RELEASE_CAPACITY,
+                {"n": 1, "jobs": 1, "r": rating, "now": datetime.utcnow()}
+            )
+            if updated is None:
+                print(f"⚠️ Worker {worker.name} kept changing while completing task {task_id[:8]}, not updated")
+                return
             
+            await bump(
+                session, updated.business_id,
+                total_jobs=1,
+                rating_sum=(updated.rating or 0.0) - (seen.rating or 0.0),
+                rating_count=int(seen.rating is None and updated.rating is not None),
+                **worker_status_deltas(seen.status, updated.status)
+            )
             await session.commit()
+            self.skill_index.put(updated.business_id, updated)
             
-            print(f"✅ Task completed by {worker.name}, stats updated")
+            print(f"✅ Task completed by {updated.name}, stats updated")
     
     async def get_worker_stats(self, business_id: str) -> Dict:
         """Get aggregated worker statistics for a specific business"""
         
         async with AsyncSessionLocal() as session:
-            # Total workers
-            total_result = await session.execute(
-                select(func.count(WorkerDB.id)).where(WorkerDB.business_id == business_id)
-            )
-            total = total_result.scalar() or 0
-            
-            # Available workers
-            available_result = await session.execute(
-                select(func.count(WorkerDB.id)).where(
-                    WorkerDB.business_id == business_id,
-                    WorkerDB.status == "available"
-                )
-            )
-            available = available_result.scalar() or 0
-            
-            # Busy workers
-            busy_result = await session.execute(
-                select(func.count(WorkerDB.id)).where(
-                    WorkerDB.business_id == business_id,
-                    WorkerDB.status == "busy"
-                )
-            )
-            busy = busy_result.scalar() or 0
-            
-            # Total jobs done
-            jobs_result = await session.execute(
-                select(func.sum(WorkerDB.total_jobs)).where(WorkerDB.business_id == business_id)
+            counters = await read_counters(session, business_id)
+        
+        total = counters["workers_total"]
+        available = counters["workers_available"]
+        busy = counters["workers_busy"]
+        avg_rating = counters["rating_sum"] / counters["rating_count"] if counters["rating_count"] else 0
+        
+        return {
+            "total_workers": total,
+            "available": available,
+            "busy": busy,
+            "offline": total - available - busy,
+            "total_jobsdone": counters["total_jobs"],
+            "average_rating": round(avg_rating, 2) if avg_rating else None
+        }
+    
+    @staticmethod
+    async def _read_worker(session, worker_id: str):
+        """The worker's load and contact fields (a Row shaped like the capacity RETURNING), or None"""
+        result = await session.execute(select(*WORKER_LOAD_COLUMNS).where(WorkerDB.id == worker_id))
+        return result.first()
+    
+    async def _change_load(self, session, worker, statement, params: Dict, possible=lambda worker: True):
+        """
+        Run a RESERVE_/RELEASE_CAPACITY statement for `worker` as last read.
+        If another request changed the worker first, re-read it and retry
+        while possible(worker) holds. Returns (worker as read, worker after),
+        with after=None if nothing was updated and (None, None) if the worker
+        was deleted.
+        """
+        conn = await session.connection()
+        for _ in range(CAPACITY_ATTEMPTS):
+            if not possible(worker):
+                break
+            result = await conn.execute(statement, {
+                "w_id": worker.id, "w_status": worker.status, "w_rating": worker.rating, **params
+            })
+            updated = result.first()
+            if updated is not None:
+                return worker, updated
+            
+            worker = await self._read_worker(session, worker.id)
+            if worker is None:
+                return None, None
+        return worker, None
+    
+    @staticmethod
+    async def _load_roster(session, business_id: str):
+        """A business's workers (ranking fields and contact) and their skills by worker id"""
+        workers_result = await session.execute(
+            select(
+                WorkerDB.id, WorkerDB.name, WorkerDB.phone, WorkerDB.status,
+                WorkerDB.current_tasks, WorkerDB.max_tasks, WorkerDB.rating
+            ).where(WorkerDB.business_id == business_id)
+        )
+        skills_result = await session.execute(
+            select(WorkerSkillDB.worker_id, WorkerSkillDB.skill).where(
+                WorkerSkillDB.business_id == business_id
             )
-            total_jobs = jobs_result.scalar() or 0
-            
-            # Average rating
-            rating_result = await session.execute(
-                select(func.avg(WorkerDB.rating)).where(
-                    WorkerDB.business_id == business_id,
-                    WorkerDB.rating.isnot(None)
+        )
+        skills: Dict[str, List[str]] = {}
+        for worker_id, skill in skills_result:
+            skills.setdefault(worker_id, []).append(skill)
+        return workers_result.all(), skills
+    
+    @staticmethod
+    def _assignment_message(task) -> str:
+        return f"""🔔 NEW TASK ASSIGNED
+
+Issue: {task.issue}
+Location: {task.location or 'N/A'}
+Urgency: {task.urgency.upper()}
+Customer: {task.customer_phone}
+
+Please confirm or call customer ASAP.
+
+Task ID: {task.id[:8]}"""
+    
+    @staticmethod
+    def _skill_rows(worker: WorkerDB, skills: Sequence[str]) -> List[WorkerSkillDB]:
+        return [
+            WorkerSkillDB(worker_id=worker.id, skill=skill, business_id=worker.business_id)
+            for skill in skills
+        ]
+    
+    @staticmethod
+    async def _skills_of(session, worker_ids: Sequence[str]) -> Dict[str, List[str]]:
+        """Sorted skills for each worker id, read through the worker_skills primary key"""
+        skills: Dict[str, List[str]] = {worker_id: [] for worker_id in worker_ids}
+        
+        for start in range(0, len(worker_ids), SKILL_LOOKUP_CHUNK):
+            result = await session.execute(
+                select(WorkerSkillDB.worker_id, WorkerSkillDB.skill).where(
+                    WorkerSkillDB.worker_id.in_(worker_ids[start:start + SKILL_LOOKUP_CHUNK])
                 )
             )
-            avg_rating = rating_result.scalar() or 0
-            
-            return {
-                "total_workers": total,
-                "available": available,
-                "busy": busy,
-                "offline": total - available - busy,
-                "total_jobsdone": total_jobs,
-                "average_rating": round(avg_rating, 2) if avg_rating else None
-            }
+            for worker_id, skill in result:
+                skills[worker_id].append(skill)
+        
+        for worker_skills in skills.values():
+            worker_skills.sort()
+        return skills
     
-    def _worker_to_dict(self, worker: WorkerDB) -> Dict:
+    def _worker_to_dict(self, worker: WorkerDB, skills: List[str]) -> Dict:
         """Convert worker DB model to dictionary"""
         return {
             "id": worker.id,
             "name": worker.name,
             "phone": worker.phone,
-            "skills": json.loads(worker.skills),
+            "skills": skills,
             "status": worker.status,
             "current_tasks": worker.current_tasks,
             "max_tasks": worker.max_tasks,
@@ -0,0 +1 @@
+# Local benchmarks (run with: python -m benchmarks.<name> from backend/)
@@ -0,0 +1,95 @@
+"""
+Audio download benchmark - pooled client vs. a fresh client per recording
+
+Serves a fake recording from a local TLS stub server and reports p50/p99
+download latency for VoiceService.download_audio (pooled, keep-alive) and
+for the old one-AsyncClient-per-download path.
+
+    cd backend
+    python -m benchmarks.bench_audio_download --requests 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from app.services.voice_service import VoiceService
+from benchmarks.stub_server import StubServer, percentile
+
+
+async def run_pooled(service: VoiceService, url: str, requests: int, concurrency: int) -> list:
+    latencies = []
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with gate:
+            start = time.perf_counter()
+            audio = await service.download_audio(url)
+            await audio.close()
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies
+
+
+async def run_unpooled(url: str, requests: int, concurrency: int, verify) -> list:
+    latencies = []
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with gate:
+            start = time.perf_counter()
+            async with httpx.AsyncClient(verify=verify) as http_client:
+                response = await http_client.get(url, timeout=30.0)
+                response.raise_for_status()
+                response.content
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies
+
+
+def report(label: str, latencies: list, connections: int):
+    print(
+        f"{label:<10} n={len(latencies):<5} "
+        f"p50={percentile(latencies, 50) * 1000:7.2f} ms  "
+        f"p99={percentile(latencies, 99) * 1000:7.2f} ms  "
+        f"connections={connections}"
+    )
+
+
+async def main(args):
+    audio = b"\xff\xfb" * (args.size_kb * 512)
+
+    async def handler(method, path, headers, body):
+        return 200, {"Content-Type": "audio/mpeg"}, audio
+
+    server = StubServer(handler, handshake_delay=args.handshake_ms / 1000, tls=not args.no_tls)
+    base_url = await server.start()
+    url = f"{base_url}/Recordings/RE123.mp3"
+    verify = server.client_ssl_context if server.tls else True
+
+    print(f"Stub: {url} ({args.size_kb} KB, simulated handshake {args.handshake_ms} ms)")
+
+    service = VoiceService()
+    service.http_client = service._build_http_client(verify=verify)
+    try:
+        server.connections = 0
+        report("pooled", await run_pooled(service, url, args.requests, args.concurrency), server.connections)
+
+        server.connections = 0
+        report("unpooled", await run_unpooled(url, args.requests, args.concurrency, verify), server.connections)
+    finally:
+        await service.close()
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--size-kb", type=int, default=256)
+    parser.add_argument("--handshake-ms", type=float, default=40.0, help="Simulated TCP+TLS round trips per new connection")
+    parser.add_argument("--no-tls", action="store_true")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,146 @@
+"""
+Batch assignment benchmark: draining a backlog of new tasks
+
+Seeds a synthetic backlog (default 10,000 "new" tasks across 50 intents and
+all urgencies) and enough workers to take them, then measures assignments/sec:
+
+  one by one  - WorkerService.auto_assign_task per task, as the dashboard's
+                /api/tasks/{id}/assign does (first --single-tasks tasks only)
+  batch       - WorkerService.assign_backlog for the whole backlog: one plan,
+                one transaction, notifications queued as digests
+
+The backlog and worker loads are reset between the two runs. Notification
+sends are simulated (no Twilio credentials) and their output is hidden.
+
+    cd backend
+    python -m benchmarks.bench_batch_assign --tasks 10000 --workers 2500
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+BUSINESS_ID = "bench-business"
+URGENCIES = ("critical", "high", "medium", "low")
+
+
+async def seed(args):
+    from sqlalchemy import insert
+    from app.database import engine, init_db, TaskDB, WorkerDB, WorkerSkillDB
+
+    rng = random.Random(args.seed)
+    intents = [f"intent-{n}" for n in range(args.intents)]
+    start = datetime(2025, 1, 1)
+
+    await init_db()
+    tasks = [{
+        "id": str(uuid.uuid4()),
+        "business_id": BUSINESS_ID,
+        "intent": rng.choice(intents),
+        "issue": "Synthetic backlog task",
+        "urgency": rng.choice(URGENCIES),
+        "confidence": 0.9,
+        "status": "new",
+        "customer_phone": "+15550000000",
+        "transcript": "Synthetic backlog task",
+        "created_at": start + timedelta(seconds=n),
+        "updated_at": start,
+    } for n in range(args.tasks)]
+    workers, skills = [], []
+    for n in range(args.workers):
+        worker_id = str(uuid.uuid4())
+        workers.append({
+            "id": worker_id,
+            "business_id": BUSINESS_ID,
+            "name": f"Worker {n}",
+            "phone": f"+1555{n:07d}",
+            "status": "available",
+            "current_tasks": 0,
+            "max_tasks": args.max_tasks,
+            "rating": round(rng.uniform(3, 5), 1),
+            "total_jobs": 0,
+            "created_at": start,
+            "updated_at": start,
+        })
+        skills.extend(
+            {"worker_id": worker_id, "skill": skill, "business_id": BUSINESS_ID}
+            for skill in rng.sample(intents, rng.randint(1, 5))
+        )
+
+    async with engine.begin() as conn:
+        await conn.execute(insert(TaskDB), tasks)
+        await conn.execute(insert(WorkerDB), workers)
+        await conn.execute(insert(WorkerSkillDB), skills)
+    return [task["id"] for task in tasks]
+
+
+async def reset():
+    from sqlalchemy import update
+    from app.database import engine, TaskDB, WorkerDB
+    from app.services.counters import reconcile
+
+    async with engine.begin() as conn:
+        await conn.execute(
+            update(TaskDB).where(TaskDB.business_id == BUSINESS_ID)
+            .values(status="new", assigned_to=None, assigned_worker_name=None)
+        )
+        await conn.execute(
+            update(WorkerDB).where(WorkerDB.business_id == BUSINESS_ID)
+            .values(status="available", current_tasks=0)
+        )
+        await reconcile(conn, BUSINESS_ID)
+
+
+async def main(args):
+    os.environ["DATABASE_URL"] = (
+        f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench-assign-'), 'assign.db')}"
+    )
+    from app.database import engine
+    from app.services.notification_dispatcher import close_notification_dispatcher
+    from app.services.worker_service import WorkerService
+
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):  # Assignment and simulated SMS logging
+        task_ids = await seed(args)
+        await reset()
+
+        workers = WorkerService()
+        single = task_ids[:args.single_tasks]
+        started = time.perf_counter()
+        assigned = 0
+        for task_id in single:
+            assigned += await workers.auto_assign_task(task_id) is not None
+        results["one by one"] = (assigned, time.perf_counter() - started)
+
+        await reset()
+        workers = WorkerService()
+        started = time.perf_counter()
+        summary = await workers.assign_backlog(BUSINESS_ID)
+        results["batch"] = (len(summary["assigned"]), time.perf_counter() - started)
+        unassigned = len(summary["unassigned"])
+
+        await close_notification_dispatcher()
+    await engine.dispose()
+
+    print(f"{args.tasks:,} backlog tasks, {args.workers:,} workers x {args.max_tasks} slots, {args.intents} intents")
+    print(f"{'mode':<12}  {'assigned':>8}  {'seconds':>8}  {'assignments/s':>13}")
+    for label, (count, elapsed) in results.items():
+        print(f"{label:<12}  {count:>8,}  {elapsed:>8.2f}  {count / elapsed:>13,.0f}")
+    print(f"batch left {unassigned:,} tasks without a matching worker with capacity")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=2500)
+    parser.add_argument("--max-tasks", type=int, default=5, help="Capacity per worker")
+    parser.add_argument("--intents", type=int, default=50)
+    parser.add_argument("--single-tasks", type=int, default=500, help="Tasks assigned one by one for comparison")
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
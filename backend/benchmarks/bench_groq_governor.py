@@ -0,0 +1,136 @@
+"""
+Groq rate governor benchmark against a local rate-limited fake LLM server
+
+The fake server allows --limit requests per --window seconds and answers
+anything beyond that with 429 + retry-after, like Groq's per-minute limits.
+A burst of extractions is sent twice: straight at the API with the SDK's own
+retry loop, and through GroqGovernor. The report shows goodput (successful
+extractions/sec), how many 429s the server had to send and p50/p99 latency.
+
+    cd backend
+    python -m benchmarks.bench_groq_governor --requests 300 --limit 40 --window 1
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from groq import AsyncGroq
+
+from app.services.rate_limiter import GroqGovernor
+from benchmarks.stub_server import StubServer, percentile
+
+MESSAGES = [
+    {"role": "system", "content": "Extract intent"},
+    {"role": "user", "content": "Customer transcript: the pipe under the sink is leaking"}
+]
+
+
+def rate_limited_handler(limit: int, window: float, latency: float, counters: dict):
+    state = {"window_start": time.monotonic(), "used": 0}
+
+    async def handler(method, path, headers, body):
+        now = time.monotonic()
+        if now - state["window_start"] >= window:
+            state["window_start"], state["used"] = now, 0
+        reset = max(0.001, window - (now - state["window_start"]))
+
+        if state["used"] >= limit:
+            counters["429"] += 1
+            error = {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}
+            return 429, {"Content-Type": "application/json", "retry-after": f"{reset:.3f}"}, json.dumps(error).encode()
+
+        state["used"] += 1
+        counters["200"] += 1
+        await asyncio.sleep(latency)
+        response = {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "bench",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "{\"intent\": \"Plumbing\"}"},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+        }
+        response_headers = {
+            "Content-Type": "application/json",
+            "x-ratelimit-remaining-requests": str(limit - state["used"]),
+            "x-ratelimit-reset-requests": f"{reset:.3f}s"
+        }
+        return 200, response_headers, json.dumps(response).encode()
+
+    return handler
+
+
+async def run(label: str, call, args, counters: dict):
+    counters["200"] = counters["429"] = 0
+    latencies, failures = [], 0
+
+    async def one():
+        nonlocal failures
+        start = time.perf_counter()
+        try:
+            await call()
+        except Exception:
+            failures += 1
+            return
+        latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"{label:<12}  {len(latencies) / elapsed:>8.1f}  {failures:>6}  {counters['429']:>6}  "
+        f"{percentile(latencies, 50) * 1000:>8.0f}  {percentile(latencies, 99) * 1000:>8.0f}"
+    )
+
+
+async def main(args):
+    counters = {"200": 0, "429": 0}
+    server = StubServer(rate_limited_handler(args.limit, args.window, args.latency_ms / 1000, counters))
+    base_url = await server.start()
+    print(f"Fake LLM: {args.limit} requests per {args.window}s; {args.requests} concurrent extractions")
+    print(f"{'mode':<12}  {'goodput/s':>8}  {'failed':>6}  {'429s':>6}  {'p50 ms':>8}  {'p99 ms':>8}")
+
+    try:
+        # What the services did before: every caller hammers the API, SDK retries on 429
+        sdk_client = AsyncGroq(api_key="bench", base_url=base_url, max_retries=args.sdk_retries, timeout=120)
+        await run(
+            "ungoverned",
+            lambda: sdk_client.chat.completions.create(messages=MESSAGES, model="bench"),
+            args, counters
+        )
+        await sdk_client.close()
+        await asyncio.sleep(args.window)  # Let the server window reset
+
+        client = AsyncGroq(api_key="bench", base_url=base_url, max_retries=0, timeout=120)
+        governor = GroqGovernor(
+            requests_per_second=args.limit / args.window * 1.5,  # Deliberately over-provisioned
+            burst=args.limit,
+            max_concurrency=args.concurrency,
+            queue_timeout=120
+        )
+        await run(
+            "governed",
+            lambda: governor.run(lambda: client.chat.completions.with_raw_response.create(messages=MESSAGES, model="bench")),
+            args, counters
+        )
+        await client.close()
+        print(f"governor: {governor.stats()}")
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--limit", type=int, default=40, help="Requests the fake LLM accepts per window")
+    parser.add_argument("--window", type=float, default=1.0, help="Rate-limit window in seconds")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--concurrency", type=int, default=8, help="Governor concurrency cap")
+    parser.add_argument("--sdk-retries", type=int, default=2, help="SDK max_retries for the ungoverned run")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,133 @@
+"""
+Intent micro-batching benchmark against a local fake LLM server
+
+The fake server speaks the Groq/OpenAI chat-completions API, answers after
+base + per-transcript latency, and only processes a fixed number of requests
+at once (like a provider's concurrency allowance). A burst of SMS is fired
+at IntentService with different INTENT_BATCH_WINDOW_MS settings; the report
+shows requests/sec, p50/p99 end-to-end latency and average batch size.
+
+    cd backend
+    python -m benchmarks.bench_intent_batching --requests 400 --rate 300
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+from groq import AsyncGroq
+
+from benchmarks.stub_server import StubServer, percentile
+
+
+def fake_llm_handler(base_latency: float, per_item_latency: float, capacity: int):
+    slots = asyncio.Semaphore(capacity)
+
+    async def handler(method, path, headers, body):
+        request = json.loads(body)
+        user_content = request["messages"][-1]["content"]
+        extraction = {
+            "intent": "Plumbing", "issue": "Leaking pipe", "urgency": "high",
+            "location": None, "preferred_time": None, "confidence": 0.9
+        }
+        if user_content.startswith("["):
+            items = json.loads(user_content)
+            content = {"results": [dict(extraction, id=item["id"]) for item in items]}
+        else:
+            items = [user_content]
+            content = extraction
+
+        async with slots:
+            await asyncio.sleep(base_latency + per_item_latency * len(items))
+
+        response = {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": json.dumps(content)},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+        }
+        return 200, {"Content-Type": "application/json"}, json.dumps(response).encode()
+
+    return handler
+
+
+async def run(base_url: str, window_ms: float, args) -> dict:
+    os.environ["INTENT_BATCH_WINDOW_MS"] = str(window_ms)
+    os.environ["INTENT_BATCH_MAX_SIZE"] = str(args.max_batch)
+    os.environ["INTENT_FASTPATH_THRESHOLD"] = "2"  # Force every message to the LLM
+    os.environ.setdefault("GROQ_MAX_RPS", "100000")  # Measure batching, not the rate governor
+    os.environ.setdefault("GROQ_BURST", "100000")
+    os.environ.setdefault("GROQ_MAX_CONCURRENCY", "100000")
+    from app.services.intent_service import IntentService
+
+    service = IntentService()
+    service.client = AsyncGroq(api_key="bench", base_url=base_url, max_retries=0, timeout=120)
+
+    latencies = []
+    rng = random.Random(7)
+
+    async def one(i: int):
+        start = time.perf_counter()
+        await service.extract_intent(f"Message {i}: the pipe under the sink is leaking")
+        latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    tasks = []
+    for i in range(args.requests):
+        tasks.append(asyncio.create_task(one(i)))
+        await asyncio.sleep(rng.expovariate(args.rate))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    await service.client.close()
+
+    stats = service.batcher.stats() if service.batcher else {"average_batch_size": 1.0}
+    return {
+        "rps": args.requests / elapsed,
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "batch": stats["average_batch_size"]
+    }
+
+
+async def main(args):
+    server = StubServer(fake_llm_handler(args.base_ms / 1000, args.per_item_ms / 1000, args.capacity))
+    base_url = await server.start()
+    print(
+        f"Fake LLM: {args.base_ms} ms + {args.per_item_ms} ms/transcript, {args.capacity} concurrent; "
+        f"{args.requests} requests at ~{args.rate}/s"
+    )
+    print(f"{'window':>8}  {'req/s':>7}  {'p50 ms':>8}  {'p99 ms':>8}  {'avg batch':>9}  {'LLM calls':>9}")
+
+    try:
+        baseline_p50 = None
+        for window in args.windows:
+            server.requests = 0
+            result = await run(base_url, window, args)
+            baseline_p50 = baseline_p50 if baseline_p50 is not None else result["p50"]
+            print(
+                f"{window:>6.0f}ms  {result['rps']:>7.1f}  {result['p50'] * 1000:>8.1f}  "
+                f"{result['p99'] * 1000:>8.1f}  {result['batch']:>9.2f}  {server.requests:>9}"
+                f"   (p50 {(result['p50'] - baseline_p50) * 1000:+.1f} ms vs. unbatched)"
+            )
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--rate", type=float, default=300.0, help="Mean arrival rate (requests/sec)")
+    parser.add_argument("--windows", type=float, nargs="+", default=[0, 5, 10, 25, 50])
+    parser.add_argument("--max-batch", type=int, default=16)
+    parser.add_argument("--base-ms", type=float, default=250.0)
+    parser.add_argument("--per-item-ms", type=float, default=15.0)
+    parser.add_argument("--capacity", type=int, default=8, help="Requests the fake LLM serves concurrently")
+    asyncio.run(main(parser.parse_args()))
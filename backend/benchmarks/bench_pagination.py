@@ -0,0 +1,134 @@
+"""
+Pagination benchmark: keyset cursors vs. OFFSET on a large tasks table
+
+Seeds a synthetic tasks table (default one million rows for one business,
+plus rows for other tenants), then times fetching pages 1 ... 10,000 of the
+dashboard listing two ways:
+
+  keyset  - TaskService.get_tasks with the cursor for that page
+  offset  - the same ordered query with OFFSET (page - 1) * limit
+
+    cd backend
+    python -m benchmarks.bench_pagination --rows 1000000 --limit 50
+
+The seeded SQLite file is reused on later runs when --db points at it.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+BUSINESS_ID = "bench-business"
+
+
+async def seed(rows: int, other_tenants: int):
+    from sqlalchemy import insert, select, func
+    from app.database import engine, init_db, TaskDB
+
+    with contextlib.redirect_stdout(io.StringIO()):  # Silence migration logging
+        await init_db()
+    async with engine.connect() as conn:
+        existing = (await conn.execute(
+            select(func.count(TaskDB.id)).where(TaskDB.business_id == BUSINESS_ID)
+        )).scalar()
+    if existing >= rows:
+        print(f"Reusing {existing:,} seeded tasks")
+        return
+
+    started = time.perf_counter()
+    start = datetime(2025, 1, 1)
+    chunk = 20000
+    async with engine.begin() as conn:
+        for offset in range(0, rows + other_tenants, chunk):
+            batch = []
+            for n in range(offset, min(offset + chunk, rows + other_tenants)):
+                batch.append({
+                    "id": str(uuid.uuid4()),
+                    "business_id": BUSINESS_ID if n < rows else f"tenant-{n % 50}",
+                    "intent": "plumbing",
+                    "issue": "Kitchen sink is leaking",
+                    "urgency": "medium",
+                    "confidence": 0.9,
+                    "status": ("new", "in_progress", "closed", "escalated")[n % 4],
+                    "customer_phone": "+15550000000",
+                    "transcript": "My kitchen sink has been leaking since this morning",
+                    # Several rows share each timestamp so the id tie-breaker matters
+                    "created_at": start + timedelta(seconds=n // 3),
+                    "updated_at": start,
+                })
+            await conn.execute(insert(TaskDB), batch)
+    print(f"Seeded {rows:,} tasks (+{other_tenants:,} for other tenants) in {time.perf_counter() - started:.1f}s")
+
+
+async def time_call(call, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        await call()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+async def main(args):
+    if args.db:
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.abspath(args.db)}"
+    else:
+        path = os.path.join(tempfile.mkdtemp(prefix="bench-pagination-"), "tasks.db")
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+
+    from sqlalchemy import select
+    from app.database import engine, AsyncSessionLocal, TaskDB
+    from app.services.task_service import TaskService, TASK_KEYSET
+
+    await seed(args.rows, args.rows // 10)
+    tasks = TaskService()
+    ordered = (
+        select(TaskDB)
+        .where(TaskDB.business_id == BUSINESS_ID)
+        .order_by(TaskDB.created_at.desc(), TaskDB.id.desc())
+    )
+
+    print(f"limit={args.limit}, median of {args.repeats} fetches")
+    print(f"{'page':>7}  {'keyset ms':>9}  {'offset ms':>9}")
+    for page_number in args.pages:
+        skip = (page_number - 1) * args.limit
+        if skip >= args.rows:
+            continue
+
+        cursor = None
+        if skip:
+            # The cursor a client would hold after reading the previous page
+            async with AsyncSessionLocal() as session:
+                last = (await session.execute(ordered.offset(skip - 1).limit(1))).scalar_one()
+            cursor = TASK_KEYSET.encode(last, "next")
+
+        async def keyset():
+            page = await tasks.get_tasks(business_id=BUSINESS_ID, limit=args.limit, cursor=cursor)
+            assert len(page.items) == min(args.limit, args.rows - skip)
+
+        async def offset():
+            async with AsyncSessionLocal() as session:
+                rows = (await session.execute(ordered.offset(skip).limit(args.limit))).scalars().all()
+            assert len(rows) == min(args.limit, args.rows - skip)
+
+        keyset_ms = await time_call(keyset, args.repeats)
+        offset_ms = await time_call(offset, args.repeats)
+        print(f"{page_number:>7,}  {keyset_ms:>9.2f}  {offset_ms:>9.2f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Tasks for the benchmarked business")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000, 10000])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--db", help="SQLite file to seed/reuse (default: a temporary file)")
+    asyncio.run(main(parser.parse_args()))
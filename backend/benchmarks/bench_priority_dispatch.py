@@ -0,0 +1,132 @@
+"""
+Urgency scheduling benchmark: a critical call behind a backlog of routine ones
+
+Intent extractions go through IntentService and GroqGovernor against a local
+fake LLM (--latency-ms per call, --concurrency governor slots). Two scenarios,
+each run with FIFO slots (aging 0, the old behaviour) and with the priority
+scheduler:
+
+  burst  - --quotes routine "paint quote" messages arrive at once, then one
+           "burst pipe" message; reports how long the critical one took
+  flood  - critical messages for --flood-seconds at twice the rate the slots
+           can serve, with one paint quote arriving a quarter of the way in;
+           reports how long the quote took. With aging it goes ahead of the
+           criticals that arrive more than 3 x --aging seconds after it; with
+           strict priority (no aging) it waits for the whole flood to drain
+
+    cd backend
+    python -m benchmarks.bench_priority_dispatch --quotes 50 --concurrency 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from benchmarks.stub_server import StubServer, percentile
+
+QUOTE = "Could I get a quote to repaint the living room walls sometime next month? Ref {n}"
+CRITICAL = "Pipe burst under the kitchen sink, water everywhere, please send someone! Ref {n}"
+
+
+def llm_handler(latency: float):
+    async def handler(method, path, headers, body):
+        await asyncio.sleep(latency)
+        transcript = json.loads(body)["messages"][-1]["content"]
+        urgency = "critical" if "burst" in transcript else "low"
+        extraction = {"intent": "Plumbing" if urgency == "critical" else "Painting", "issue": transcript[:60],
+                      "urgency": urgency, "confidence": 0.9}
+        response = {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "bench",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": json.dumps(extraction)},
+                         "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+        }
+        return 200, {"Content-Type": "application/json"}, json.dumps(response).encode()
+
+    return handler
+
+
+async def timed(service, text: str) -> float:
+    started = time.perf_counter()
+    await service.extract_intent(text)
+    return time.perf_counter() - started
+
+
+async def burst(service, args):
+    quotes = [asyncio.create_task(timed(service, QUOTE.format(n=n))) for n in range(args.quotes)]
+    await asyncio.sleep(0.01)
+    critical = await timed(service, CRITICAL.format(n=0))
+    waits = await asyncio.gather(*quotes)
+    return critical, percentile(waits, 50), max(waits)
+
+
+async def flood(service, args, serial: int):
+    # Twice what the slots can serve, so the queue of critical calls keeps growing
+    interval = args.latency_ms / 1000 / args.concurrency / 2
+    criticals = []
+    quote = None
+    started = time.perf_counter()
+    n = 0
+    while time.perf_counter() - started < args.flood_seconds:
+        if quote is None and time.perf_counter() - started >= args.flood_seconds / 4:
+            quote = asyncio.create_task(timed(service, QUOTE.format(n=f"q{serial}")))
+        criticals.append(asyncio.create_task(timed(service, CRITICAL.format(n=f"{serial}-{n}"))))
+        n += 1
+        await asyncio.sleep(interval)
+    waits = await asyncio.gather(*criticals)
+    return await quote, percentile(waits, 50), len(waits)
+
+
+async def main(args):
+    server = StubServer(llm_handler(args.latency_ms / 1000))
+    base_url = await server.start()
+    os.environ.update({
+        "GROQ_API_KEY": "bench",
+        "GROQ_BASE_URL": base_url,
+        "INTENT_FASTPATH_THRESHOLD": "2",  # Every message goes to the (fake) LLM
+        "INTENT_CACHE_SIZE": "0",
+    })
+    from app.services.intent_service import IntentService
+    from app.services.rate_limiter import GroqGovernor
+
+    service = IntentService()
+    modes = {"fifo": 0.0, "priority": args.aging, "strict": 1e9}  # strict: urgency always wins
+
+    def governor(aging: float) -> GroqGovernor:
+        return GroqGovernor(
+            requests_per_second=1000, burst=1000, max_concurrency=args.concurrency,
+            queue_timeout=600, aging_seconds=aging
+        )
+
+    try:
+        print(f"Fake LLM {args.latency_ms:.0f} ms per call, {args.concurrency} governor slots, aging {args.aging}s per level")
+        print(f"\nburst: {args.quotes} paint quotes, then one burst pipe")
+        print(f"{'mode':<9}  {'critical ms':>11}  {'quote p50 ms':>12}  {'quote max ms':>12}")
+        for label in ("fifo", "priority"):
+            service.governor = governor(modes[label])
+            critical, p50, slowest = await burst(service, args)
+            print(f"{label:<9}  {critical * 1000:>11.0f}  {p50 * 1000:>12.0f}  {slowest * 1000:>12.0f}")
+
+        print(f"\nflood: {args.flood_seconds:.0f}s of burst pipes at twice the slots' rate, one paint quote {args.flood_seconds / 4:.0f}s in")
+        print(f"{'mode':<9}  {'quote ms':>8}  {'critical p50 ms':>15}  {'criticals':>9}")
+        for serial, label in enumerate(("fifo", "priority", "strict")):
+            service.governor = governor(modes[label])
+            quote, p50, count = await flood(service, args, serial)
+            print(f"{label:<9}  {quote * 1000:>8.0f}  {p50 * 1000:>15.0f}  {count:>9}")
+    finally:
+        await service.client.close()
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quotes", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="Fake LLM time per call")
+    parser.add_argument("--concurrency", type=int, default=2, help="Governor slots")
+    parser.add_argument("--aging", type=float, default=0.5, help="Seconds of waiting per urgency level")
+    parser.add_argument("--flood-seconds", type=float, default=4.0)
+    asyncio.run(main(parser.parse_args()))
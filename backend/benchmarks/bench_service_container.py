@@ -0,0 +1,121 @@
+"""
+Service container benchmark: startup time and per-request overhead
+
+1. Startup - a fresh interpreter imports main (building the ServiceContainer)
+   and runs the app lifespan startup; repeated --startup-runs times.
+2. Per request - POST /api/twilio/voice-inbound through the ASGI stack,
+   compared with a copy of the old handler that re-read env, built a new
+   Twilio Client and serialized the TwiML on every call.
+
+    cd backend
+    python -m benchmarks.bench_service_container --requests 2000
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.stub_server import percentile
+
+STARTUP_PROBE = """
+import asyncio, json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+async def run():
+    async with main.lifespan(main.app):
+        t2 = time.perf_counter()
+    return t2
+t2 = asyncio.run(run())
+print(json.dumps({"import": t1 - t0, "startup": t2 - t1}))
+"""
+
+
+def measure_startup(runs: int, env: dict):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", STARTUP_PROBE],
+            capture_output=True, text=True, env=env, check=True
+        ).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+    return samples
+
+
+async def measure_requests(requests: int):
+    import httpx
+    from fastapi import Request
+    from fastapi.responses import Response
+    from twilio.rest import Client
+    import main
+    from app.services.twilio_service import TwilioService
+
+    @main.app.post("/bench/legacy-voice-inbound")
+    async def legacy_voice_inbound(request: Request):
+        # The handler as it was: a new TwilioService (env reads + Client) per call
+        form_data = await request.form()
+        language = form_data.get("Language", "en")
+        twilio = object.__new__(TwilioService)
+        twilio.phone_number = os.getenv("TWILIO_PHONE_NUMBER")
+        twilio.client = Client(os.getenv("TWILIO_ACCOUNT_SID"), os.getenv("TWILIO_AUTH_TOKEN"))
+        twiml = twilio.generate_greeting_twiml(language=language)
+        return Response(content=twiml, media_type="application/xml")
+
+    form = {"From": "+15550000000", "To": "+15551111111", "CallSid": "CA" + "0" * 32}
+    results = {}
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for label, path in (("per-call", "/bench/legacy-voice-inbound"), ("container", "/api/twilio/voice-inbound")):
+                for _ in range(50):  # Warm up
+                    await client.post(path, data=form)
+                latencies = []
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    response = await client.post(path, data=form)
+                    latencies.append(time.perf_counter() - start)
+                    assert response.status_code == 200
+                results[label] = latencies
+    return results
+
+
+async def main_async(args):
+    with contextlib.redirect_stdout(io.StringIO()):  # Per-call logging
+        results = await measure_requests(args.requests)
+    print(f"\nPer-request ({args.requests} x POST /api/twilio/voice-inbound, in-process ASGI)")
+    print(f"{'handler':<10}  {'p50 us':>8}  {'p99 us':>8}  {'mean us':>8}")
+    for label, latencies in results.items():
+        print(
+            f"{label:<10}  {percentile(latencies, 50) * 1e6:>8.0f}  {percentile(latencies, 99) * 1e6:>8.0f}  "
+            f"{sum(latencies) / len(latencies) * 1e6:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--startup-runs", type=int, default=5)
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{data_dir}/bench.db"
+    os.environ["TRANSCRIPT_CACHE_DB"] = ""
+    os.environ.setdefault("TWILIO_ACCOUNT_SID", "AC" + "0" * 32)
+    os.environ.setdefault("TWILIO_AUTH_TOKEN", "bench")
+    os.environ.setdefault("TWILIO_PHONE_NUMBER", "+15551111111")
+    os.environ.setdefault("BACKEND_URL", "https://bench.example")
+
+    samples = measure_startup(args.startup_runs, dict(os.environ))
+    imports = [s["import"] for s in samples]
+    startups = [s["startup"] for s in samples]
+    print(f"Startup ({args.startup_runs} fresh interpreters)")
+    print(f"  import main + build container: p50 {percentile(imports, 50) * 1000:.0f} ms")
+    print(f"  lifespan startup:              p50 {percentile(startups, 50) * 1000:.0f} ms")
+
+    asyncio.run(main_async(args))
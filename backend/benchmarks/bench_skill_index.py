@@ -0,0 +1,171 @@
+"""
+Skill index benchmark: picking a worker for auto_assign_task
+
+Seeds W workers (default 10,000) with 1-5 of S skills (default 50) and
+random load/ratings for one business, plus workers for other tenants, then
+times choosing the best worker for random intents two ways:
+
+  sql    - one query: the business's workers with the skill (through the
+           worker_skills (business_id, skill) index) and spare capacity,
+           ordered by load and rating
+  index  - SkillIndex.best on the loaded per-business heaps
+
+It also reports the one-off cost of loading the business into the index and
+of applying an assignment (SkillIndex.put), and checks that both searches
+rank the same (load, rating) first.
+
+    cd backend
+    python -m benchmarks.bench_skill_index --workers 10000 --skills 50
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+BUSINESS_ID = "bench-business"
+
+
+def worker_row(rng: random.Random, business_id: str) -> dict:
+    max_tasks = rng.randint(1, 5)
+    current_tasks = rng.randint(0, max_tasks)
+    return {
+        "id": str(uuid.uuid4()),
+        "business_id": business_id,
+        "name": f"Worker {rng.randrange(10 ** 6)}",
+        "phone": f"+1555{rng.randrange(10 ** 7):07d}",
+        "status": rng.choice(("available", "available", "busy", "offline")),
+        "current_tasks": current_tasks,
+        "max_tasks": max_tasks,
+        "rating": rng.choice((None, round(rng.uniform(3, 5), 1))),
+        "total_jobs": 0,
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
+    }
+
+
+async def sql_pick(session, intent: str):
+    """The best worker for `intent` chosen by the database"""
+    from sqlalchemy import select
+    from app.database import WorkerDB, WorkerSkillDB
+
+    result = await session.execute(
+        select(WorkerDB.current_tasks, WorkerDB.rating)
+        .join(WorkerSkillDB, WorkerSkillDB.worker_id == WorkerDB.id)
+        .where(
+            WorkerSkillDB.business_id == BUSINESS_ID,
+            WorkerSkillDB.skill == intent,
+            WorkerDB.status.in_(["available", "busy"]),
+            WorkerDB.current_tasks < WorkerDB.max_tasks
+        )
+        .order_by(WorkerDB.current_tasks, WorkerDB.rating.desc())
+        .limit(1)
+    )
+    return result.first()
+
+
+@contextlib.contextmanager
+def timed(samples: list):
+    started = time.perf_counter()
+    yield
+    samples.append(time.perf_counter() - started)
+
+
+async def main(args):
+    os.environ["DATABASE_URL"] = (
+        f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench-skills-'), 'skills.db')}"
+    )
+    from sqlalchemy import insert, select
+    from app.database import AsyncSessionLocal, Base, WorkerDB, WorkerSkillDB, engine
+    from app.services.skill_index import SkillIndex
+
+    rng = random.Random(args.seed)
+    skills = [f"skill-{n}" for n in range(args.skills)]
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        rows = [worker_row(rng, BUSINESS_ID) for _ in range(args.workers)]
+        rows += [worker_row(rng, f"tenant-{n % 20}") for n in range(args.other_workers)]
+        skill_rows = [
+            {"worker_id": row["id"], "skill": skill, "business_id": row["business_id"]}
+            for row in rows for skill in rng.sample(skills, rng.randint(1, 5))
+        ]
+        await conn.execute(insert(WorkerDB), rows)
+        await conn.execute(insert(WorkerSkillDB), skill_rows)
+    by_id = {row["id"]: row for row in rows}
+
+    index = SkillIndex(ttl_seconds=float("inf"))
+    load_times = []
+    for _ in range(5):
+        with timed(load_times):
+            async with AsyncSessionLocal() as session:
+                workers = await session.execute(
+                    select(
+                        WorkerDB.id, WorkerDB.status, WorkerDB.current_tasks,
+                        WorkerDB.max_tasks, WorkerDB.rating
+                    ).where(WorkerDB.business_id == BUSINESS_ID)
+                )
+                worker_skills = {}
+                for worker_id, skill in await session.execute(
+                    select(WorkerSkillDB.worker_id, WorkerSkillDB.skill).where(WorkerSkillDB.business_id == BUSINESS_ID)
+                ):
+                    worker_skills.setdefault(worker_id, []).append(skill)
+                index.load(BUSINESS_ID, workers.all(), worker_skills)
+
+    intents = [rng.choice(skills) for _ in range(args.picks)]
+    sql_times, index_times, put_times = [], [], []
+    mismatches = 0
+    for intent in intents:
+        with timed(sql_times):
+            async with AsyncSessionLocal() as session:
+                best = await sql_pick(session, intent)
+        with timed(index_times):
+            picked = index.best(BUSINESS_ID, intent)
+
+        # Ties may pick different workers; the ranking key must match
+        expected = (best.current_tasks, -(best.rating or 0.0)) if best else None
+        row = by_id.get(picked)
+        got = (row["current_tasks"], -(row["rating"] or 0.0)) if row else None
+        mismatches += got != expected
+
+        # Apply the assignment to the index the way assign_task_to_worker does
+        if picked is not None:
+            row = by_id[picked]
+            row["current_tasks"] += 1
+            if row["current_tasks"] >= row["max_tasks"]:
+                row["status"] = "busy"
+            async with engine.begin() as conn:
+                await conn.execute(
+                    WorkerDB.__table__.update().where(WorkerDB.id == picked).values(
+                        current_tasks=row["current_tasks"], status=row["status"]
+                    )
+                )
+            with timed(put_times):
+                index.put(BUSINESS_ID, WorkerDB(**row))
+
+    def us(samples):
+        return statistics.median(samples) * 1e6
+
+    print(f"{args.workers:,} workers, {args.skills} skills (+{args.other_workers:,} for other tenants)")
+    print(f"index load (once per TTL):  {statistics.median(load_times) * 1000:>10.1f} ms")
+    print(f"sql pick:                   {us(sql_times):>10.2f} us  median of {len(sql_times)}")
+    print(f"index pick:                 {us(index_times):>10.2f} us  median of {len(index_times)}")
+    print(f"index update on assign:     {us(put_times):>10.2f} us")
+    print(f"ranking mismatches vs sql:  {mismatches:>10}")
+    print(index.stats())
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=10_000, help="Workers for the benchmarked business")
+    parser.add_argument("--other-workers", type=int, default=10_000)
+    parser.add_argument("--skills", type=int, default=50)
+    parser.add_argument("--picks", type=int, default=2000, help="Picks (each followed by an assignment)")
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,131 @@
+"""
+Twilio send benchmark: event-loop stall, blocking vs. offloaded sends
+
+A fake Twilio Messages API runs on its own thread (so blocking clients can
+still reach it) with a per-request latency and a simulated handshake cost
+for every new connection. Sends are issued concurrently while a probe task
+measures how late the event loop wakes it up:
+
+  blocking   - a new TwilioService per send calling messages.create on the
+               loop (the previous behaviour)
+  offloaded  - the shared get_twilio_service() with its send pool and
+               keep-alive connections
+
+    cd backend
+    python -m benchmarks.bench_twilio_sends --sends 100 --latency-ms 80
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import time
+
+from benchmarks.stub_server import StubServer, percentile
+
+TWILIO_API = "https://api.twilio.com"
+
+
+def fake_twilio_handler(latency: float):
+    counter = {"n": 0}
+
+    async def handler(method, path, headers, body):
+        await asyncio.sleep(latency)
+        counter["n"] += 1
+        message = {
+            "sid": f"SM{counter['n']:032d}",
+            "status": "queued",
+            "body": "bench",
+            "to": "+15550000000",
+            "from": "+15551111111",
+            "account_sid": "AC" + "0" * 32,
+            "date_created": None
+        }
+        return 201, {"Content-Type": "application/json"}, json.dumps(message).encode()
+
+    return handler
+
+
+def redirect(service, base_url: str):
+    """Point a TwilioService's REST client at the fake API"""
+    http_client = service.client.http_client
+    original = http_client.request
+
+    def request(method, url, *args, **kwargs):
+        return original(method, url.replace(TWILIO_API, base_url), *args, **kwargs)
+
+    http_client.request = request
+    return service
+
+
+async def measure(send, sends: int):
+    """Run `sends` concurrent sends while probing event-loop responsiveness"""
+    lags = []
+    done = asyncio.Event()
+
+    async def probe():
+        interval = 0.001
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append(max(0.0, time.perf_counter() - start - interval))
+
+    probe_task = asyncio.create_task(probe())
+    started = time.perf_counter()
+    await asyncio.gather(*(send(i) for i in range(sends)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe_task
+    return elapsed, lags
+
+
+async def main(args):
+    from app.services.twilio_service import TwilioService, get_twilio_service, close_twilio_service
+
+    os.environ.setdefault("TWILIO_ACCOUNT_SID", "AC" + "0" * 32)
+    os.environ.setdefault("TWILIO_AUTH_TOKEN", "bench")
+    os.environ.setdefault("TWILIO_PHONE_NUMBER", "+15551111111")
+    os.environ["TWILIO_SEND_WORKERS"] = str(args.workers)
+
+    server = StubServer(fake_twilio_handler(args.latency_ms / 1000), handshake_delay=args.handshake_ms / 1000)
+    base_url = server.start_in_thread()
+    print(
+        f"Fake Twilio: {args.latency_ms} ms/request, {args.handshake_ms} ms per new connection; "
+        f"{args.sends} concurrent sends"
+    )
+    print(f"{'mode':<10}  {'total s':>7}  {'sends/s':>7}  {'stall ms':>9}  {'max lag ms':>10}  {'p99 lag ms':>10}  {'conns':>5}")
+
+    async def blocking_send(i):
+        service = redirect(TwilioService(), base_url)
+        msg = service.client.messages.create(body="bench", from_=service.phone_number, to="+15550000000")
+        return msg.sid
+
+    async def offloaded_send(i):
+        service = get_twilio_service()
+        if not getattr(service, "_bench_redirected", False):
+            redirect(service, base_url)
+            service._bench_redirected = True
+        return await service.send_sms_notification("+15550000000", "bench")
+
+    try:
+        for label, send in (("blocking", blocking_send), ("offloaded", offloaded_send)):
+            server.connections = 0
+            with contextlib.redirect_stdout(io.StringIO()):  # Silence per-send logging
+                elapsed, lags = await measure(send, args.sends)
+            print(
+                f"{label:<10}  {elapsed:>7.2f}  {args.sends / elapsed:>7.1f}  {sum(lags) * 1000:>9.0f}  "
+                f"{max(lags, default=0) * 1000:>10.1f}  {percentile(lags, 99) * 1000:>10.1f}  {server.connections:>5}"
+            )
+    finally:
+        close_twilio_service()
+        server.stop_thread()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sends", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--handshake-ms", type=float, default=30.0, help="Extra cost of each new connection")
+    parser.add_argument("--workers", type=int, default=8, help="TWILIO_SEND_WORKERS for the offloaded run")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,68 @@
+"""
+Offline evaluation of the local intent fast path
+
+Runs IntentClassifier over a labeled transcript corpus (JSONL with
+"text", "intent" and optional "urgency") and reports, per threshold:
+accuracy of the answers it would return, fallthrough rate to the LLM,
+urgency accuracy and classification latency.
+
+    cd backend
+    python -m benchmarks.eval_intent_classifier
+    python -m benchmarks.eval_intent_classifier --corpus my_calls.jsonl --thresholds 0.7 0.8 0.9
+"""
+import argparse
+import json
+import os
+import time
+
+from app.services.intent_classifier import IntentClassifier
+from benchmarks.stub_server import percentile
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "data", "intent_corpus.jsonl")
+
+
+def load_corpus(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def evaluate(classifier: IntentClassifier, corpus: list, thresholds: list, show_errors: bool):
+    # Classify once; thresholds only change which answers are accepted
+    predictions, latencies = [], []
+    for row in corpus:
+        start = time.perf_counter()
+        result = classifier.classify(row["text"])
+        latencies.append(time.perf_counter() - start)
+        predictions.append(result)
+
+    overall = sum(p["intent"] == r["intent"] for p, r in zip(predictions, corpus)) / len(corpus)
+    labeled_urgency = [(p, r) for p, r in zip(predictions, corpus) if r.get("urgency")]
+    urgency = sum(p["urgency"] == r["urgency"] for p, r in labeled_urgency) / max(1, len(labeled_urgency))
+
+    print(f"Corpus: {len(corpus)} transcripts")
+    print(f"Latency: p50={percentile(latencies, 50) * 1e6:.0f} us  p99={percentile(latencies, 99) * 1e6:.0f} us")
+    print(f"Top-1 intent accuracy (no threshold): {overall:.1%}")
+    print(f"Urgency accuracy: {urgency:.1%}")
+    print()
+    print(f"{'threshold':>9}  {'answered':>8}  {'accuracy':>8}  {'fallthrough':>11}  {'wrong':>5}")
+
+    for threshold in thresholds:
+        answered = [(p, r) for p, r in zip(predictions, corpus) if p["confidence"] >= threshold]
+        correct = sum(p["intent"] == r["intent"] for p, r in answered)
+        accuracy = correct / len(answered) if answered else 0.0
+        fallthrough = 1 - len(answered) / len(corpus)
+        print(f"{threshold:>9.2f}  {len(answered):>8}  {accuracy:>8.1%}  {fallthrough:>11.1%}  {len(answered) - correct:>5}")
+
+        if show_errors:
+            for p, r in answered:
+                if p["intent"] != r["intent"]:
+                    print(f"           ✗ {r['text']!r}: got {p['intent']} ({p['confidence']}), want {r['intent']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.6, 0.7, 0.75, 0.8, 0.85, 0.9])
+    parser.add_argument("--show-errors", action="store_true")
+    args = parser.parse_args()
+    evaluate(IntentClassifier(), load_corpus(args.corpus), args.thresholds, args.show_errors)
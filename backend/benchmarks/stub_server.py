@@ -0,0 +1,153 @@
+"""
+Stub Server - Minimal asyncio HTTP/1.1 server used by the local benchmarks
+Stands in for Twilio / Groq so benchmarks run without network access
+"""
+import asyncio
+import os
+import ssl
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+# handler(method, path, headers, body) -> (status, headers, body)
+Handler = Callable[[str, str, Dict[str, str], bytes], Awaitable[Tuple[int, Dict[str, str], bytes]]]
+
+REASONS = {200: "OK", 201: "Created", 404: "Not Found", 429: "Too Many Requests", 500: "Internal Server Error"}
+
+
+class StubServer:
+    """Keep-alive HTTP/1.1 server with an optional simulated handshake delay"""
+
+    def __init__(self, handler: Handler, handshake_delay: float = 0.0, tls: bool = False):
+        self.handler = handler
+        self.handshake_delay = handshake_delay
+        self.tls = tls
+        self.connections = 0
+        self.requests = 0
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._cert_dir: Optional[tempfile.TemporaryDirectory] = None
+        self.ssl_context: Optional[ssl.SSLContext] = None
+        self.client_ssl_context: Optional[ssl.SSLContext] = None
+
+    async def start(self) -> str:
+        """Start listening on an ephemeral port and return the base URL"""
+        server_ctx = None
+        if self.tls:
+            server_ctx = self._make_tls_contexts()
+        self._server = await asyncio.start_server(self._serve, "127.0.0.1", 0, ssl=server_ctx)
+        port = self._server.sockets[0].getsockname()[1]
+        scheme = "https" if self.tls else "http"
+        return f"{scheme}://127.0.0.1:{port}"
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._cert_dir:
+            self._cert_dir.cleanup()
+
+    def start_in_thread(self) -> str:
+        """
+        Serve from a private event loop on a daemon thread, for benchmarks
+        whose client side may block the caller's loop
+        """
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(self.start(), self._loop).result()
+
+    def stop_thread(self):
+        async def shutdown():
+            await self.stop()
+            # Idle keep-alive connections left open by clients
+            pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        if self.handshake_delay:
+            # Models the network round trips of a fresh TCP+TLS handshake
+            await asyncio.sleep(self.handshake_delay)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                body = b""
+                length = int(headers.get("content-length", "0") or 0)
+                if length:
+                    body = await reader.readexactly(length)
+
+                self.requests += 1
+                status, resp_headers, resp_body = await self.handler(method, path, headers, body)
+                head = [f"HTTP/1.1 {status} {REASONS.get(status, 'OK')}", f"Content-Length: {len(resp_body)}"]
+                head += [f"{k}: {v}" for k, v in resp_headers.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + resp_body)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, asyncio.CancelledError, ConnectionResetError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+    def _make_tls_contexts(self) -> ssl.SSLContext:
+        """Create a throwaway self-signed certificate for 127.0.0.1"""
+        from cryptography import x509
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import ec
+        from cryptography.x509.oid import NameOID
+        import ipaddress
+
+        key = ec.generate_private_key(ec.SECP256R1())
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+        cert = (
+            x509.CertificateBuilder()
+            .subject_name(name)
+            .issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(datetime.utcnow() - timedelta(days=1))
+            .not_valid_after(datetime.utcnow() + timedelta(days=1))
+            .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]), False)
+            .sign(key, hashes.SHA256())
+        )
+
+        self._cert_dir = tempfile.TemporaryDirectory()
+        cert_path = os.path.join(self._cert_dir.name, "cert.pem")
+        key_path = os.path.join(self._cert_dir.name, "key.pem")
+        with open(cert_path, "wb") as f:
+            f.write(cert.public_bytes(serialization.Encoding.PEM))
+        with open(key_path, "wb") as f:
+            f.write(key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption()
+            ))
+
+        self.ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        self.ssl_context.load_cert_chain(cert_path, key_path)
+        self.client_ssl_context = ssl.create_default_context(cafile=cert_path)
+        return self.ssl_context
+
+
+def percentile(samples, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
@@ -1,27 +1,38 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict
 from datetime import datetime
 from enum import Enum
+from contextlib import asynccontextmanager
 import os
 from dotenv import load_dotenv
 
-from app.services.intent_service import IntentService
-from app.services.task_service import TaskService
-from app.services.voice_service import VoiceService
-from app.database import init_db, get_db
+from app.container import ServiceContainer
+from app.database import get_db
 from app.models import TaskStatus, UrgencyLevel, Token, TokenData, UserCreate
-from app.services.auth_service import AuthService
+from app.services.pagination import CursorError, Page
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi import Depends
 
 load_dotenv()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start shared services once; close their connections on shutdown"""
+    # The web process runs JOB_INLINE_WORKERS job loops itself, so `python main.py` alone processes
+    # recordings; deployments that scale jobs out with worker.py set it to 0 (see docker-compose.yml)
+    await services.start(inline_job_workers=int(os.getenv("JOB_INLINE_WORKERS", "1")))
+    yield
+    await services.close()
+
+
 app = FastAPI(
     title="AI Voice + Task Intelligence Platform",
     description="B2B operational tool for voice-based intake and task intelligence",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS Configuration
@@ -31,15 +42,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Prev-Cursor"],
 )
 
-# Initialize services
-intent_service = IntentService()
-task_service = TaskService()
-voice_service = VoiceService()
-from app.services.worker_service import WorkerService
-worker_service = WorkerService()
-auth_service = AuthService()
+# Initialize services (built once per process, shared by every request)
+services = ServiceContainer()
+intent_service = services.intents
+task_service = services.tasks
+voice_service = services.voice
+worker_service = services.workers
+auth_service = services.auth
+job_queue = services.jobs
+webhook_idempotency = services.webhooks
+twiml_cache = services.twiml
 
 # Security configuration
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
@@ -59,11 +74,20 @@ async def get_current_business(token: str = Depends(oauth2_scheme)) -> str:
     return business_id
 
 
+def set_cursor_headers(response: Response, page: Page):
+    """Listing endpoints return the rows as the body and the page cursors as headers"""
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    if page.prev_cursor:
+        response.headers["X-Prev-Cursor"] = page.prev_cursor
+
+
 # Request/Response Models
 class VoiceCallRequest(BaseModel):
     phone_number: str
     audio_url: Optional[str] = None
     voice_text: Optional[str] = None  # For WhatsApp voice notes transcribed
+    to_number: Optional[str] = None  # Business line that was called
 
 
 class TaskResponse(BaseModel):
@@ -79,11 +103,41 @@ class TaskResponse(BaseModel):
     customer_phone: str
 
 
+class TaskListItem(BaseModel):
+    """A task in a listing; only the fields selected with ?fields= are present"""
+    task_id: str
+    intent: Optional[str] = None
+    issue: Optional[str] = None
+    urgency: Optional[str] = None
+    location: Optional[str] = None
+    preferred_time: Optional[str] = None
+    confidence: Optional[float] = None
+    status: Optional[str] = None
+    customer_phone: Optional[str] = None
+    customer_name: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    escalation_reason: Optional[str] = None
+    assigned_to: Optional[str] = None
+    assigned_worker_name: Optional[str] = None
+    prompt_version: Optional[str] = None
+    priority_at: Optional[datetime] = None
+    transcript: Optional[str] = None
+
+
 class EscalationRequest(BaseModel):
     task_id: str
     reason: str
 
 
+class IntentListRequest(BaseModel):
+    intents: List[str]
+
+
+class GreetingRequest(BaseModel):
+    greetings: Dict[str, str] = Field(default_factory=dict)  # language -> greeting text
+
+
 class DashboardStats(BaseModel):
     total_calls: int
     tasks_created: int
@@ -92,13 +146,6 @@ class DashboardStats(BaseModel):
     success_rate: float
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database on startup"""
-    await init_db()
-    print("✅ Database initialized")
-
-
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -151,6 +198,56 @@ async def get_me(business_id: str = Depends(get_current_business)):
     return {"business_id": business_id}
 
 
+@app.get("/api/business/intents")
+async def get_business_intents(business_id: str = Depends(get_current_business)):
+    """Service categories used for this business's intent extraction"""
+    intents = await intent_service.get_tenant_intents(business_id)
+    return {
+        "intents": list(intents or intent_service.SUPPORTED_INTENTS),
+        "custom": intents is not None,
+        "prompt_version": intent_service.prompt_for(intents).version
+    }
+
+
+@app.put("/api/business/intents")
+async def update_business_intents(
+    request: IntentListRequest,
+    business_id: str = Depends(get_current_business)
+):
+    """
+    Set custom service categories (an empty list restores the defaults).
+    Takes effect at once in this process; other API processes and the job
+    workers pick it up within TENANT_INTENTS_TTL seconds.
+    """
+    intents = intent_service.parse_intents(request.intents)
+    await auth_service.update_custom_intents(business_id, list(intents) or None)
+    intent_service.invalidate_tenant(business_id)
+    return await get_business_intents(business_id)
+
+
+@app.get("/api/business/greeting")
+async def get_business_greeting(business_id: str = Depends(get_current_business)):
+    """Custom inbound call greetings for this business, per language"""
+    greetings = await auth_service.get_business_greeting(business_id)
+    return {"greetings": greetings or {}, "custom": greetings is not None}
+
+
+@app.put("/api/business/greeting")
+async def update_business_greeting(
+    request: GreetingRequest,
+    business_id: str = Depends(get_current_business)
+):
+    """
+    Set custom call greetings (an empty mapping restores the defaults).
+    Takes effect at once in this process; other processes pick it up within
+    TWIML_TENANT_CACHE_TTL seconds.
+    """
+    greetings = {lang.strip(): text.strip() for lang, text in request.greetings.items() if lang.strip() and text.strip()}
+    await auth_service.update_custom_greeting(business_id, greetings or None)
+    twiml_cache.invalidate_tenants()
+    return await get_business_greeting(business_id)
+
+
 @app.post("/api/voice/inbound", response_model=TaskResponse)
 async def handle_inbound_call(
     request: VoiceCallRequest,
@@ -163,6 +260,10 @@ async def handle_inbound_call(
     3. Create task
     4. Trigger notifications
     """
+    # Lookup business
+    business = await auth_service.get_business_by_phone(request.to_number) if request.to_number else None
+    business_id = business.id if business else "system"
+    
     try:
         # Step 1: Get transcription
         if request.audio_url:
@@ -173,7 +274,7 @@ async def handle_inbound_call(
             raise HTTPException(400, "Either audio_url or voice_text required")
         
         # Step 2: Extract intent and entities
-        intent_result = await intent_service.extract_intent(transcript)
+        intent_result = await intent_service.extract_intent(transcript, business_id=business_id)
         
         # Step 3: Check confidence threshold
         threshold = float(os.getenv("CONFIDENCE_THRESHOLD", "0.75"))
@@ -183,7 +284,8 @@ async def handle_inbound_call(
                 task_service.send_escalation_notification,
                 intent_result,
                 "Low confidence score",
-                request.phone_number
+                request.phone_number,
+                business_id
             )
         
         # Step 4: Create task
@@ -194,14 +296,17 @@ async def handle_inbound_call(
             location=intent_result.get("location"),
             preferred_time=intent_result.get("preferred_time"),
             confidence=intent_result["confidence"],
+            prompt_version=intent_result.get("prompt_version"),
             customer_phone=request.phone_number,
-            transcript=transcript
+            transcript=transcript,
+            business_id=business_id
         )
         
         # Step 5: Send notification to operations team
         background_tasks.add_task(
             task_service.send_task_notification,
-            task
+            task,
+            business_id
         )
         
         return TaskResponse(
@@ -219,19 +324,35 @@ async def handle_inbound_call(
         
     except Exception as e:
         # Log failure
-        await task_service.log_failure(str(e), request.phone_number)
+        await task_service.log_failure(str(e), request.phone_number, business_id=business_id)
         raise HTTPException(500, f"Failed to process call: {str(e)}")
 
 
-@app.get("/api/tasks", response_model=List[TaskResponse])
+@app.get("/api/tasks", response_model=List[TaskListItem], response_model_exclude_unset=True)
 async def get_tasks(
+    response: Response,
     status: Optional[str] = None,
     limit: int = 50,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    sort: str = "created",
     business_id: str = Depends(get_current_business)
 ):
-    """Get tasks filtered by current business tenant"""
-    tasks = await task_service.get_tasks(status=status, business_id=business_id, limit=limit)
-    return tasks
+    """
+    Get tasks filtered by current business tenant (cursor from X-Next-Cursor /
+    X-Prev-Cursor). fields is a comma-separated selection, e.g.
+    fields=task_id,status,transcript; the default omits the transcript.
+    sort=created lists newest first; sort=priority lists the most pressing
+    first (urgency, with long-waiting tasks catching up; see priority_at).
+    """
+    try:
+        page = await task_service.get_tasks(
+            status=status, business_id=business_id, limit=limit, cursor=cursor, fields=fields, sort=sort
+        )
+    except ValueError as e:  # Unknown field or sort, or invalid cursor
+        raise HTTPException(400, str(e))
+    set_cursor_headers(response, page)
+    return page.items
 
 
 @app.get("/api/tasks/{task_id}", response_model=TaskResponse)
@@ -272,13 +393,59 @@ async def get_dashboard_stats(business_id: str = Depends(get_current_business)):
     return stats
 
 
+@app.post("/api/dashboard/stats/reconcile", response_model=DashboardStats)
+async def reconcile_dashboard_stats(business_id: str = Depends(get_current_business)):
+    """Recount the stored dashboard counters from the source tables"""
+    stats = await task_service.reconcile_stats(business_id=business_id)
+    return stats
+
+
+@app.get("/api/metrics/caches")
+async def get_cache_stats(business_id: str = Depends(get_current_business)):
+    """Hit/miss counters for the in-process caches, the Groq rate governor and the auto-assign queue"""
+    return {
+        "transcripts": voice_service.transcript_cache.stats(),
+        "intents": intent_service.cache.stats(),
+        "intent_batching": intent_service.batcher.stats() if intent_service.batcher else None,
+        "task_group_commit": task_service.group_commit.stats() if task_service.group_commit else None,
+        "worker_skill_index": worker_service.skill_index.stats(),
+        "auto_assign_queue": worker_service.assign_scheduler.stats(),
+        "groq_governor": intent_service.governor.stats(),
+        "webhook_recent_keys": webhook_idempotency.stats(),
+        "twiml_greetings": twiml_cache.stats()
+    }
+
+
+@app.get("/api/metrics/jobs")
+async def get_job_stats(business_id: str = Depends(get_current_business)):
+    """Background job counts by status (queued, running, done, dead)"""
+    return await job_queue.stats(business_id)
+
+
+@app.get("/api/metrics/notifications")
+async def get_notification_stats(business_id: str = Depends(get_current_business)):
+    """Outbound notification queue, coalescing and retry counters"""
+    return services.notifications.stats()
+
+
+@app.get("/api/notifications/{notification_id}")
+async def get_notification_status(notification_id: str, business_id: str = Depends(get_current_business)):
+    """Delivery status of a queued notification"""
+    status = await services.notifications.get_status(notification_id, business_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="Notification not found")
+    return status
 
 
 @app.get("/api/logs/failures")
-async def get_failures(limit: int = 50):
-    """Get failure logs"""
-    failures = await task_service.get_failures(limit=limit)
-    return failures
+async def get_failures(response: Response, limit: int = 50, cursor: Optional[str] = None):
+    """Get failure logs (cursor from X-Next-Cursor / X-Prev-Cursor)"""
+    try:
+        page = await task_service.get_failures(limit=limit, cursor=cursor)
+    except CursorError as e:
+        raise HTTPException(400, str(e))
+    set_cursor_headers(response, page)
+    return page.items
 
 
 # ============================================
@@ -303,13 +470,22 @@ async def create_worker(
 
 @app.get("/api/workers")
 async def get_workers(
+    response: Response,
     status: Optional[str] = None,
     skill: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
     business_id: str = Depends(get_current_business)
 ):
-    """Get all workers with optional filters"""
-    workers = await worker_service.get_workers(business_id=business_id, status=status, skill=skill)
-    return workers
+    """Get workers with optional filters; pass limit (and then cursor) to page through them"""
+    try:
+        page = await worker_service.get_workers(
+            business_id=business_id, status=status, skill=skill, limit=limit, cursor=cursor
+        )
+    except CursorError as e:
+        raise HTTPException(400, str(e))
+    set_cursor_headers(response, page)
+    return page.items
 
 
 @app.get("/api/workers/{worker_id}")
@@ -355,6 +531,20 @@ async def delete_worker(worker_id: str, business_id: str = Depends(get_current_b
     return {"message": "Worker deleted successfully"}
 
 
+@app.post("/api/tasks/assign-backlog")
+async def assign_backlog(
+    task_ids: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    business_id: str = Depends(get_current_business)
+):
+    """
+    Auto-assign unassigned new tasks in one pass, in priority order (as
+    GET /api/tasks?sort=priority): every backlog task, only the given
+    task_ids, or at most `limit` of them
+    """
+    return await worker_service.assign_backlog(business_id, task_ids=task_ids, limit=limit)
+
+
 @app.post("/api/tasks/{task_id}/assign")
 async def assign_task(
     task_id: str,
@@ -408,17 +598,15 @@ async def twilio_voice_inbound(request: Request):
     Twilio webhook for inbound phone calls
     Returns TwiML to greet and record caller
     """
-    from fastapi.responses import Response
-    from app.services.twilio_service import TwilioService
-    
     form_data = await request.form()
     caller_number = form_data.get("From", "Unknown")
+    to_number = form_data.get("To", "")
     language = form_data.get("Language", "en")  # Can be set by Twilio detect
     
     print(f"📞 Incoming call from: {caller_number}")
     
-    twilio = TwilioService()
-    twiml = twilio.generate_greeting_twiml(language=language)
+    # Prebuilt bytes; only the first call to a number looks up its greeting
+    twiml = await twiml_cache.greeting_for_number(to_number, language, auth_service.get_custom_greeting)
     
     return Response(content=twiml, media_type="application/xml")
 
@@ -432,14 +620,17 @@ async def twilio_process_recording(
     Twilio webhook after recording is complete
     Process the audio and create task
     """
-    from fastapi.responses import Response
-    from app.services.twilio_service import TwilioService
-    
     form_data = await request.form()
     recording_url = form_data.get("RecordingUrl")
     caller_number = form_data.get("From", "Unknown")
     to_number = form_data.get("To", "")
     recording_sid = form_data.get("RecordingSid")
+    idempotency_key = f"recording:{recording_sid}" if recording_sid else None
+    
+    # Twilio retry of a recording we already accepted: just confirm again
+    if await webhook_idempotency.begin(idempotency_key) is not None:
+        print(f"↩️ Duplicate recording delivery {recording_sid}")
+        return Response(content=twiml_cache.confirmation(), media_type="application/xml")
     
     # Lookup business
     business = await auth_service.get_business_by_phone(to_number)
@@ -447,18 +638,32 @@ async def twilio_process_recording(
     
     print(f"🎙️ Processing recording for {business_id} from {caller_number}: {recording_sid}")
     
-    # Process in background
-    background_tasks.add_task(
-        process_voice_recording,
-        recording_url,
-        caller_number,
-        recording_sid,
-        business_id
-    )
+    # Hand off to the durable job queue; Twilio retries reuse the same RecordingSid
+    job_payload = {
+        "recording_url": recording_url,
+        "caller_number": caller_number,
+        "recording_sid": recording_sid,
+        "business_id": business_id
+    }
+    job_id = None
+    try:
+        job_id, created = await job_queue.enqueue(
+            "process_recording",
+            job_payload,
+            idempotency_key=idempotency_key,
+            business_id=business_id
+        )
+        if not created:
+            print(f"↩️ Recording {recording_sid} already queued as job {job_id}")
+    except Exception as e:
+        # Never drop a recording: fall back to in-process handling
+        print(f"❌ Failed to enqueue recording job, processing in web worker: {e}")
+        background_tasks.add_task(process_voice_recording, **job_payload)
+    
+    await webhook_idempotency.finish(idempotency_key, {"job_id": job_id})
     
     # Return confirmation TwiML
-    twilio = TwilioService()
-    twiml = twilio.generate_confirmation_twiml()
+    twiml = twiml_cache.confirmation()
     
     return Response(content=twiml, media_type="application/xml")
 
@@ -476,6 +681,20 @@ async def twilio_recording_status(request: Request):
     return {"status": "received"}
 
 
+@app.post("/api/twilio/message-status")
+async def twilio_message_status(request: Request):
+    """
+    Twilio status callback for outbound notifications
+    """
+    form_data = await request.form()
+    message_sid = form_data.get("MessageSid")
+    status = form_data.get("MessageStatus")
+    
+    if message_sid and status:
+        await services.notifications.update_delivery_status(message_sid, status, form_data.get("ErrorCode"))
+    return {"status": "received"}
+
+
 @app.post("/api/twilio/whatsapp-inbound")
 async def twilio_whatsapp_inbound(
     request: Request,
@@ -485,14 +704,20 @@ async def twilio_whatsapp_inbound(
     Twilio webhook for inbound WhatsApp messages
     Handles voice notes and text messages
     """
-    from fastapi.responses import Response
-    
     form_data = await request.form()
     from_number = form_data.get("From", "").replace("whatsapp:", "")
     to_number = form_data.get("To", "").replace("whatsapp:", "")
     message_body = form_data.get("Body", "")
     media_url = form_data.get("MediaUrl0")  # Voice note or image
     media_type = form_data.get("MediaContentType0", "")
+    message_sid = form_data.get("MessageSid")
+    idempotency_key = f"whatsapp:{message_sid}" if message_sid else None
+    
+    # Twilio retry of a message we already handled: replay the original response
+    duplicate = await webhook_idempotency.begin(idempotency_key)
+    if duplicate is not None:
+        print(f"↩️ Duplicate WhatsApp delivery {message_sid}")
+        return duplicate
     
     # Lookup business
     business = await auth_service.get_business_by_phone(to_number)
@@ -500,6 +725,7 @@ async def twilio_whatsapp_inbound(
     
     print(f"💬 WhatsApp for {business_id} from {from_number}")
     
+    task = None
     try:
         # Handle voice notes
         if media_url and "audio" in media_type:
@@ -509,7 +735,7 @@ async def twilio_whatsapp_inbound(
             transcript = await voice_service.transcribe_audio(media_url)
             
             # Extract intent
-            intent_result = await intent_service.extract_intent(transcript)
+            intent_result = await intent_service.extract_intent(transcript, business_id=business_id)
             
             # Create task
             task = await task_service.create_task(
@@ -520,6 +746,7 @@ async def twilio_whatsapp_inbound(
                 location=intent_result.get("location"),
                 preferred_time=intent_result.get("preferred_time"),
                 confidence=intent_result["confidence"],
+                prompt_version=intent_result.get("prompt_version"),
                 customer_phone=from_number,
                 transcript=transcript
             )
@@ -534,7 +761,8 @@ async def twilio_whatsapp_inbound(
             # Notify operations team
             background_tasks.add_task(
                 task_service.send_task_notification,
-                task
+                task,
+                business_id
             )
         
         # Handle text messages
@@ -542,7 +770,7 @@ async def twilio_whatsapp_inbound(
             print(f"💬 Text message: {message_body}")
             
             # Extract intent from text
-            intent_result = await intent_service.extract_intent(message_body)
+            intent_result = await intent_service.extract_intent(message_body, business_id=business_id)
             
             # Create task
             task = await task_service.create_task(
@@ -552,8 +780,10 @@ async def twilio_whatsapp_inbound(
                 location=intent_result.get("location"),
                 preferred_time=intent_result.get("preferred_time"),
                 confidence=intent_result["confidence"],
+                prompt_version=intent_result.get("prompt_version"),
                 customer_phone=from_number,
-                transcript=message_body
+                transcript=message_body,
+                business_id=business_id
             )
             
             # Send confirmation
@@ -566,14 +796,18 @@ async def twilio_whatsapp_inbound(
             # Notify operations team
             background_tasks.add_task(
                 task_service.send_task_notification,
-                task
+                task,
+                business_id
             )
         
-        return {"status": "processed"}
+        response = {"status": "processed"}
+        await webhook_idempotency.finish(idempotency_key, response, task_id=task["id"] if task else None)
+        return response
         
     except Exception as e:
         print(f"❌ Error processing WhatsApp message: {e}")
-        await task_service.log_failure(str(e), from_number)
+        await webhook_idempotency.release(idempotency_key)
+        await task_service.log_failure(str(e), from_number, business_id=business_id)
         return {"status": "error", "message": str(e)}
 
 
@@ -589,6 +823,14 @@ async def twilio_sms_inbound(
     from_number = form_data.get("From", "")
     to_number = form_data.get("To", "")
     message_body = form_data.get("Body", "")
+    message_sid = form_data.get("MessageSid") or form_data.get("SmsSid")
+    idempotency_key = f"sms:{message_sid}" if message_sid else None
+    
+    # Twilio retry of a message we already handled: replay the original response
+    duplicate = await webhook_idempotency.begin(idempotency_key)
+    if duplicate is not None:
+        print(f"↩️ Duplicate SMS delivery {message_sid}")
+        return duplicate
     
     # Lookup business
     business = await auth_service.get_business_by_phone(to_number)
@@ -598,7 +840,7 @@ async def twilio_sms_inbound(
     
     try:
         # Extract intent from SMS
-        intent_result = await intent_service.extract_intent(message_body)
+        intent_result = await intent_service.extract_intent(message_body, business_id=business_id)
         
         # Create task
         task = await task_service.create_task(
@@ -609,6 +851,7 @@ async def twilio_sms_inbound(
             location=intent_result.get("location"),
             preferred_time=intent_result.get("preferred_time"),
             confidence=intent_result["confidence"],
+            prompt_version=intent_result.get("prompt_version"),
             customer_phone=from_number,
             transcript=message_body
         )
@@ -623,14 +866,18 @@ async def twilio_sms_inbound(
         # Notify operations team
         background_tasks.add_task(
             task_service.send_task_notification,
-            task
+            task,
+            business_id
         )
         
-        return {"status": "processed"}
+        response = {"status": "processed"}
+        await webhook_idempotency.finish(idempotency_key, response, task_id=task["id"])
+        return response
         
     except Exception as e:
         print(f"❌ Error processing SMS: {e}")
-        await task_service.log_failure(str(e), from_number)
+        await webhook_idempotency.release(idempotency_key)
+        await task_service.log_failure(str(e), from_number, business_id=business_id)
         return {"status": "error", "message": str(e)}
 
 
@@ -644,13 +891,19 @@ async def process_voice_recording(
     recording_sid: str,
     business_id: str
 ):
-    """Background task to process voice recording"""
+    """
+    Job handler to process a voice recording.
+    Failures before the task exists are re-raised so the job queue retries
+    (and logged once, by record_recording_failure, if every attempt fails);
+    after that a retry would create a duplicate task, so they are only logged.
+    """
+    task = None
     try:
         # Transcribe
         transcript = await voice_service.transcribe_audio(recording_url + ".mp3")
         
         # Extract intent
-        intent_result = await intent_service.extract_intent(transcript)
+        intent_result = await intent_service.extract_intent(transcript, business_id=business_id)
         
         # Create task
         task = await task_service.create_task(
@@ -661,35 +914,44 @@ async def process_voice_recording(
             location=intent_result.get("location"),
             preferred_time=intent_result.get("preferred_time"),
             confidence=intent_result["confidence"],
+            prompt_version=intent_result.get("prompt_version"),
             customer_phone=caller_number,
             transcript=transcript
         )
         
         # Send confirmation to customer
-        from app.services.twilio_service import TwilioService
-        twilio = TwilioService()
-        await twilio.send_customer_confirmation(
+        await services.twilio.send_customer_confirmation(
             caller_number,
             task,
             channel="sms"
         )
         
         # Notify operations team
-        await task_service.send_task_notification(task)
+        await task_service.send_task_notification(task, business_id)
         
         print(f"✅ Recording processed, task created: {task['id']}")
         
     except Exception as e:
         print(f"❌ Failed to process recording: {e}")
-        await task_service.log_failure(str(e), caller_number)
+        if task is None:
+            raise
+        await task_service.log_failure(str(e), caller_number, business_id=business_id)
+
+
+async def record_recording_failure(
+    recording_url: str,
+    caller_number: str,
+    recording_sid: str,
+    business_id: str,
+    error: str
+):
+    """Dead-letter handler: a recording that failed on every attempt is one failure"""
+    await task_service.log_failure(error, caller_number, business_id=business_id)
 
 
 async def send_whatsapp_confirmation(customer_phone: str, task: Dict):
     """Send WhatsApp confirmation to customer"""
-    from app.services.twilio_service import TwilioService
-    
-    twilio = TwilioService()
-    await twilio.send_customer_confirmation(
+    await services.twilio.send_customer_confirmation(
         customer_phone,
         task,
         language="en",  # TODO: Detect language from transcript
@@ -699,10 +961,7 @@ async def send_whatsapp_confirmation(customer_phone: str, task: Dict):
 
 async def send_sms_confirmation(customer_phone: str, task: Dict):
     """Send SMS confirmation to customer"""
-    from app.services.twilio_service import TwilioService
-    
-    twilio = TwilioService()
-    await twilio.send_customer_confirmation(
+    await services.twilio.send_customer_confirmation(
         customer_phone,
         task,
         language="en",
@@ -710,6 +969,8 @@ async def send_sms_confirmation(customer_phone: str, task: Dict):
     )
 
 
+job_queue.register("process_recording", process_voice_recording, on_dead=record_recording_failure)
+
 
 if __name__ == "__main__":
     import uvicorn
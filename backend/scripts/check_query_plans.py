@@ -0,0 +1,268 @@
+"""
+Query plan check - EXPLAIN every query the services issue and fail on full scans
+
+Runs each service method against a scratch database, records the SQL that
+SQLAlchemy sends, then EXPLAINs every SELECT/UPDATE/DELETE:
+
+- SQLite: EXPLAIN QUERY PLAN; a plain "SCAN <table>" (no index) or a
+  "USE TEMP B-TREE" sort is a finding.
+- Postgres: EXPLAIN (FORMAT JSON) with enable_seqscan off, so a "Seq Scan"
+  only appears when no index can serve the query; "Sort" nodes are findings
+  too.
+
+    cd backend
+    python -m scripts.check_query_plans                      # temporary SQLite file
+    DATABASE_URL=postgresql+asyncpg://.../scratch python -m scripts.check_query_plans
+
+The Postgres database must be a disposable one: the check writes rows to it.
+Exits with status 1 if any query not listed in ALLOWED_SCANS has a finding.
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+if "DATABASE_URL" not in os.environ:
+    _scratch = os.path.join(tempfile.mkdtemp(prefix="query-plans-"), "plans.db")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_scratch}"
+
+from sqlalchemy import event
+
+from app.database import engine, init_db
+from app.services.auth_service import AuthService
+from app.services.counters import reconcile_all
+from app.services.intent_service import IntentService
+from app.services.job_queue import JobQueue
+from app.services.notification_dispatcher import NotificationDispatcher
+from app.services.task_service import TaskService
+from app.services.webhook_idempotency import WebhookIdempotency
+from app.services.worker_service import WorkerService
+
+# step label -> why a scan there is acceptable
+ALLOWED_SCANS: Dict[str, str] = {
+    "JobQueue.stats": "Counts every job by status; reads the (status, run_at) index end to end",
+    "JobQueue.claim": "Sorts only the due/expired jobs matched through the (status, run_at) index",
+    "WorkerService.get_workers(skill)": "Sorts only the workers matched through the (business_id, skill) index",
+    "migrations.backfill_business_counters": "One-off backfill over every business",
+}
+
+EXPLAINED_VERBS = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+class QueryRecorder:
+    """Collects distinct SQL statements per service step via before_cursor_execute"""
+
+    def __init__(self):
+        self.step = "setup"
+        self.queries: Dict[str, Tuple[str, object]] = {}  # statement -> (step, parameters)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.step == "setup" or executemany:
+            return
+        if statement.lstrip().upper().startswith(EXPLAINED_VERBS) and statement not in self.queries:
+            self.queries[statement] = (self.step, parameters)
+
+    async def run(self, step: str, coro):
+        self.step = step
+        try:
+            return await coro
+        finally:
+            self.step = "setup"
+
+
+async def exercise(recorder: QueryRecorder):
+    """Call each service method that touches the database at least once"""
+    auth, intents, tasks, workers = AuthService(), IntentService(), TaskService(), WorkerService()
+    jobs, webhooks = JobQueue(), WebhookIdempotency()
+    run = recorder.run
+
+    user = await run("AuthService.register_business", auth.register_business("plans@example.com", "secret", "Plans"))
+    business_id = user.id
+    await run("AuthService.authenticate_user", auth.authenticate_user("plans@example.com", "secret"))
+    await run("AuthService.get_business_by_phone", auth.get_business_by_phone("+15550000000"))
+    await run("AuthService.update_custom_greeting", auth.update_custom_greeting(business_id, {"en": "Hello"}))
+    await run("AuthService.get_business_greeting", auth.get_business_greeting(business_id))
+    await run("AuthService.get_custom_greeting", auth.get_custom_greeting("+15550000000"))
+    await run("AuthService.update_custom_intents", auth.update_custom_intents(business_id, ["plumbing"]))
+    await run("IntentService.get_tenant_intents", intents.get_tenant_intents(business_id))
+
+    created = []
+    for i in range(4):  # The last one is left for WorkerService.assign_backlog
+        created.append(await run("TaskService.create_task", tasks.create_task(
+            intent="plumbing", issue=f"Leak {i}", urgency="high", business_id=business_id,
+            confidence=0.9, customer_phone="+15551230000", transcript="My sink is leaking"
+        )))
+    task_id = created[0]["id"]
+    page = await run("TaskService.get_tasks", tasks.get_tasks(business_id=business_id, limit=1))
+    await run("TaskService.get_tasks", tasks.get_tasks(business_id=business_id, limit=1, cursor=page.next_cursor))
+    page = await run("TaskService.get_tasks", tasks.get_tasks(status="new", business_id=business_id, limit=1))
+    await run("TaskService.get_tasks", tasks.get_tasks(
+        status="new", business_id=business_id, limit=1, cursor=page.next_cursor
+    ))
+    for status in (None, "new"):
+        page = await run("TaskService.get_tasks(priority)", tasks.get_tasks(
+            status=status, business_id=business_id, limit=1, sort="priority"
+        ))
+        await run("TaskService.get_tasks(priority)", tasks.get_tasks(
+            status=status, business_id=business_id, limit=1, cursor=page.next_cursor, sort="priority"
+        ))
+    await run("TaskService.get_task", tasks.get_task(task_id))
+    await run("TaskService.update_task_status", tasks.update_task_status(task_id, "in_progress"))
+    await run("TaskService.escalate_task", tasks.escalate_task(created[1]["id"], "Customer asked for a manager"))
+    await run("TaskService.log_failure", tasks.log_failure("Plan check", "+15551230000", business_id=business_id))
+    await run("TaskService.log_failure", tasks.log_failure("Plan check 2", "+15551230000", business_id=business_id))
+    page = await run("TaskService.get_failures", tasks.get_failures(limit=1))
+    await run("TaskService.get_failures", tasks.get_failures(limit=1, cursor=page.next_cursor))
+    await run("TaskService.get_dashboard_stats", tasks.get_dashboard_stats(business_id))
+    await run("TaskService.reconcile_stats", tasks.reconcile_stats(business_id))
+
+    worker = await run("WorkerService.create_worker", workers.create_worker(
+        name="Asha", phone="+15559870000", skills=["plumbing"], business_id=business_id
+    ))
+    spare = await run("WorkerService.create_worker", workers.create_worker(
+        name="Ravi", phone="+15559870001", skills=["electrical"], business_id=business_id
+    ))
+    await run("WorkerService.get_workers", workers.get_workers(business_id=business_id))
+    page = await run("WorkerService.get_workers", workers.get_workers(business_id=business_id, limit=1))
+    await run("WorkerService.get_workers", workers.get_workers(business_id=business_id, limit=1, cursor=page.next_cursor))
+    await run("WorkerService.get_workers", workers.get_workers(business_id=business_id, status="available"))
+    page = await run("WorkerService.get_workers(skill)", workers.get_workers(
+        business_id=business_id, skill="plumbing", limit=1
+    ))
+    await run("WorkerService.get_workers(skill)", workers.get_workers(
+        business_id=business_id, skill="plumbing", limit=1, cursor=page.next_cursor
+    ))
+    await run("WorkerService.get_worker", workers.get_worker(worker["id"]))
+    await run("WorkerService.update_worker", workers.update_worker(spare["id"], status="offline"))
+    await run("WorkerService.update_worker", workers.update_worker(spare["id"], skills=["electrical", "hvac"]))
+    await run("WorkerService.assign_task_to_worker", workers.assign_task_to_worker(task_id, worker["id"]))
+    await run("WorkerService.auto_assign_task", workers.auto_assign_task(created[2]["id"]))
+    await run("WorkerService.assign_backlog", workers.assign_backlog(business_id))
+    await run("WorkerService.complete_task", workers.complete_task(task_id, rating=5.0))
+    await run("WorkerService.get_worker_stats", workers.get_worker_stats(business_id))
+    await run("WorkerService.delete_worker", workers.delete_worker(spare["id"]))
+
+    async def plan_check(fail: bool):
+        if fail:
+            raise RuntimeError("Plan check")
+
+    jobs.register("plan_check", plan_check)
+    for i, fail in enumerate((True, False)):
+        await run("JobQueue.enqueue", jobs.enqueue("plan_check", {"fail": fail}, idempotency_key=f"plan:{i}", business_id=business_id))
+    await run("JobQueue.enqueue", jobs.enqueue("plan_check", {"fail": False}, idempotency_key="plan:1"))
+    for _ in range(2):
+        job = await run("JobQueue.claim", jobs.claim("plan-checker"))
+        await run("JobQueue.run_job", jobs.run_job(job, "plan-checker"))
+    await run("JobQueue.overdue", jobs.overdue())
+    await run("JobQueue.stats", jobs.stats())
+    await run("JobQueue.stats(business)", jobs.stats(business_id))
+
+    await run("WebhookIdempotency.begin", webhooks.begin("sms:plan-check"))
+    await run("WebhookIdempotency.finish", webhooks.finish("sms:plan-check", {"status": "processed"}))
+    webhooks.recent.clear()
+    await run("WebhookIdempotency.begin", webhooks.begin("sms:plan-check"))
+    await run("WebhookIdempotency.begin", webhooks.begin("sms:plan-check-2"))
+    await run("WebhookIdempotency.release", webhooks.release("sms:plan-check-2"))
+    await run("WebhookIdempotency.prune", webhooks.prune(7))
+
+    notifications = NotificationDispatcher(workers=1)
+
+    async def notify_and_send():
+        notification_id = await notifications.notify("+15550000000", "Plan check", business_id=business_id)
+        await notifications.close()  # Waits for the send and its status update
+        return notification_id
+
+    notification_id = await run("NotificationDispatcher.notify", notify_and_send())
+    notifications.tracked.clear()  # As if another process had sent it
+    await run("NotificationDispatcher.get_status", notifications.get_status(notification_id, business_id))
+    await run("NotificationDispatcher.update_delivery_status", notifications.update_delivery_status("SMplan", "delivered"))
+    await run("NotificationDispatcher.prune", notifications.prune(7))
+
+    async with engine.begin() as conn:
+        await run("migrations.backfill_business_counters", reconcile_all(conn))
+
+
+def _sqlite_findings(rows) -> Tuple[List[str], List[str]]:
+    plan = [row[-1] for row in rows]
+    findings = []
+    for detail in plan:
+        if detail.startswith("SCAN ") and " INDEX " not in detail and "CONSTANT ROW" not in detail:
+            findings.append(f"full table scan: {detail}")
+        elif detail.startswith("USE TEMP B-TREE"):
+            findings.append(f"sort: {detail}")
+    return plan, findings
+
+
+def _postgres_findings(rows) -> Tuple[List[str], List[str]]:
+    document = rows[0][0]
+    if isinstance(document, str):
+        document = json.loads(document)
+    plan, findings = [], []
+
+    def walk(node: Dict, depth: int):
+        label = node["Node Type"] + (f" on {node['Relation Name']}" if "Relation Name" in node else "")
+        plan.append("  " * depth + label)
+        if node["Node Type"] == "Seq Scan":
+            findings.append(f"full table scan: {label}")
+        elif node["Node Type"] in ("Sort", "Incremental Sort"):
+            findings.append(f"sort: {', '.join(node.get('Sort Key', []))}")
+        for child in node.get("Plans", []):
+            walk(child, depth + 1)
+
+    walk(document[0]["Plan"], 0)
+    return plan, findings
+
+
+async def explain(queries: Dict[str, Tuple[str, object]]) -> int:
+    dialect = engine.dialect.name
+    failures = 0
+    async with engine.connect() as conn:
+        if dialect == "postgresql":
+            await conn.exec_driver_sql("SET enable_seqscan = off")
+            prefix, findings_for = "EXPLAIN (FORMAT JSON) ", _postgres_findings
+        else:
+            prefix, findings_for = "EXPLAIN QUERY PLAN ", _sqlite_findings
+
+        for statement, (step, parameters) in queries.items():
+            result = await conn.exec_driver_sql(prefix + statement, parameters)
+            plan, findings = findings_for(result.fetchall())
+            allowed = ALLOWED_SCANS.get(step)
+            status = "ok" if not findings else ("allowed" if allowed else "FAIL")
+            failures += status == "FAIL"
+
+            print(f"[{status}] {step}")
+            print("    " + " ".join(statement.split())[:160])
+            for line in plan:
+                print(f"      {line}")
+            for finding in findings:
+                print(f"    ! {finding}")
+            if findings and allowed:
+                print(f"    (allowed: {allowed})")
+        await conn.rollback()
+    return failures
+
+
+async def main() -> int:
+    await init_db()
+    recorder = QueryRecorder()
+    event.listen(engine.sync_engine, "before_cursor_execute", recorder)
+    try:
+        await exercise(recorder)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", recorder)
+
+    print(f"🔎 Explaining {len(recorder.queries)} distinct queries on {engine.dialect.name}\n")
+    failures = await explain(recorder.queries)
+    await engine.dispose()
+
+    if failures:
+        print(f"\n❌ {failures} query plan(s) scan or sort a whole table")
+        return 1
+    print("\n✅ Every service query is served by an index")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,79 @@
+"""
+Job Worker - Runs durable background jobs outside the web process
+Scale transcription throughput independently of the webhook responders:
+
+    python worker.py                  # JOB_WORKERS processes x JOB_WORKER_CONCURRENCY jobs each
+"""
+import os
+import signal
+import socket
+import asyncio
+import multiprocessing
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+async def prepare():
+    """Create tables / run migrations once, before any worker process starts"""
+    from app.database import init_db, engine
+    await init_db()
+    await engine.dispose()  # Don't hand pooled connections to forked children
+
+
+async def serve(process_index: int):
+    # Importing main registers the job handlers and builds the shared services
+    from main import services
+
+    concurrency = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+    name = f"{socket.gethostname()}-{os.getpid()}"
+
+    loop = asyncio.get_running_loop()
+    await services.start(init_database=False)
+    stop = services.start_job_loops(name, concurrency)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    print(f"👷 Worker {process_index} ({name}) running {concurrency} job loop(s)")
+    try:
+        await services.wait_for_job_loops()
+    finally:
+        await services.close()
+        print(f"👋 Worker {process_index} ({name}) stopped")
+
+
+def run_process(process_index: int):
+    asyncio.run(serve(process_index))
+
+
+def main():
+    asyncio.run(prepare())
+
+    process_count = max(1, int(os.getenv("JOB_WORKERS", "2")))
+    if process_count == 1:
+        run_process(0)
+        return
+
+    processes = [
+        multiprocessing.Process(target=run_process, args=(i,), name=f"job-worker-{i}")
+        for i in range(process_count)
+    ]
+    for process in processes:
+        process.start()
+
+    def forward(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, forward)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()